@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of the HTML-to-text extractor backends.
+
+Runs every installed backend over a corpus of saved pages and reports pages/sec,
+peak traced Python memory and peak RSS. Each backend runs in its own process so
+RSS numbers are not polluted by the other parsers.
+
+    python benchmarks/bench_extract.py
+    python benchmarks/bench_extract.py --corpus ~/saved_pages --repeat 20 --backend lxml --backend stream
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from noviq.scrape.extract import available_backends, decode_html, extract_text  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(ROOT, 'benchmarks', 'corpus')
+
+
+def load_corpus(corpus_dir):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, '*.htm*'))):
+        with open(path, 'rb') as f:
+            pages.append(decode_html(f.read()))
+    if not pages:
+        raise SystemExit(f"No .html files found in {corpus_dir}")
+    return pages
+
+
+def run_backend(backend, corpus_dir, repeat):
+    """
+    Benchmark one backend in the current process and return its measurements
+    """
+    pages = load_corpus(corpus_dir)
+    extract_text(pages[0], backend=backend)  # Warm up imports
+
+    start = time.perf_counter()
+    chars = 0
+    for _ in range(repeat):
+        for html in pages:
+            chars += len(extract_text(html, backend=backend))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for html in pages:
+        extract_text(html, backend=backend)
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        max_rss *= 1024
+
+    return {
+        'backend': backend,
+        'pages': len(pages) * repeat,
+        'seconds': elapsed,
+        'pages_per_sec': len(pages) * repeat / elapsed,
+        'avg_chars': chars // (len(pages) * repeat),
+        'peak_traced_mb': peak_traced / 1024 / 1024,
+        'peak_rss_mb': max_rss / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark noviq's HTML extractor backends")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='Directory of saved .html pages')
+    parser.add_argument('--repeat', type=int, default=10, help='Passes over the corpus per backend')
+    parser.add_argument('--backend', action='append', help='Backend to run (repeatable); defaults to all installed')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.corpus, args.repeat)))
+        return
+
+    results = []
+    for backend in args.backend or available_backends():
+        output = subprocess.run(
+            [sys.executable, __file__, '--worker', backend, '--corpus', args.corpus, '--repeat', str(args.repeat)],
+            capture_output=True, text=True, check=True
+        )
+        results.append(json.loads(output.stdout))
+
+    print(f"{'backend':<12} {'pages/sec':>10} {'avg chars':>10} {'traced MB':>10} {'RSS MB':>8}")
+    for result in sorted(results, key=lambda r: -r['pages_per_sec']):
+        print(f"{result['backend']:<12} {result['pages_per_sec']:>10.1f} {result['avg_chars']:>10} "
+              f"{result['peak_traced_mb']:>10.2f} {result['peak_rss_mb']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""
+Offline end-to-end benchmark of a research run.
+
+Drives ResearchManager against a local fixture web server (saved corpus pages, generated
+articles and a fake DuckDuckGo results page) and a deterministic fake LM, so the numbers
+measure noviq's own overhead rather than the network or the model. Reports per-phase and
+per-LLM-stage latency, pipeline stage busy time, throughput, peak RSS and traced Python
+allocations. Each scenario runs in its own process with its own cache directory.
+
+    python benchmarks/bench_research.py
+    python benchmarks/bench_research.py --scenario warm --lm-latency 0.05 --net-latency 0.02
+    python benchmarks/bench_research.py --save-baseline
+    python benchmarks/bench_research.py --compare --tolerance 0.25
+
+Scenarios:
+    cold    one run with empty page, search and LLM caches
+    warm    the same run repeated on the caches the first run filled
+    batch   several intents run concurrently through the batch runner
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, 'benchmarks')
+BASELINE_DIR = os.path.join(BENCH_DIR, 'baselines')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+SCENARIOS = ('cold', 'warm', 'batch')
+INTENTS = [
+    "How do heat pumps compare to gas furnaces for home heating",
+    "History and current state of solid state batteries",
+    "Effects of remote work on urban housing markets",
+    "How do large language models use retrieval augmentation",
+]
+QA_PAIRS = [("What is your main goal for this research?", "A balanced overview"),
+            ("How much detail do you need?", "Moderate detail with key numbers")]
+# Metrics where a larger value is a regression
+REGRESSION_METRICS = ('seconds', 'plan_seconds', 'research_seconds', 'report_seconds', 'peak_rss_mb', 'peak_traced_mb')
+
+
+class StageTimer:
+    """
+    Times every LLM stage call by wrapping Stage.__call__
+    """
+
+    def __init__(self):
+        self.stats = {}
+
+    def install(self):
+        from noviq.research.stages import Stage
+        original = Stage.__call__
+        timer = self
+
+        def timed_call(stage, **inputs):
+            started = time.perf_counter()
+            try:
+                return original(stage, **inputs)
+            finally:
+                stats = timer.stats.setdefault(stage.name, {'calls': 0, 'seconds': 0.0})
+                stats['calls'] += 1
+                stats['seconds'] += time.perf_counter() - started
+
+        Stage.__call__ = timed_call
+
+
+STAGE_TIMER = StageTimer()
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-words embeddings so the vector index runs without Ollama
+    """
+
+    def __init__(self, dim=256):
+        self.dim = dim
+
+    def embed(self, texts):
+        import numpy as np
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, hash(word) % self.dim] += 1.0
+        return vectors
+
+
+def research_once(intent, lm):
+    """
+    One end-to-end research run; returns its phase timings and pipeline stats
+    """
+    from noviq.research.context import ContextWindowManager
+    from noviq.research.research_manager import ResearchManager
+    from noviq.research.vector_index import VectorIndex
+
+    manager = ResearchManager('fake', context=ContextWindowManager('fake', context_length=8192), lm=lm)
+    if manager.vector_index is not None:
+        manager.vector_index = VectorIndex(embedder=HashingEmbedder())
+
+    started = time.perf_counter()
+    research_plan = manager.get_research_plan(intent, QA_PAIRS)
+    planned = time.perf_counter()
+    scraped_webpage_texts = manager.execute_research_plan(research_plan, intent, QA_PAIRS, listener=lambda event, payload: None)
+    researched = time.perf_counter()
+    manager.generate_report(intent, QA_PAIRS, scraped_webpage_texts)
+    reported = time.perf_counter()
+    return {
+        'plan_seconds': planned - started,
+        'research_seconds': researched - planned,
+        'report_seconds': reported - researched,
+        'pages': len(manager.sources),
+        'pipeline': {name: round(stats['busy_seconds'], 4) for name, stats in manager.pipeline.stats().items()},
+    }
+
+
+def run_scenario(scenario, lm, output_dir):
+    """
+    Run one scenario and return its measurements
+    """
+    if scenario == 'batch':
+        from noviq.research.batch import BatchJob, BatchRunner
+        jobs = [BatchJob(f"bench-{i}", intent, QA_PAIRS) for i, intent in enumerate(INTENTS)]
+        started = time.perf_counter()
+        summary = BatchRunner(output_dir, default_model='fake', max_jobs=2, lm=lm).run(jobs)
+        seconds = time.perf_counter() - started
+        return {'seconds': seconds, 'runs': summary['completed'], 'p50_seconds': summary['p50_seconds'],
+                'p95_seconds': summary['p95_seconds']}
+
+    if scenario == 'warm':
+        research_once(INTENTS[0], lm)  # Fill the caches; only the second run is measured
+        lm.calls = 0
+        STAGE_TIMER.stats.clear()
+    started = time.perf_counter()
+    result = research_once(INTENTS[0], lm)
+    result['seconds'] = time.perf_counter() - started
+    result['runs'] = 1
+    return result
+
+
+def measure(scenario, args):
+    """
+    Benchmark a scenario in the current process: one timed pass, then one pass under
+    tracemalloc on fresh caches for allocation numbers
+    """
+    from fake_lm import FakeLM
+    from fixture_server import FixtureServer
+
+    with FixtureServer(latency=args.net_latency) as server:
+        os.environ['NOVIQ_DDG_URL'] = server.ddg_url
+        os.environ['SEARCH_ENGINE'] = 'duckduckgo'
+        # Fixture pages are random words; score them but summarize them all so runs stay comparable
+        os.environ['NOVIQ_RELEVANCE_THRESHOLD'] = '0'
+        # Index pages even without an embedding model; research_once swaps in the hashing embedder
+        os.environ['NOVIQ_VECTOR_INDEX'] = '1'
+        STAGE_TIMER.install()
+
+        with tempfile.TemporaryDirectory() as cache_dir, open(os.devnull, 'w') as devnull:
+            os.environ['NOVIQ_CACHE_DIR'] = cache_dir
+            lm = FakeLM(latency=args.lm_latency)
+            with contextlib.redirect_stdout(devnull):
+                result = run_scenario(scenario, lm, os.path.join(cache_dir, 'reports'))
+            result['llm_calls'] = lm.calls
+            result['llm_stages'] = {name: {'calls': stats['calls'], 'seconds': round(stats['seconds'], 4)}
+                                    for name, stats in sorted(STAGE_TIMER.stats.items())}
+            result['http_requests'] = server.requests
+
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != 'darwin':
+            max_rss *= 1024
+
+        with tempfile.TemporaryDirectory() as cache_dir, open(os.devnull, 'w') as devnull:
+            os.environ['NOVIQ_CACHE_DIR'] = cache_dir
+            _reset_singletons()
+            tracemalloc.start()
+            with contextlib.redirect_stdout(devnull):
+                run_scenario(scenario, FakeLM(latency=args.lm_latency), os.path.join(cache_dir, 'reports'))
+            _, peak_traced = tracemalloc.get_traced_memory()
+            blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+            tracemalloc.stop()
+
+    result.update(
+        scenario=scenario,
+        runs_per_hour=result['runs'] / result['seconds'] * 3600,
+        peak_rss_mb=max_rss / 1024 / 1024,
+        peak_traced_mb=peak_traced / 1024 / 1024,
+        live_blocks=blocks,
+    )
+    if 'pages' in result:
+        result['pages_per_sec'] = result['pages'] / result['research_seconds']
+    return result
+
+
+def _reset_singletons():
+    # The caches are process-wide; drop them so the next pass opens the new cache directory
+    import noviq.cache.llm_cache
+    import noviq.cache.page_cache
+    import noviq.cache.search_cache
+    noviq.cache.llm_cache._llm_cache = None
+    noviq.cache.page_cache._page_cache = None
+    noviq.cache.search_cache._search_cache = None
+
+
+def compare(result, baseline, tolerance):
+    """
+    Returns a list of regressions of result against a saved baseline
+    """
+    regressions = []
+    for metric in REGRESSION_METRICS:
+        if metric in result and metric in baseline and baseline[metric] > 0:
+            change = (result[metric] - baseline[metric]) / baseline[metric]
+            if change > tolerance:
+                regressions.append(f"{result['scenario']}.{metric}: {baseline[metric]:.3f} -> {result[metric]:.3f} (+{change:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of noviq research runs")
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='Scenario to run (repeatable); defaults to all')
+    parser.add_argument('--lm-latency', type=float, default=0.0, help='Seconds every fake LM call takes')
+    parser.add_argument('--net-latency', type=float, default=0.0, help='Seconds every fixture server response takes')
+    parser.add_argument('--save-baseline', action='store_true', help='Save the results as the new baselines')
+    parser.add_argument('--compare', action='store_true', help='Fail if a result regressed against its baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown before --compare fails')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args)))
+        return
+
+    results = []
+    for scenario in args.scenario or SCENARIOS:
+        output = subprocess.run(
+            [sys.executable, __file__, '--worker', scenario,
+             '--lm-latency', str(args.lm_latency), '--net-latency', str(args.net_latency)],
+            capture_output=True, text=True, check=True
+        )
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    print(f"{'scenario':<10} {'seconds':>8} {'plan':>7} {'research':>9} {'report':>7} {'pages/s':>8} "
+          f"{'runs/h':>8} {'LLM calls':>9} {'RSS MB':>7} {'traced MB':>9} {'blocks':>8}")
+    for result in results:
+        print(f"{result['scenario']:<10} {result['seconds']:>8.3f} {result.get('plan_seconds', 0):>7.3f} "
+              f"{result.get('research_seconds', 0):>9.3f} {result.get('report_seconds', 0):>7.3f} "
+              f"{result.get('pages_per_sec', 0):>8.1f} {result['runs_per_hour']:>8.0f} {result['llm_calls']:>9} "
+              f"{result['peak_rss_mb']:>7.1f} {result['peak_traced_mb']:>9.2f} {result['live_blocks']:>8}")
+    for result in results:
+        print(f"\n{result['scenario']} LLM stages: " + ', '.join(
+            f"{name} {stats['calls']}x {stats['seconds']:.3f}s" for name, stats in result['llm_stages'].items()))
+        if 'pipeline' in result:
+            print(f"{result['scenario']} pipeline busy: " + ', '.join(
+                f"{name} {seconds:.3f}s" for name, seconds in result['pipeline'].items()))
+
+    regressions = []
+    for result in results:
+        path = os.path.join(BASELINE_DIR, f"{result['scenario']}.json")
+        if args.compare and os.path.exists(path):
+            with open(path) as f:
+                regressions.extend(compare(result, json.load(f), args.tolerance))
+        if args.save_baseline:
+            os.makedirs(BASELINE_DIR, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(result, f, indent=2, sort_keys=True)
+            print(f"Saved baseline {path}")
+
+    if regressions:
+        print("\nRegressions against baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Deterministic stand-in for the Ollama LM, for benchmarks that must not depend on a model.
+
+FakeLM reads the output fields a dspy prompt asks for and answers every one of them in the
+ChatAdapter format with text derived from a hash of the prompt, after sleeping for a
+configurable latency. Same prompt, same answer, so runs are repeatable.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+import dspy
+
+FIELD_HEADER = re.compile(r'\[\[ ## (\w+) ## \]\]')
+LIST_FIELDS = {'clarifying_questions', 'research_plan', 'web_search_queries'}
+WORDS = (
+    "analysis benchmark cache context dataset efficiency evidence framework history impact "
+    "latency method model network overview performance pipeline quality research result "
+    "review source study summary survey system throughput trend"
+).split()
+
+
+class FakeLM(dspy.BaseLM):
+    def __init__(self, latency=0.0, jitter=0.0, report_words=800):
+        """
+        Args:
+            latency (float): Seconds every call sleeps, standing in for prefill and decode
+            jitter (float): Extra uniform random seconds on top of latency
+            report_words (int): Length of generated report bodies
+        """
+        super().__init__(model='fake/noviq-bench', temperature=0.0, max_tokens=4096)
+        self.latency = latency
+        self.jitter = jitter
+        self.report_words = report_words
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _output_fields(self, prompt):
+        # The final instruction lists the fields to produce: "Respond with ... `[[ ## a ## ]]`, then ..."
+        tail = prompt[prompt.rfind('Respond with'):] if 'Respond with' in prompt else prompt
+        fields = [name for name in FIELD_HEADER.findall(tail) if name != 'completed']
+        return list(dict.fromkeys(fields))
+
+    @staticmethod
+    def _input_field(prompt, name):
+        # The last occurrence is the actual input; earlier ones are the format description
+        matches = re.findall(r'\[\[ ## ' + name + r' ## \]\]\n(.*?)(?:\n\n(?:\[\[ ## |Respond with)|\Z)', prompt, re.S)
+        return matches[-1].strip() if matches else ''
+
+    def _value(self, field, prompt, rng):
+        sentence = lambda n: ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+        if field == 'clarifying_questions':
+            return ["What is your main goal for this research?", "How much detail do you need?"]
+        if field == 'research_plan':
+            topic = self._input_field(prompt, 'user_intent')[:60] or 'the topic'
+            return [f"Survey the background of {topic}", f"Compare current approaches to {topic}",
+                    f"Collect measurements and evidence on {topic}", f"Summarize open problems in {topic}"]
+        if field == 'web_search_queries':
+            step = self._input_field(prompt, 'research_plan_step')[:80] or 'overview'
+            return [f"{step} {rng.choice(WORDS)}", f"{step} {rng.choice(WORDS)} {rng.choice(WORDS)}", f"{step} guide"]
+        if field == 'research_report':
+            body = ''.join(f"<h2>Section {i + 1}</h2><p>{' '.join(sentence(12) for _ in range(self.report_words // 60))}</p>"
+                           for i in range(5))
+            return f"<!DOCTYPE html><html><head><title>Report</title></head><body><h1>Research Report</h1>{body}</body></html>"
+        if field == 'reasoning':
+            return sentence(20)
+        return ' '.join(sentence(14) for _ in range(7))
+
+    def _complete(self, prompt):
+        rng = random.Random(hashlib.blake2b(prompt.encode('utf-8'), digest_size=8).digest())
+        parts = []
+        for field in self._output_fields(prompt):
+            value = self._value(field, prompt, rng)
+            if field in LIST_FIELDS:
+                value = json.dumps(value)
+            parts.append(f"[[ ## {field} ## ]]\n{value}")
+        parts.append("[[ ## completed ## ]]")
+        return '\n\n'.join(parts)
+
+    def __call__(self, prompt=None, messages=None, **kwargs):
+        return self.forward(prompt=prompt, messages=messages, **kwargs)
+
+    def forward(self, prompt=None, messages=None, **kwargs):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+        text = prompt or '\n\n'.join(str(message.get('content', '')) for message in messages or [])
+        with self._lock:
+            self.calls += 1
+        return [self._complete(text)]
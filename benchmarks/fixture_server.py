@@ -0,0 +1,163 @@
+"""
+Local HTTP fixture server for offline benchmarks.
+
+Serves the saved corpus pages plus any number of generated article pages under /pages/,
+and a fake DuckDuckGo HTML results page under /html/?q=... whose result links point back
+at those pages. Results and pages are derived from hashes of the query and path, so every
+run sees the same web. Point noviq at it with NOVIQ_DDG_URL=<server.ddg_url>.
+"""
+import glob
+import hashlib
+import html
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+RESULTS_PER_QUERY = 5
+
+
+def _seed(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def _vocabulary(size=3000):
+    rng = random.Random(0)
+    letters = 'etaoinshrdlucmfwypvbgk'
+    return [''.join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+
+VOCABULARY = _vocabulary()
+
+
+def synthetic_page(name, paragraphs=12):
+    """
+    A deterministic article page with the boilerplate real pages carry (nav, scripts, footer)
+    """
+    rng = random.Random(_seed(name))
+    sentence = lambda: ' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(10, 22))).capitalize() + '.'
+    title = ' '.join(rng.choice(VOCABULARY) for _ in range(4)).title()
+    body = '\n'.join(f"<p>{' '.join(sentence() for _ in range(rng.randint(4, 8)))}</p>" for _ in range(paragraphs))
+    nav = ''.join(f'<li><a href="/pages/{rng.choice(VOCABULARY)}.html">{rng.choice(VOCABULARY)}</a></li>' for _ in range(20))
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{title}</title>
+<style>body {{ font-family: sans-serif; }} .nav li {{ display: inline; }}</style>
+<script>window.analytics = {{ page: "{name}", ts: {rng.randint(0, 10 ** 9)} }};</script>
+</head><body>
+<nav><ul class="nav">{nav}</ul></nav>
+<article><h1>{title}</h1>
+{body}
+</article>
+<footer><p>Copyright fixture site. All rights reserved.</p></footer>
+</body></html>""".encode('utf-8')
+
+
+class FixtureServer:
+    """
+    Threaded HTTP server running in the background for the duration of a benchmark
+    """
+
+    def __init__(self, corpus_dir=DEFAULT_CORPUS, synthetic_pages=200, latency=0.0):
+        """
+        Args:
+            corpus_dir (str): Directory of saved .html pages served as-is
+            synthetic_pages (int): Generated pages search results can point at
+            latency (float): Seconds every response is delayed, standing in for network time
+        """
+        self.latency = latency
+        self.pages = {}
+        for path in sorted(glob.glob(os.path.join(corpus_dir, '*.htm*'))):
+            with open(path, 'rb') as f:
+                self.pages[os.path.splitext(os.path.basename(path))[0]] = f.read()
+        self.page_names = list(self.pages) + [f"article-{i:04d}" for i in range(synthetic_pages)]
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def ddg_url(self):
+        return f"{self.base_url}/html/"
+
+    def page(self, name):
+        if name not in self.pages and name in self.page_names:
+            self.pages[name] = synthetic_page(name)
+        return self.pages.get(name)
+
+    def results_page(self, query):
+        rng = random.Random(_seed(query))
+        names = rng.sample(self.page_names, min(RESULTS_PER_QUERY, len(self.page_names)))
+        results = ''.join(
+            f'<div class="result"><h2 class="result__title"><a href="{self.base_url}/pages/{name}.html">'
+            f'{html.escape(name.replace("-", " ").title())} - {html.escape(query)}</a></h2>'
+            f'<a class="result__url" href="{self.base_url}/pages/{name}.html">{name}</a></div>'
+            for name in names
+        )
+        return f"<html><body><div class=\"results\">{results}</div></body></html>".encode('utf-8')
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, like real sites
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body=b'', headers=None):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                parsed = urlparse(self.path)
+                if parsed.path == '/html/':
+                    query = parse_qs(parsed.query).get('q', [''])[0]
+                    return self._send(200, server.results_page(query), {'Content-Type': 'text/html; charset=utf-8'})
+                if parsed.path.startswith('/pages/'):
+                    name = os.path.splitext(parsed.path[len('/pages/'):])[0]
+                    body = server.page(name)
+                    if body is None:
+                        return self._send(404)
+                    etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+                    if self.headers.get('If-None-Match') == etag:
+                        return self._send(304, headers={'ETag': etag})
+                    content_type = 'text/html' if name == 'legacy_latin1_page' else 'text/html; charset=utf-8'
+                    return self._send(200, body, {'Content-Type': content_type, 'ETag': etag})
+                self._send(404)
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='noviq-fixture-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
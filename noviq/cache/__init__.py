@@ -0,0 +1,18 @@
+import os
+
+
+def get_cache_dir():
+    """
+    Returns the root directory for noviq's on-disk caches, creating it if needed.
+    Set NOVIQ_CACHE_DIR to move it; defaults to ~/.cache/noviq
+    """
+    cache_dir = os.environ.get('NOVIQ_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'noviq')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def cache_enabled(name):
+    """
+    Returns False when a cache has been switched off with NOVIQ_<NAME>_CACHE=0
+    """
+    return os.environ.get(f'NOVIQ_{name.upper()}_CACHE', '1').lower() not in ('0', 'false', 'off', 'no')
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from noviq.cache import get_cache_dir, cache_enabled
+
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get('NOVIQ_LLM_CACHE_MAX_ENTRIES', 20000))
+
+
+def make_key(model_name, signature_name, temperature, inputs):
+    """
+    Build the memoization key for one LLM stage call
+    Args:
+        model_name (str): Model the stage runs on
+        signature_name (str): dspy.Signature class name
+        temperature (float): Sampling temperature
+        inputs (dict): Keyword inputs passed to the stage
+    Returns:
+        str: Hex digest identifying the call
+    """
+    payload = json.dumps(
+        {'model': model_name, 'signature': signature_name, 'temperature': temperature, 'inputs': inputs},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """
+    Persistent memoization of LLM stage outputs.
+    Keys come from make_key(); values are the prediction fields as JSON.
+    The least recently used entries are evicted once there are more than max_entries.
+    """
+
+    def __init__(self, path=None, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.path = path or os.path.join(get_cache_dir(), 'llm.sqlite')
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0}
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS outputs (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                signature TEXT NOT NULL,
+                outputs TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def get(self, key):
+        """
+        Returns the cached outputs dict for a key, or None
+        """
+        with self._lock:
+            row = self._db.execute("SELECT outputs FROM outputs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            self._db.execute("UPDATE outputs SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self.stats['hits'] += 1
+        return json.loads(row[0])
+
+    def put(self, key, model_name, signature_name, outputs):
+        """
+        Store the outputs of a stage call
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, signature_name, json.dumps(outputs, default=str), now, now)
+            )
+            self._db.execute("""
+                DELETE FROM outputs WHERE rowid IN (
+                    SELECT rowid FROM outputs ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self._db.commit()
+
+    def invalidate(self, signature_name=None, model_name=None):
+        """
+        Remove cached outputs, optionally only for one signature and/or model
+        Returns:
+            int: Number of entries removed
+        """
+        clauses = []
+        params = []
+        if signature_name:
+            clauses.append("signature = ?")
+            params.append(signature_name)
+        if model_name:
+            clauses.append("model = ?")
+            params.append(model_name)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            removed = self._db.execute(f"DELETE FROM outputs{where}", params).rowcount
+            self._db.commit()
+        return removed
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """
+    Returns the process-wide LLMCache, or None if it was disabled with NOVIQ_LLM_CACHE=0
+    """
+    global _llm_cache
+    if not cache_enabled('llm'):
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache()
+        return _llm_cache
@@ -0,0 +1,199 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from noviq.cache import get_cache_dir, cache_enabled
+from noviq.tools.urls import normalize_url
+
+PAGE_CACHE_TTL = int(os.environ.get('NOVIQ_PAGE_CACHE_TTL', 7 * 24 * 3600))  # Seconds before a page must be revalidated
+PAGE_CACHE_MAX_BYTES = int(os.environ.get('NOVIQ_PAGE_CACHE_MAX_MB', 512)) * 1024 * 1024
+
+
+class CachedPage:
+    def __init__(self, url, content_hash, text, etag, last_modified, fetched_at, ttl):
+        self.url = url
+        self.content_hash = content_hash
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.fresh = time.time() - fetched_at < ttl
+
+    def conditional_headers(self):
+        """
+        Returns the headers needed to revalidate this page with a conditional GET
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    Content-addressed on-disk cache of downloaded pages.
+    Raw bytes live in blobs/<sha256 of the body>, while an SQLite index maps the
+    normalized URL to the blob, the extracted text and the HTTP validators.
+    The least recently used entries are evicted once the cache grows past max_bytes.
+    """
+
+    def __init__(self, directory=None, ttl=PAGE_CACHE_TTL, max_bytes=PAGE_CACHE_MAX_BYTES):
+        self.directory = directory or os.path.join(get_cache_dir(), 'pages')
+        self.blob_dir = os.path.join(self.directory, 'blobs')
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'revalidated': 0, 'evictions': 0}
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(self.directory, 'index.sqlite'), check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                text TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)")
+        self._db.commit()
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+    def _blob_path(self, content_hash):
+        return os.path.join(self.blob_dir, content_hash)
+
+    def get(self, url):
+        """
+        Look up a page by URL
+        Returns:
+            CachedPage or None: The cached entry, which may be stale and need revalidation
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, content_hash, text, etag, last_modified, fetched_at FROM pages WHERE key = ?",
+                (self._key(url),)
+            ).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            self._db.execute("UPDATE pages SET last_access = ? WHERE key = ?", (time.time(), self._key(url)))
+            self._db.commit()
+            page = CachedPage(*row, ttl=self.ttl)
+            self.stats['hits' if page.fresh else 'stale'] += 1
+        return page
+
+    def refresh(self, url):
+        """
+        Mark a cached page as fresh again after the server answered 304 Not Modified
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE pages SET fetched_at = ?, last_access = ? WHERE key = ?", (now, now, self._key(url)))
+            self._db.commit()
+            self.stats['revalidated'] += 1
+
+    def read_raw(self, page):
+        """
+        Returns the raw bytes stored for a cached page, or None if the blob is gone
+        """
+        try:
+            with open(self._blob_path(page.content_hash), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, url, raw, text, etag=None, last_modified=None):
+        """
+        Store a downloaded page
+        Args:
+            url (str): URL the page was fetched from
+            raw (bytes): Response body
+            text (str): Text extracted from the body
+            etag (str): ETag response header, if any
+            last_modified (str): Last-Modified response header, if any
+        """
+        content_hash = hashlib.sha256(raw).hexdigest()
+        blob_path = self._blob_path(content_hash)
+        # Write the bytes outside the lock, but publish the blob and its row under it, so
+        # _evict cannot remove a blob shared with another URL before the row referencing it exists
+        tmp_path = None
+        if not os.path.exists(blob_path):
+            tmp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(raw)
+
+        now = time.time()
+        size = len(raw) + len(text.encode('utf-8'))
+        with self._lock:
+            if tmp_path is not None:
+                os.replace(tmp_path, blob_path)
+            elif not os.path.exists(blob_path):
+                # Evicted since the check above
+                with open(blob_path, 'wb') as f:
+                    f.write(raw)
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._key(url), url, content_hash, text, etag, last_modified, now, now, size)
+            )
+            self._db.commit()
+            self._evict()
+
+    def _evict(self):
+        """
+        Drop least recently used entries until the cache fits in max_bytes. Caller holds the lock.
+        """
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        while total > self.max_bytes:
+            row = self._db.execute("SELECT key, content_hash, size FROM pages ORDER BY last_access LIMIT 1").fetchone()
+            if row is None:
+                break
+            key, content_hash, size = row
+            self._db.execute("DELETE FROM pages WHERE key = ?", (key,))
+            # Blobs are shared between URLs serving identical bytes
+            if not self._db.execute("SELECT 1 FROM pages WHERE content_hash = ? LIMIT 1", (content_hash,)).fetchone():
+                try:
+                    os.remove(self._blob_path(content_hash))
+                except OSError:
+                    pass
+            total -= size
+            self.stats['evictions'] += 1
+        self._db.commit()
+
+    def clear(self):
+        """
+        Remove every cached page
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.commit()
+            for name in os.listdir(self.blob_dir):
+                os.remove(os.path.join(self.blob_dir, name))
+
+
+_page_cache = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    """
+    Returns the process-wide PageCache, or None if it was disabled with NOVIQ_PAGE_CACHE=0
+    """
+    global _page_cache
+    if not cache_enabled('page'):
+        return None
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache()
+        return _page_cache
@@ -0,0 +1,116 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from noviq.cache import get_cache_dir, cache_enabled
+
+SEARCH_CACHE_TTL = int(os.environ.get('NOVIQ_SEARCH_CACHE_TTL', 24 * 3600))  # Seconds a result list stays valid
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get('NOVIQ_SEARCH_CACHE_MAX_ENTRIES', 10000))
+
+
+def normalize_query(query):
+    """
+    Normalize a search query so trivially different spellings share a cache entry
+    """
+    return re.sub(r'\s+', ' ', query).strip().lower()
+
+
+class SearchCache:
+    """
+    SQLite-backed cache of (engine, normalized query) -> [(title, url)] search results.
+    Entries expire after ttl seconds and the least recently used ones are evicted
+    once there are more than max_entries.
+    """
+
+    def __init__(self, path=None, ttl=SEARCH_CACHE_TTL, max_entries=SEARCH_CACHE_MAX_ENTRIES):
+        self.path = path or os.path.join(get_cache_dir(), 'search.sqlite')
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0}
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                engine TEXT NOT NULL,
+                query TEXT NOT NULL,
+                results TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (engine, query)
+            )
+        """)
+        self._db.commit()
+
+    def get(self, engine, query):
+        """
+        Look up cached results
+        Args:
+            engine (str): Search engine the results came from
+            query (str): Search query
+        Returns:
+            list or None: List of (title, url) tuples, or None when missing or expired
+        """
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT results, fetched_at FROM results WHERE engine = ? AND query = ?", (engine, key)
+            ).fetchone()
+            if row is None or now - row[1] >= self.ttl:
+                self.stats['misses'] += 1
+                return None
+            self._db.execute("UPDATE results SET last_access = ? WHERE engine = ? AND query = ?", (now, engine, key))
+            self._db.commit()
+            self.stats['hits'] += 1
+        return [tuple(result) for result in json.loads(row[0])]
+
+    def put(self, engine, query, results):
+        """
+        Store the results of a search. Empty result lists are not cached,
+        since they usually mean the engine failed or served a CAPTCHA.
+        """
+        if not results:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (engine, normalize_query(query), json.dumps(results), now, now)
+            )
+            # Drop expired entries, then the least recently used ones over the bound
+            self._db.execute("DELETE FROM results WHERE fetched_at <= ?", (now - self.ttl,))
+            self._db.execute("""
+                DELETE FROM results WHERE rowid IN (
+                    SELECT rowid FROM results ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self._db.commit()
+
+    def clear(self):
+        """
+        Remove every cached search result
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM results")
+            self._db.commit()
+
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache():
+    """
+    Returns the process-wide SearchCache, or None if it was disabled with NOVIQ_SEARCH_CACHE=0
+    """
+    global _search_cache
+    if not cache_enabled('search'):
+        return None
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache()
+        return _search_cache
@@ -0,0 +1,277 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from urllib.parse import urlparse
+
+from noviq.cache import get_cache_dir
+from noviq.research.checkpoint import new_run_id
+
+BROKER_URL = os.environ.get('NOVIQ_BROKER')                       # e.g. sqlite:////shared/noviq/queue.sqlite
+LEASE_SECONDS = float(os.environ.get('NOVIQ_LEASE_SECONDS', 60))   # A job returns to the queue this long after its last heartbeat
+MAX_ATTEMPTS = int(os.environ.get('NOVIQ_MAX_ATTEMPTS', 3))        # Leases a job gets before it is marked failed
+
+
+class Task:
+    """
+    A job leased to one worker
+    """
+
+    def __init__(self, task_id, kind, payload, attempts):
+        self.id = task_id
+        self.kind = kind
+        self.payload = payload
+        self.attempts = attempts
+
+
+class Broker(ABC):
+    """
+    Durable job queue shared by the coordinator and every worker.
+    A worker leases a job for lease_seconds and keeps the lease alive with heartbeat();
+    a job whose lease runs out (the worker died or hung) goes back to the queue and is
+    leased again, up to max_attempts times. Implementations must make lease() atomic
+    across processes and machines.
+    """
+
+    @abstractmethod
+    def submit(self, kind, payload, task_id=None, max_attempts=MAX_ATTEMPTS):
+        """
+        Returns:
+            str: The job id
+        """
+        pass
+
+    @abstractmethod
+    def lease(self, worker_id, kinds=None, lease_seconds=LEASE_SECONDS):
+        """
+        Take the oldest queued job
+        Returns:
+            Task or None: None when nothing is queued
+        """
+        pass
+
+    @abstractmethod
+    def heartbeat(self, task_id, worker_id, lease_seconds=LEASE_SECONDS):
+        """
+        Extend a lease
+        Returns:
+            bool: False when the worker no longer holds the lease and should stop the job
+        """
+        pass
+
+    @abstractmethod
+    def complete(self, task_id, worker_id, result):
+        """
+        Returns:
+            bool: False when the lease had already been lost and the result was discarded
+        """
+        pass
+
+    @abstractmethod
+    def fail(self, task_id, worker_id, error, retry=True):
+        """
+        Give a job back after an error; it is queued again while it has attempts left
+        """
+        pass
+
+    @abstractmethod
+    def release(self, task_id, worker_id):
+        """
+        Hand a job back unfinished, e.g. when its worker shuts down; the lease does not count
+        as an attempt
+        """
+        pass
+
+    @abstractmethod
+    def jobs(self):
+        """
+        Returns:
+            list[dict]: Every job with its status, attempts, worker, timings, result and error
+        """
+        pass
+
+    def counts(self):
+        """
+        Returns:
+            dict: status -> number of jobs
+        """
+        counts = {'queued': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        for job in self.jobs():
+            counts[job['status']] = counts.get(job['status'], 0) + 1
+        return counts
+
+
+class SQLiteBroker(Broker):
+    """
+    Broker on one SQLite file. Every state change is a short BEGIN IMMEDIATE transaction,
+    so any number of worker processes can share it. Across machines the file has to sit
+    on a filesystem with working POSIX locks; otherwise plug in a networked broker.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_cache_dir(), 'cluster.sqlite')
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                worker TEXT,
+                lease_expires REAL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                result TEXT,
+                error TEXT
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._db)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return result
+
+    def submit(self, kind, payload, task_id=None, max_attempts=MAX_ATTEMPTS):
+        task_id = task_id or new_run_id()
+        self._transaction(lambda db: db.execute(
+            "INSERT INTO jobs (id, kind, payload, status, max_attempts, created_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+            (task_id, kind, json.dumps(payload), max_attempts, time.time())
+        ))
+        return task_id
+
+    def _reclaim_expired(self, db, now):
+        # Leases nobody renewed: requeue while attempts remain, otherwise give up on the job
+        db.execute("""
+            UPDATE jobs SET status = 'failed', worker = NULL, finished_at = ?,
+                error = COALESCE(error, 'lease expired ' || attempts || ' times')
+            WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts
+        """, (now, now))
+        db.execute("""
+            UPDATE jobs SET status = 'queued', worker = NULL
+            WHERE status = 'leased' AND lease_expires < ?
+        """, (now,))
+
+    def lease(self, worker_id, kinds=None, lease_seconds=LEASE_SECONDS):
+        def take(db):
+            now = time.time()
+            self._reclaim_expired(db, now)
+            query = "SELECT id, kind, payload, attempts FROM jobs WHERE status = 'queued'"
+            params = []
+            if kinds:
+                query += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+                params.extend(kinds)
+            row = db.execute(query + " ORDER BY created_at LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+            task_id, kind, payload, attempts = row
+            db.execute("""
+                UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1,
+                    started_at = COALESCE(started_at, ?)
+                WHERE id = ?
+            """, (worker_id, now + lease_seconds, now, task_id))
+            return Task(task_id, kind, json.loads(payload), attempts + 1)
+
+        return self._transaction(take)
+
+    def heartbeat(self, task_id, worker_id, lease_seconds=LEASE_SECONDS):
+        updated = self._transaction(lambda db: db.execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time() + lease_seconds, task_id, worker_id)
+        ).rowcount)
+        return updated == 1
+
+    def complete(self, task_id, worker_id, result):
+        updated = self._transaction(lambda db: db.execute("""
+            UPDATE jobs SET status = 'done', finished_at = ?, result = ?, error = NULL, lease_expires = NULL
+            WHERE id = ? AND worker = ? AND status = 'leased'
+        """, (time.time(), json.dumps(result, default=str), task_id, worker_id)).rowcount)
+        return updated == 1
+
+    def fail(self, task_id, worker_id, error, retry=True):
+        def give_back(db):
+            row = db.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND worker = ? AND status = 'leased'",
+                (task_id, worker_id)
+            ).fetchone()
+            if row is None:
+                return
+            attempts, max_attempts = row
+            if retry and attempts < max_attempts:
+                db.execute("UPDATE jobs SET status = 'queued', worker = NULL, lease_expires = NULL, error = ? WHERE id = ?",
+                           (error, task_id))
+            else:
+                db.execute("""
+                    UPDATE jobs SET status = 'failed', worker = NULL, lease_expires = NULL, finished_at = ?, error = ?
+                    WHERE id = ?
+                """, (time.time(), error, task_id))
+
+        self._transaction(give_back)
+
+    def release(self, task_id, worker_id):
+        self._transaction(lambda db: db.execute("""
+            UPDATE jobs SET status = 'queued', worker = NULL, lease_expires = NULL, attempts = MAX(attempts - 1, 0)
+            WHERE id = ? AND worker = ? AND status = 'leased'
+        """, (task_id, worker_id)))
+
+    def jobs(self):
+        with self._lock:
+            rows = self._db.execute("""
+                SELECT id, kind, payload, status, attempts, worker, created_at, started_at, finished_at, result, error
+                FROM jobs ORDER BY created_at
+            """).fetchall()
+        columns = ('id', 'kind', 'payload', 'status', 'attempts', 'worker', 'created_at', 'started_at',
+                   'finished_at', 'result', 'error')
+        jobs = []
+        for row in rows:
+            job = dict(zip(columns, row))
+            job['payload'] = json.loads(job['payload'])
+            job['result'] = json.loads(job['result']) if job['result'] else None
+            jobs.append(job)
+        return jobs
+
+    def counts(self):
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {'queued': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+BROKERS = {
+    # Same convention as SQLAlchemy: sqlite:///relative.sqlite, sqlite:////absolute.sqlite
+    'sqlite': lambda url: SQLiteBroker(url.path[1:] or None),
+}
+
+
+def get_broker(url=None):
+    """
+    Open the broker a URL names, defaulting to NOVIQ_BROKER and then a SQLite file in the cache directory
+        sqlite:////shared/noviq/queue.sqlite
+    Returns:
+        Broker
+    """
+    url = url or BROKER_URL
+    if not url:
+        return SQLiteBroker()
+    parsed = urlparse(url)
+    if parsed.scheme not in BROKERS:
+        raise ValueError(f"Unknown broker: {url}. Supported schemes: {', '.join(BROKERS)}.")
+    return BROKERS[parsed.scheme](parsed)
@@ -0,0 +1,66 @@
+import time
+
+from noviq.research.batch import percentile
+
+
+def submit_jobs(broker, jobs):
+    """
+    Queue batch jobs on the broker
+    Args:
+        broker (Broker): Shared queue
+        jobs (list[BatchJob]): Jobs, e.g. from load_jobs
+    Returns:
+        list[str]: Broker job ids in submission order
+    """
+    return [
+        broker.submit('research', {'name': job.id, 'intent': job.intent, 'qa_pairs': job.qa_pairs, 'model': job.model})
+        for job in jobs
+    ]
+
+
+def summarize(broker, job_ids=None):
+    """
+    Throughput summary of finished jobs, in the same shape as BatchRunner.run's
+    Args:
+        job_ids (list[str]): Only these jobs; all jobs on the broker by default
+    """
+    jobs = broker.jobs()
+    if job_ids is not None:
+        wanted = set(job_ids)
+        jobs = [job for job in jobs if job['id'] in wanted]
+    done = [job for job in jobs if job['status'] == 'done']
+    finished = [job for job in jobs if job['finished_at']]
+    started = [job['started_at'] for job in jobs if job['started_at']]
+    wall = max(job['finished_at'] for job in finished) - min(started) if finished and started else 0.0
+    latencies = [job['result']['seconds'] for job in done]
+    return {
+        'jobs': len(jobs),
+        'completed': len(done),
+        'failed': sum(1 for job in jobs if job['status'] == 'failed'),
+        'wall_seconds': round(wall, 3),
+        'jobs_per_hour': round(len(done) / wall * 3600, 2) if wall > 0 else 0.0,
+        'p50_seconds': percentile(latencies, 50),
+        'p95_seconds': percentile(latencies, 95),
+        'workers': sorted({job['result']['worker'] for job in done}),
+        'retried': sum(1 for job in jobs if job['attempts'] > 1),
+        'results': jobs,
+    }
+
+
+def wait_for_jobs(broker, job_ids, poll_seconds=2.0):
+    """
+    Block until every job has finished, printing progress as the counts change
+    Returns:
+        dict: summarize() of the jobs
+    """
+    wanted = set(job_ids)
+    last = None
+    while True:
+        jobs = [job for job in broker.jobs() if job['id'] in wanted]
+        counts = {status: sum(1 for job in jobs if job['status'] == status) for status in ('queued', 'leased', 'done', 'failed')}
+        if counts != last:
+            print(f"{counts['done']} done, {counts['failed']} failed, {counts['leased']} running, {counts['queued']} queued")
+            last = counts
+        if counts['done'] + counts['failed'] == len(wanted):
+            return summarize(broker, job_ids)
+        time.sleep(poll_seconds)
@@ -0,0 +1,210 @@
+import os
+import shutil
+import socket
+import threading
+import time
+import traceback
+
+from noviq.cache import get_cache_dir
+from noviq.distributed.broker import LEASE_SECONDS
+from noviq.research.batch import DEFAULT_MODEL
+from noviq.research.checkpoint import RunCheckpoint
+from noviq.research.context import ContextWindowManager
+from noviq.research.summarizer_pool import SummarizationPool, detect_llm_parallelism
+
+WORKER_JOBS = int(os.environ.get('NOVIQ_WORKER_JOBS', 1))          # Research jobs one worker runs at once
+POLL_SECONDS = float(os.environ.get('NOVIQ_WORKER_POLL', 2))       # Wait between lease attempts while the queue is empty
+SHARED_DIR = os.environ.get('NOVIQ_SHARED_DIR')                    # Checkpoints, vector indexes and reports every node can read
+
+
+class LeaseLostError(Exception):
+    """Raised inside a job whose lease another worker has taken over"""
+
+
+def get_shared_dir(shared_dir=None):
+    """
+    Directory for checkpoints, vector indexes and reports; must be shared between nodes for
+    a retried job to resume where the dead worker stopped
+    """
+    shared_dir = shared_dir or SHARED_DIR or os.path.join(get_cache_dir(), 'cluster')
+    for name in ('runs', 'index', 'reports'):
+        os.makedirs(os.path.join(shared_dir, name), exist_ok=True)
+    return shared_dir
+
+
+class ClusterWorker:
+    """
+    Pulls research jobs from a broker and runs them.
+    Each job is checkpointed to the shared directory, so when a worker dies its lease expires,
+    another worker leases the job and resumes from the checkpoint instead of starting over.
+    Jobs running on one worker share a summarization pool, per-model context window managers
+    and an LLM limiter, like batch and server jobs.
+    """
+
+    def __init__(self, broker, shared_dir=None, default_model=DEFAULT_MODEL, jobs=WORKER_JOBS, worker_id=None,
+                 lease_seconds=LEASE_SECONDS, lm=None):
+        """
+        Args:
+            broker (Broker): Queue to pull jobs from
+            shared_dir (str): Directory shared by all nodes, see get_shared_dir
+            default_model (str): Model for jobs that do not name one
+            jobs (int): Jobs run concurrently on this worker
+            worker_id (str): Name the broker records as lease holder, defaults to host-pid
+            lease_seconds (float): Lease length; heartbeats renew it every third of it
+            lm (dspy.LM): LM every job uses instead of its Ollama model, e.g. a fake one for benchmarks
+        """
+        self.broker = broker
+        self.shared_dir = get_shared_dir(shared_dir)
+        self.default_model = default_model
+        self.jobs = max(1, jobs)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.lm = lm
+        self.summarization_pool = SummarizationPool()
+        self.llm_limiter = threading.BoundedSemaphore(detect_llm_parallelism())
+        self.completed = 0
+        self.failed = 0
+        self._contexts = {}
+        self._active = {}       # task id -> ResearchManager, None until the manager exists
+        self._lost = set()      # Ids of active tasks whose lease another worker has taken over
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _context(self, model_name):
+        with self._lock:
+            if model_name not in self._contexts:
+                self._contexts[model_name] = ContextWindowManager(model_name)
+            return self._contexts[model_name]
+
+    def _checkpoint(self, task, model_name):
+        checkpoint = RunCheckpoint(os.path.join(self.shared_dir, 'runs', f"{task.id}.jsonl"))
+        if not checkpoint.started:
+            # Keep the run's vector index next to its checkpoint so a resuming node finds it
+            checkpoint.record('start', model=model_name,
+                              vector_index_dir=os.path.join(self.shared_dir, 'index', task.id))
+        return checkpoint
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _check_lease(self, task):
+        """
+        Raise LeaseLostError once the heartbeat has found the task taken over, so no further
+        phase (in particular report synthesis) is spent on it
+        """
+        with self._lock:
+            lost = task.id in self._lost
+        if lost:
+            raise LeaseLostError(f"lost the lease on {task.id}")
+
+    def run_task(self, task):
+        """
+        Research one leased job end to end, then report the outcome to the broker
+        """
+        from noviq.research.research_manager import ResearchManager
+
+        payload = task.payload
+        model_name = payload.get('model') or self.default_model
+        qa_pairs = [tuple(pair) for pair in payload.get('qa_pairs') or []]
+        started = time.perf_counter()
+        with self._lock:
+            self._active[task.id] = None
+        try:
+            if not model_name:
+                raise ValueError("no model given; set it per job or start the worker with --model")
+            manager = ResearchManager(
+                model_name, context=self._context(model_name), summarization_pool=self.summarization_pool,
+                checkpoint=self._checkpoint(task, model_name), lm=self.lm, llm_limiter=self.llm_limiter
+            )
+            with self._lock:
+                self._active[task.id] = manager
+            self._check_lease(task)
+            research_plan = manager.get_research_plan(payload['intent'], qa_pairs)
+            self._check_lease(task)
+            scraped_webpage_texts = manager.execute_research_plan(
+                research_plan, payload['intent'], qa_pairs, listener=lambda event, data: None
+            )
+            self._check_lease(task)
+            report = manager.generate_report(payload['intent'], qa_pairs, scraped_webpage_texts)
+            self._check_lease(task)
+            report_path = os.path.join(self.shared_dir, 'reports', f"{task.id}.html")
+            with open(report_path, 'w') as f:
+                f.write(report)
+            result = {
+                'report': report_path,
+                'sources': len(manager.sources),
+                'seconds': round(time.perf_counter() - started, 3),
+                'worker': self.worker_id,
+                'attempt': task.attempts,
+            }
+            if self.broker.complete(task.id, self.worker_id, result):
+                # The report is out; no retry will reopen the job's index
+                shutil.rmtree(os.path.join(self.shared_dir, 'index', task.id), ignore_errors=True)
+                self._count('completed')
+                print(f"[done] {task.id} in {result['seconds']:.1f}s (attempt {task.attempts}): {payload['intent']}")
+            else:
+                print(f"[lost] {task.id}: lease expired before it finished, result discarded")
+        except LeaseLostError:
+            # The job is another worker's now; failing it here would count against its attempts
+            print(f"[lost] {task.id}: lease taken over, stopped before finishing")
+        except Exception as e:
+            traceback.print_exc()
+            self._count('failed')
+            self.broker.fail(task.id, self.worker_id, f"{type(e).__name__}: {e}")
+            print(f"[failed] {task.id} (attempt {task.attempts}): {e}")
+        finally:
+            with self._lock:
+                self._active.pop(task.id, None)
+                self._lost.discard(task.id)
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._lock:
+                active = dict(self._active)
+            for task_id, manager in active.items():
+                if not self.broker.heartbeat(task_id, self.worker_id, self.lease_seconds):
+                    # Another worker owns the job now; stop spending LLM time on it
+                    print(f"⚠️  Lost the lease on {task_id}; stopping it")
+                    with self._lock:
+                        if task_id in self._active:
+                            self._lost.add(task_id)
+                    if manager is not None and manager.pipeline is not None:
+                        manager.pipeline.cancel()
+
+    def _work_loop(self, exit_when_idle):
+        while not self._stop.is_set():
+            task = self.broker.lease(self.worker_id, kinds=['research'], lease_seconds=self.lease_seconds)
+            if task is None:
+                if exit_when_idle:
+                    return
+                self._stop.wait(POLL_SECONDS)
+                continue
+            self.run_task(task)
+
+    def run(self, exit_when_idle=False):
+        """
+        Pull and run jobs until interrupted, or until the queue is empty with exit_when_idle.
+        On Ctrl-C the jobs in flight are handed back to the queue right away, without using up
+        one of their attempts.
+        """
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name='noviq-heartbeat', daemon=True)
+        heartbeat.start()
+        threads = [threading.Thread(target=self._work_loop, args=(exit_when_idle,), name=f'noviq-worker-{index}', daemon=True)
+                   for index in range(self.jobs)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            with self._lock:
+                active = list(self._active)
+            for task_id in active:
+                self.broker.release(task_id, self.worker_id)
+            print(f"\nStopped; handed {len(active)} jobs back to the queue")
+        finally:
+            self._stop.set()
+            heartbeat.join()
+        print(f"Worker {self.worker_id}: {self.completed} jobs done, {self.failed} failed")
@@ -1,7 +1,243 @@
-from noviq.ui.interface import beautiful_research
+import argparse
+import os
 
-def main():
-    beautiful_research()
+from noviq.tools.tracing import get_tracer, PROFILE_SPANS, TRACE_MEMORY, TRACE_PATH
+
+
+def clear_caches(args):
+    """
+    Clear the on-disk caches selected on the command line (pages, search results and LLM
+    outputs by default). Run checkpoints and vector indexes are only deleted when asked for,
+    since that loses resumable runs.
+    """
+    from noviq.cache.llm_cache import LLMCache
+    from noviq.cache.page_cache import PageCache
+    from noviq.cache.search_cache import SearchCache
+
+    clear_all = not (args.pages or args.search or args.llm or args.runs or args.index)
+    if args.pages or clear_all:
+        PageCache().clear()
+        print("Cleared page cache")
+    if args.search or clear_all:
+        SearchCache().clear()
+        print("Cleared search result cache")
+    if args.llm or clear_all:
+        removed = LLMCache().invalidate(signature_name=args.signature, model_name=args.model)
+        print(f"Removed {removed} cached LLM outputs")
+    if args.runs:
+        from noviq.research.checkpoint import clear_runs
+        print(f"Removed {clear_runs()} run checkpoints")
+    if args.index:
+        from noviq.research.vector_index import clear_indexes
+        print(f"Removed {clear_indexes()} run vector indexes")
+
+
+def use_headless_captcha_policy():
+    """
+    Keep interactive CAPTCHA solving out of unattended runs started from a terminal
+    """
+    from noviq.tools.captcha import HEADLESS_CAPTCHA_POLICY
+
+    # Read by captcha_policy() when the CaptchaHandler is created
+    os.environ.setdefault('NOVIQ_CAPTCHA_POLICY', HEADLESS_CAPTCHA_POLICY)
+
+
+def run_batch(args):
+    """
+    Run every research intent of a JSONL file without prompts
+    """
+    from noviq.research.batch import BatchRunner, load_jobs
+
+    use_headless_captcha_policy()
+    jobs = load_jobs(args.jobs_file)
+    runner = BatchRunner(args.output_dir, default_model=args.model, max_jobs=args.jobs)
+    print(f"Running {len(jobs)} research jobs, {runner.max_jobs} at a time")
+    BatchRunner.report(runner.run(jobs))
+
+
+def resume_run(args):
+    """
+    Continue a checkpointed research run without repeating finished work
+    """
+    from noviq.research.checkpoint import RunCheckpoint
+    from noviq.research.research_manager import ResearchManager
+
+    checkpoint = RunCheckpoint.open(args.run) if args.run else RunCheckpoint.latest()
+    if checkpoint is None:
+        print("No unfinished run to resume")
+        return
+    if checkpoint.research_plan is None:
+        print(f"Run {checkpoint.run_id} stopped before its research plan was made; start a new run instead")
+        return
+    if checkpoint.report_done:
+        print(f"Run {checkpoint.run_id} already produced its report; regenerating it")
+
+    research_manager = ResearchManager(checkpoint.model_name, checkpoint=checkpoint)
+    user_intent, qa_pairs = checkpoint.user_intent, checkpoint.qa_pairs
+    research_plan = research_manager.get_research_plan(user_intent, qa_pairs)
+    scraped_webpage_texts = research_manager.execute_research_plan(research_plan, user_intent, qa_pairs)
+    research_report_text = research_manager.generate_report(user_intent, qa_pairs, scraped_webpage_texts)
+    with open(args.output, "w") as f:
+        f.write(research_report_text)
+    print(f"Research report saved to {args.output}")
+
+
+def run_server(args):
+    """
+    Serve research jobs over a local REST API
+    """
+    from noviq.server.app import serve
+    from noviq.server.jobs import JobQueue
+
+    use_headless_captcha_policy()
+    serve(args.host, args.port, JobQueue(default_model=args.model, workers=args.jobs, max_queued=args.max_queued))
+
+
+def cluster_submit(args):
+    """
+    Queue the research intents of a JSONL file for cluster workers
+    """
+    from noviq.distributed.broker import get_broker
+    from noviq.distributed.coordinator import submit_jobs, wait_for_jobs
+    from noviq.research.batch import BatchRunner, load_jobs
+
+    broker = get_broker(args.broker)
+    job_ids = submit_jobs(broker, load_jobs(args.jobs_file))
+    print(f"Queued {len(job_ids)} research jobs")
+    if args.wait:
+        BatchRunner.report(wait_for_jobs(broker, job_ids))
+
+
+def cluster_worker(args):
+    """
+    Run research jobs pulled from the cluster queue
+    """
+    from noviq.distributed.broker import get_broker
+    from noviq.distributed.worker import ClusterWorker
+
+    use_headless_captcha_policy()
+    worker = ClusterWorker(get_broker(args.broker), shared_dir=args.shared_dir, default_model=args.model,
+                           jobs=args.jobs, lease_seconds=args.lease_seconds)
+    print(f"Worker {worker.worker_id} pulling jobs, {worker.jobs} at a time")
+    worker.run(exit_when_idle=args.exit_when_idle)
+
+
+def cluster_status(args):
+    """
+    Print the cluster queue's job counts and throughput
+    """
+    from noviq.distributed.broker import get_broker
+    from noviq.distributed.coordinator import summarize
+    from noviq.research.batch import BatchRunner
+
+    broker = get_broker(args.broker)
+    counts = broker.counts()
+    print(f"Queued: {counts['queued']}, running: {counts['leased']}, done: {counts['done']}, failed: {counts['failed']}")
+    summary = summarize(broker)
+    if summary['completed']:
+        BatchRunner.report(summary)
+        print(f"Workers: {', '.join(summary['workers'])}; {summary['retried']} jobs needed more than one attempt")
+    for job in summary['results']:
+        if job['status'] == 'failed':
+            print(f"[failed] {job['id']} after {job['attempts']} attempts: {job['error']}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="noviq", description="Free deep research on local models")
+    parser.add_argument("--trace", metavar="PATH", default=TRACE_PATH,
+                        help="Record stage spans and export them on exit (.json: Chrome trace, otherwise JSON lines)")
+    parser.add_argument("--profile", metavar="SPANS", default=",".join(PROFILE_SPANS),
+                        help="Comma-separated span names or categories to run under cProfile, e.g. extract,llm")
+    parser.add_argument("--ui", choices=("auto", "live", "fast", "plain"), default=None,
+                        help="Terminal output: live progress, fast (no animation), plain (logs); auto picks by TTY")
+    parser.add_argument("--trace-memory", action="store_true", default=TRACE_MEMORY,
+                        help="Record tracemalloc memory deltas per span")
+    parser.add_argument("--llm-workers", type=int, metavar="N",
+                        help="LLM calls to run at once; set it to the Ollama server's OLLAMA_NUM_PARALLEL, "
+                             "which noviq cannot read (default: NOVIQ_LLM_WORKERS, otherwise 1)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    cache_parser = subparsers.add_parser("cache", help="Manage on-disk caches")
+    cache_subparsers = cache_parser.add_subparsers(dest="cache_command", required=True)
+    clear_parser = cache_subparsers.add_parser("clear", help="Invalidate cached pages, search results or LLM outputs")
+    clear_parser.add_argument("--pages", action="store_true", help="Clear the page cache")
+    clear_parser.add_argument("--search", action="store_true", help="Clear the search result cache")
+    clear_parser.add_argument("--llm", action="store_true", help="Clear memoized LLM stage outputs")
+    clear_parser.add_argument("--runs", action="store_true",
+                              help="Delete run checkpoints; resumable runs are lost (never done without this flag)")
+    clear_parser.add_argument("--index", action="store_true",
+                              help="Delete the per-run vector indexes used for retrieval (never done without this flag)")
+    clear_parser.add_argument("--signature", help="Only clear LLM outputs of this signature, e.g. GenerateWebpageSummary")
+    clear_parser.add_argument("--model", help="Only clear LLM outputs of this model")
+    clear_parser.set_defaults(func=clear_caches)
+
+    from noviq.research.batch import BATCH_JOBS, DEFAULT_MODEL
+    batch_parser = subparsers.add_parser("batch", help="Run research intents from a JSONL file without prompts")
+    batch_parser.add_argument("jobs_file", help='JSONL file, one {"intent": ..., "qa_pairs": ..., "model": ...} per line')
+    batch_parser.add_argument("-o", "--output-dir", default="reports", help="Where reports and summary.json are written")
+    batch_parser.add_argument("-m", "--model", default=DEFAULT_MODEL, help="Model for jobs that do not name one")
+    batch_parser.add_argument("-j", "--jobs", type=int, default=BATCH_JOBS, help="Jobs to run concurrently")
+    batch_parser.set_defaults(func=run_batch)
+
+    resume_parser = subparsers.add_parser("resume", help="Continue an interrupted research run from its checkpoint")
+    resume_parser.add_argument("run", nargs="?", help="Run id or checkpoint path; defaults to the latest unfinished run")
+    resume_parser.add_argument("-o", "--output", default="report.html", help="Where the report is written")
+    resume_parser.set_defaults(func=resume_run)
+
+    from noviq.server.app import SERVE_HOST, SERVE_PORT
+    from noviq.server.jobs import SERVE_JOBS, SERVE_QUEUE
+    serve_parser = subparsers.add_parser("serve", help="Run research jobs submitted over a local REST API")
+    serve_parser.add_argument("--host", default=SERVE_HOST, help="Interface to listen on")
+    serve_parser.add_argument("--port", type=int, default=SERVE_PORT, help="Port to listen on")
+    serve_parser.add_argument("-m", "--model", default=DEFAULT_MODEL, help="Model for jobs that do not name one")
+    serve_parser.add_argument("-j", "--jobs", type=int, default=SERVE_JOBS, help="Jobs to run concurrently")
+    serve_parser.add_argument("--max-queued", type=int, default=SERVE_QUEUE,
+                              help="Jobs allowed to wait for a free slot; further submits get 429")
+    serve_parser.set_defaults(func=run_server)
+
+    from noviq.distributed.broker import LEASE_SECONDS
+    from noviq.distributed.worker import WORKER_JOBS
+    cluster_parser = subparsers.add_parser("cluster", help="Distribute research jobs across worker machines")
+    cluster_parser.add_argument("--broker", help="Queue URL, e.g. sqlite:////shared/noviq/queue.sqlite (default: NOVIQ_BROKER)")
+    cluster_subparsers = cluster_parser.add_subparsers(dest="cluster_command", required=True)
+    submit_parser = cluster_subparsers.add_parser("submit", help="Queue research intents from a JSONL file")
+    submit_parser.add_argument("jobs_file", help='JSONL file, one {"intent": ..., "qa_pairs": ..., "model": ...} per line')
+    submit_parser.add_argument("--wait", action="store_true", help="Wait for the jobs and print a throughput summary")
+    submit_parser.set_defaults(func=cluster_submit)
+    worker_parser = cluster_subparsers.add_parser("worker", help="Pull and run queued research jobs")
+    worker_parser.add_argument("--shared-dir", help="Checkpoints and reports directory shared by all nodes (default: NOVIQ_SHARED_DIR)")
+    worker_parser.add_argument("-m", "--model", default=DEFAULT_MODEL, help="Model for jobs that do not name one")
+    worker_parser.add_argument("-j", "--jobs", type=int, default=WORKER_JOBS, help="Jobs to run concurrently on this worker")
+    worker_parser.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS,
+                               help="Seconds without a heartbeat before a job is handed to another worker")
+    worker_parser.add_argument("--exit-when-idle", action="store_true", help="Stop once the queue is empty")
+    worker_parser.set_defaults(func=cluster_worker)
+    status_parser = cluster_subparsers.add_parser("status", help="Show queued, running and finished jobs")
+    status_parser.set_defaults(func=cluster_status)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.llm_workers:
+        # Read by detect_llm_parallelism() when pools and limiters are created
+        os.environ['NOVIQ_LLM_WORKERS'] = str(max(1, args.llm_workers))
+    profile = [name.strip() for name in args.profile.split(",") if name.strip()]
+    tracer = get_tracer()
+    if args.trace or profile or args.trace_memory:
+        tracer.enable(profile=profile, trace_memory=args.trace_memory)
+    try:
+        if args.command is None:
+            from noviq.ui.interface import beautiful_research
+            beautiful_research(ui_mode=args.ui)
+        else:
+            args.func(args)
+    finally:
+        if tracer.enabled:
+            tracer.report()
+            path = tracer.export(args.trace or "noviq-trace.jsonl")
+            print(f"Trace written to {path}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,255 @@
+import asyncio
+import inspect
+import threading
+
+REPORT_CHUNK_CHARS = 4000  # Characters per ReportChunk event
+
+_DONE = object()  # Marks the end of a session's event stream
+
+
+class ResearchEvent:
+    """
+    Base class of the events a ResearchSession yields. Fields are plain attributes;
+    to_dict() gives a JSON-friendly form with the event type included.
+    """
+
+    type = 'event'
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    def to_dict(self):
+        return {'type': self.type, **self.__dict__}
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={value!r}" for name, value in self.__dict__.items())
+        return f"{type(self).__name__}({fields})"
+
+
+class QuestionsAsked(ResearchEvent):
+    """questions: clarifying questions; answers: the answers that were supplied"""
+    type = 'questions_asked'
+
+
+class PlanReady(ResearchEvent):
+    """research_plan: list of plan steps"""
+    type = 'plan_ready'
+
+
+class QueriesIssued(ResearchEvent):
+    """step_index, step, queries: web searches issued for one plan step"""
+    type = 'queries_issued'
+
+
+class PageFetched(ResearchEvent):
+    """seq, step, query, title, url: a page accepted as a source; seq is (step_index, query_index)"""
+    type = 'page_fetched'
+
+
+class SummaryDone(ResearchEvent):
+    """seq, step, query, title, url, summary: a source has been summarized"""
+    type = 'summary_done'
+
+
+class QueryFailed(ResearchEvent):
+    """seq, step, query, reason: a query produced no usable source"""
+    type = 'query_failed'
+
+
+class ReportSection(ResearchEvent):
+    """round, index, total, notes: condensed notes for one batch of sources, emitted as each finishes"""
+    type = 'report_section'
+
+
+class ReportChunk(ResearchEvent):
+    """index, text: consecutive pieces of the finished HTML report"""
+    type = 'report_chunk'
+
+
+class ResearchComplete(ResearchEvent):
+    """report, sources, search_stats: the finished run"""
+    type = 'research_complete'
+
+
+class ResearchCancelled(ResearchEvent):
+    """reason: why the run stopped early"""
+    type = 'research_cancelled'
+
+
+class ResearchCancelledError(Exception):
+    """Raised inside the research thread to unwind a cancelled run"""
+
+
+_PIPELINE_EVENTS = {
+    'queries': QueriesIssued,
+    'page': PageFetched,
+    'summary': SummaryDone,
+    'query_failed': QueryFailed,
+}
+
+
+class ResearchSession:
+    """
+    One research run driven without the terminal UI.
+    The blocking research work runs on its own thread and its progress is bridged onto the
+    event loop, so any number of sessions can run in one process and be consumed with
+    `async for event in session.events()`. Clarifying questions are answered with
+    qa_pairs or an answer_questions callback instead of input().
+    """
+
+    def __init__(self, user_intent, model_name=None, qa_pairs=None, answer_questions=None, manager=None,
+                 lm=None, context=None, summarization_pool=None):
+        """
+        Args:
+            user_intent (str): The research topic
+            model_name (str): Ollama model; not needed when manager is given
+            qa_pairs (list): Pre-filled (question, answer) pairs; skips the clarifying questions
+            answer_questions (callable): Called with the clarifying questions, returns the answers;
+                may be a coroutine function. Without it and without qa_pairs no questions are asked.
+            manager (ResearchManager): Use this manager instead of creating one
+            lm (dspy.LM), context (ContextWindowManager), summarization_pool (SummarizationPool):
+                Passed to the ResearchManager that is created, so sessions can share them
+        """
+        self.user_intent = user_intent
+        self.model_name = model_name
+        self.qa_pairs = qa_pairs
+        self.answer_questions = answer_questions
+        self.manager = manager
+        self._manager_options = {'lm': lm, 'context': context, 'summarization_pool': summarization_pool}
+        self._cancelled = threading.Event()
+        self._loop = None
+        self._queue = None
+        self._thread = None
+
+    def cancel(self):
+        """
+        Stop the run. Work already handed to the LLM finishes, nothing new is started.
+        """
+        self._cancelled.set()
+        pipeline = self.manager.pipeline if self.manager else None
+        if pipeline is not None:
+            pipeline.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _emit(self, event):
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+        except RuntimeError:
+            pass  # The consumer's event loop is gone; the run is winding down unobserved
+
+    def _check_cancelled(self):
+        if self._cancelled.is_set():
+            raise ResearchCancelledError("cancelled")
+
+    def _on_pipeline_event(self, event, payload):
+        if self._cancelled.is_set():
+            self.manager.pipeline.cancel()
+            return
+        self._emit(_PIPELINE_EVENTS[event](**payload))
+
+    def _on_report_section(self, round_num, index, total, notes):
+        self._emit(ReportSection(round=round_num, index=index, total=total, notes=notes))
+
+    def _answer(self, questions):
+        answers = self.answer_questions(questions)
+        if inspect.isawaitable(answers):
+            answers = asyncio.run_coroutine_threadsafe(answers, self._loop).result()
+        return list(zip(questions, answers))
+
+    def _run(self):
+        try:
+            if self.manager is None:
+                from noviq.research.research_manager import ResearchManager
+                self.manager = ResearchManager(self.model_name, **self._manager_options)
+            manager = self.manager
+
+            qa_pairs = [tuple(pair) for pair in self.qa_pairs] if self.qa_pairs is not None else []
+            if self.qa_pairs is None and self.answer_questions is not None:
+                questions = manager.clarifying_question(user_intent=self.user_intent).clarifying_questions
+                self._check_cancelled()
+                qa_pairs = self._answer(questions)
+                self._emit(QuestionsAsked(questions=questions, answers=[answer for _, answer in qa_pairs]))
+            self._check_cancelled()
+
+            research_plan = manager.get_research_plan(self.user_intent, qa_pairs)
+            self._emit(PlanReady(research_plan=research_plan))
+            self._check_cancelled()
+
+            scraped_webpage_texts = manager.execute_research_plan(
+                research_plan, self.user_intent, qa_pairs, listener=self._on_pipeline_event
+            )
+            self._check_cancelled()
+
+            report = manager.generate_report(
+                self.user_intent, qa_pairs, scraped_webpage_texts,
+                check_cancelled=self._check_cancelled, on_section=self._on_report_section
+            )
+            self._check_cancelled()
+            for index, start in enumerate(range(0, len(report), REPORT_CHUNK_CHARS)):
+                self._emit(ReportChunk(index=index, text=report[start:start + REPORT_CHUNK_CHARS]))
+            self._emit(ResearchComplete(report=report, sources=list(manager.sources), search_stats=dict(manager.search_stats)))
+        except ResearchCancelledError:
+            self._emit(ResearchCancelled(reason='cancelled'))
+        except BaseException as e:
+            if self._cancelled.is_set():
+                self._emit(ResearchCancelled(reason=f"cancelled ({type(e).__name__})"))
+            else:
+                self._emit(e)
+        finally:
+            self._emit(_DONE)
+
+    async def events(self, timeout=None):
+        """
+        Start the run and yield its events as they happen
+        Args:
+            timeout (float): Seconds allowed for the whole run; on expiry the run is cancelled
+                and asyncio.TimeoutError is raised
+        Yields:
+            ResearchEvent: Progress events, ending with ResearchComplete or ResearchCancelled
+        """
+        if self._thread is not None:
+            raise RuntimeError("A ResearchSession can only be run once")
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._thread = threading.Thread(target=self._run, name='noviq-research-session', daemon=True)
+        self._thread.start()
+
+        deadline = self._loop.time() + timeout if timeout is not None else None
+        finished = False
+        try:
+            while True:
+                if deadline is None:
+                    event = await self._queue.get()
+                else:
+                    try:
+                        event = await asyncio.wait_for(self._queue.get(), max(0, deadline - self._loop.time()))
+                    except asyncio.TimeoutError:
+                        raise asyncio.TimeoutError(f"Research did not finish within {timeout}s") from None
+                if event is _DONE:
+                    finished = True
+                    return
+                if isinstance(event, BaseException):
+                    finished = True
+                    raise event
+                yield event
+        finally:
+            # Timeouts, errors and consumers that stop early all cancel the run
+            if not finished:
+                self.cancel()
+
+
+def research(user_intent, model_name=None, timeout=None, **options):
+    """
+    Run one research session and stream its events
+        async for event in research("solid state batteries", "llama3.1", qa_pairs=[]):
+            print(event.type)
+    Args:
+        timeout (float): Seconds allowed for the whole run
+        **options: Passed to ResearchSession
+    Returns:
+        AsyncIterator[ResearchEvent]
+    """
+    return ResearchSession(user_intent, model_name, **options).events(timeout=timeout)
@@ -0,0 +1,169 @@
+import json
+import os
+import re
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from noviq.research.context import ContextWindowManager
+from noviq.research.summarizer_pool import SummarizationPool, detect_llm_parallelism
+
+BATCH_JOBS = int(os.environ.get('NOVIQ_BATCH_JOBS', 2))  # Research jobs run at once
+DEFAULT_MODEL = os.environ.get('NOVIQ_MODEL')
+
+
+class BatchJob:
+    """
+    One research intent read from a batch file
+    """
+
+    def __init__(self, job_id, intent, qa_pairs=None, model=None):
+        self.id = job_id
+        self.intent = intent
+        self.qa_pairs = [tuple(pair) for pair in (qa_pairs or [])]
+        self.model = model
+
+
+def load_jobs(path):
+    """
+    Read jobs from a JSONL file, one object per line:
+    {"intent": "...", "id": "optional", "model": "optional", "qa_pairs": [["question", "answer"], ...]}
+    Returns:
+        list[BatchJob]: Jobs in file order
+    """
+    jobs = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON ({e})")
+            if not record.get('intent'):
+                raise ValueError(f"{path}:{line_number}: job has no intent")
+            job_id = str(record.get('id') or f"job-{line_number:04d}")
+            jobs.append(BatchJob(job_id, record['intent'], record.get('qa_pairs'), record.get('model')))
+    return jobs
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a list of numbers
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class BatchRunner:
+    """
+    Runs many research jobs without any prompts.
+    Jobs share one set of infrastructure: the page, search and LLM caches and the HTTP pool
+    are process-wide already, and the runner adds one LLM worker pool, one LLM limiter for
+    the plan, query and report calls, and one context window manager per model, so the
+    Ollama server sees a bounded number of requests no matter how many jobs are running.
+    """
+
+    def __init__(self, output_dir, default_model=DEFAULT_MODEL, max_jobs=BATCH_JOBS, lm=None):
+        """
+        Args:
+            output_dir (str): Where reports and summary.json are written
+            default_model (str): Model for jobs that do not name one
+            max_jobs (int): Jobs run concurrently
+            lm (dspy.LM): LM every job uses instead of its Ollama model, e.g. a fake one for benchmarks
+        """
+        self.lm = lm
+        self.output_dir = output_dir
+        self.default_model = default_model
+        self.max_jobs = max(1, max_jobs)
+        self.summarization_pool = SummarizationPool()
+        self.llm_limiter = threading.BoundedSemaphore(detect_llm_parallelism())
+        self._contexts = {}
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _context(self, model_name):
+        with self._lock:
+            if model_name not in self._contexts:
+                self._contexts[model_name] = ContextWindowManager(model_name)
+            return self._contexts[model_name]
+
+    def _report_path(self, job):
+        safe_id = re.sub(r'[^A-Za-z0-9._-]+', '_', job.id)
+        return os.path.join(self.output_dir, f"{safe_id}.html")
+
+    def run_job(self, job):
+        """
+        Research one intent end to end and write its report
+        Returns:
+            dict: Job result with status, latency and report path or error
+        """
+        from noviq.research.research_manager import ResearchManager
+
+        model_name = job.model or self.default_model
+        result = {'id': job.id, 'intent': job.intent, 'model': model_name, 'status': 'failed'}
+        started = time.perf_counter()
+        try:
+            if not model_name:
+                raise ValueError("no model given; set it per job, with --model or NOVIQ_MODEL")
+            manager = ResearchManager(
+                model_name, context=self._context(model_name), summarization_pool=self.summarization_pool,
+                lm=self.lm, llm_limiter=self.llm_limiter
+            )
+            research_plan = manager.get_research_plan(job.intent, job.qa_pairs)
+            scraped_webpage_texts = manager.execute_research_plan(
+                research_plan, job.intent, job.qa_pairs, listener=lambda event, payload: None
+            )
+            report = manager.generate_report(job.intent, job.qa_pairs, scraped_webpage_texts)
+            report_path = self._report_path(job)
+            with open(report_path, 'w') as f:
+                f.write(report)
+            result.update(status='ok', report=report_path, sources=len(manager.sources))
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        result['seconds'] = round(time.perf_counter() - started, 3)
+        print(f"[{result['status']}] {job.id} in {result['seconds']:.1f}s: {job.intent}")
+        return result
+
+    def run(self, jobs):
+        """
+        Run all jobs, max_jobs at a time, and write summary.json
+        Returns:
+            dict: Throughput summary with per-job results
+        """
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix='noviq-batch') as executor:
+            results = list(executor.map(self.run_job, jobs))
+        wall = time.perf_counter() - started
+
+        latencies = [result['seconds'] for result in results if result['status'] == 'ok']
+        completed = len(latencies)
+        summary = {
+            'jobs': len(results),
+            'completed': completed,
+            'failed': len(results) - completed,
+            'wall_seconds': round(wall, 3),
+            'jobs_per_hour': round(completed / wall * 3600, 2) if wall > 0 else 0.0,
+            'p50_seconds': percentile(latencies, 50),
+            'p95_seconds': percentile(latencies, 95),
+            'results': results,
+        }
+        with open(os.path.join(self.output_dir, 'summary.json'), 'w') as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+    @staticmethod
+    def report(summary):
+        """
+        Print the throughput summary
+        """
+        print(f"\n--- Batch Summary ---")
+        print(f"Jobs: {summary['completed']}/{summary['jobs']} completed, {summary['failed']} failed")
+        print(f"Wall time: {summary['wall_seconds']:.1f}s ({summary['jobs_per_hour']} jobs/hour)")
+        print(f"Job latency: p50 {summary['p50_seconds']:.1f}s, p95 {summary['p95_seconds']:.1f}s")
+        print(f"-------------------------")
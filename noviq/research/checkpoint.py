@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+import time
+
+from noviq.cache import get_cache_dir
+
+RUNS_KEEP_DAYS = float(os.environ.get('NOVIQ_RUNS_KEEP_DAYS', 7))  # Checkpoints untouched this long are deleted
+
+
+def get_runs_dir():
+    """
+    Directory holding run checkpoints, created if needed
+    """
+    runs_dir = os.path.join(get_cache_dir(), 'runs')
+    os.makedirs(runs_dir, exist_ok=True)
+    return runs_dir
+
+
+def prune_runs(keep_days=RUNS_KEEP_DAYS):
+    """
+    Delete checkpoints that have not been written to for keep_days
+    Returns:
+        int: Number of checkpoints removed
+    """
+    runs_dir = get_runs_dir()
+    cutoff = time.time() - keep_days * 86400
+    removed = 0
+    for name in os.listdir(runs_dir):
+        path = os.path.join(runs_dir, name)
+        if name.endswith('.jsonl') and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def clear_runs():
+    """
+    Delete every checkpoint in the runs directory
+    Returns:
+        int: Number of checkpoints removed
+    """
+    return prune_runs(keep_days=-1)
+
+
+def new_run_id():
+    return time.strftime('%Y%m%d-%H%M%S') + '-' + os.urandom(3).hex()
+
+
+class RunCheckpoint:
+    """
+    Append-only JSONL log of a research run.
+    Every completed unit of work (the plan, a step's queries, an accepted page, a summary,
+    the report) is appended and fsynced as one line, so a crash loses at most the unit in
+    flight. Replaying the log rebuilds the run state; a torn last line is ignored and cut
+    off before the next record is appended.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.run_id = os.path.splitext(os.path.basename(path))[0]
+        self._lock = threading.Lock()
+        self._tail_checked = False
+
+        self.model_name = None
+        self.vector_index_dir = None
+        self.user_intent = None
+        self.qa_pairs = []
+        self.research_plan = None
+        self.queries = {}       # step index -> queries
+        self.pages = {}         # (step index, query index) -> {'query', 'step', 'title', 'url', 'content'}
+        self.summaries = {}     # (step index, query index) -> summary
+        self.search_stats = {}
+        self.report_done = False
+
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn write from a crash
+                    self._apply(record)
+
+    @classmethod
+    def create(cls, run_id=None):
+        """
+        Start a new checkpoint in the runs directory, pruning ones older than RUNS_KEEP_DAYS
+        """
+        prune_runs()
+        return cls(os.path.join(get_runs_dir(), f"{run_id or new_run_id()}.jsonl"))
+
+    @classmethod
+    def open(cls, run):
+        """
+        Open an existing checkpoint by run id or path
+        """
+        path = run if os.path.exists(run) else os.path.join(get_runs_dir(), f"{run}.jsonl")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No checkpoint found for run {run}")
+        return cls(path)
+
+    @classmethod
+    def latest(cls):
+        """
+        The most recently updated run that has not produced its report, or None
+        """
+        runs_dir = get_runs_dir()
+        paths = sorted(
+            (os.path.join(runs_dir, name) for name in os.listdir(runs_dir) if name.endswith('.jsonl')),
+            key=os.path.getmtime,
+            reverse=True
+        )
+        for path in paths:
+            checkpoint = cls(path)
+            if not checkpoint.report_done:
+                return checkpoint
+        return None
+
+    @property
+    def started(self):
+        return self.model_name is not None
+
+    def _apply(self, record):
+        kind = record.get('kind')
+        if kind == 'start':
+            self.model_name = record['model']
+            self.vector_index_dir = record.get('vector_index_dir')
+        elif kind == 'plan':
+            self.user_intent = record['user_intent']
+            self.qa_pairs = [tuple(pair) for pair in record['qa_pairs']]
+            self.research_plan = record['research_plan']
+        elif kind == 'queries':
+            self.queries[record['step_index']] = record['queries']
+        elif kind == 'page':
+            self.pages[tuple(record['seq'])] = {key: record[key] for key in ('query', 'step', 'title', 'url', 'content')}
+        elif kind == 'summary':
+            self.summaries[tuple(record['seq'])] = record['summary']
+        elif kind == 'report':
+            self.report_done = True
+        if 'search_stats' in record:
+            self.search_stats = record['search_stats']
+
+    def _truncate_torn_tail(self):
+        """
+        Cut a partial last line left by a crash, so the next record starts on a line of its own
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def record(self, kind, **data):
+        """
+        Append one record durably and apply it to the in-memory state
+        """
+        record = {'kind': kind, 'time': time.time(), **data}
+        line = json.dumps(record) + '\n'
+        with self._lock:
+            if not self._tail_checked:
+                self._truncate_torn_tail()
+                self._tail_checked = True
+            with open(self.path, 'a') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(json.loads(line))
@@ -0,0 +1,222 @@
+import json
+import os
+import re
+import threading
+
+DEFAULT_CONTEXT_LENGTH = 8192
+MAX_CONTEXT_LENGTH = int(os.environ.get('NOVIQ_MAX_CONTEXT', 16384))        # Cap so huge-context models do not allocate a giant KV cache
+OUTPUT_RESERVE_TOKENS = int(os.environ.get('NOVIQ_OUTPUT_RESERVE', 2048))   # Room left for reasoning and outputs
+ADAPTER_OVERHEAD_TOKENS = 200                                               # dspy prompt formatting around the fields
+OVERFLOW_POLICY = os.environ.get('NOVIQ_CONTEXT_OVERFLOW', 'truncate_tail')  # truncate_tail, truncate_head, chunk or reject
+OVERFLOW_POLICIES = ('truncate_tail', 'truncate_head', 'chunk', 'reject')
+MIN_FIELD_TOKENS = 64   # Never truncate a field below this
+
+
+class ContextOverflowError(ValueError):
+    """Raised by the 'reject' policy when a stage's inputs do not fit the context window"""
+
+
+class TokenCounter:
+    """
+    Counts tokens with tiktoken when it is installed (a close proxy for most local
+    model tokenizers), otherwise estimates about 4 characters per token.
+    """
+
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self):
+        try:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding('cl100k_base')
+        except Exception:
+            self._encoding = None
+
+    def count(self, text):
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return len(text) // self.CHARS_PER_TOKEN + 1
+
+    def truncate(self, text, max_tokens, keep='head'):
+        """
+        Cut text down to max_tokens, keeping either its head or its tail
+        """
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            kept = tokens[:max_tokens] if keep == 'head' else tokens[-max_tokens:]
+            return self._encoding.decode(kept)
+        max_chars = max_tokens * self.CHARS_PER_TOKEN
+        return text[:max_chars] if keep == 'head' else text[-max_chars:]
+
+    def split(self, text, chunk_tokens):
+        """
+        Split text into consecutive pieces of at most chunk_tokens
+        """
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            return [self._encoding.decode(tokens[i:i + chunk_tokens]) for i in range(0, len(tokens), chunk_tokens)]
+        chunk_chars = chunk_tokens * self.CHARS_PER_TOKEN
+        return [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)]
+
+
+def get_context_length(model_name):
+    """
+    Ask the Ollama server for the context window a model will run with
+    Returns:
+        int: num_ctx from the Modelfile if set, else the model's trained context length, capped at NOVIQ_MAX_CONTEXT
+    """
+    try:
+        import ollama
+        info = ollama.show(model_name)
+    except Exception as e:
+        print(f"Could not read context length for {model_name} from Ollama ({e}); assuming {DEFAULT_CONTEXT_LENGTH}")
+        return DEFAULT_CONTEXT_LENGTH
+
+    parameters = getattr(info, 'parameters', None) or ''
+    match = re.search(r'num_ctx\s+(\d+)', parameters)
+    if match:
+        return int(match.group(1))
+
+    modelinfo = getattr(info, 'modelinfo', None) or {}
+    for key, value in modelinfo.items():
+        if key.endswith('.context_length'):
+            return min(int(value), MAX_CONTEXT_LENGTH)
+    return DEFAULT_CONTEXT_LENGTH
+
+
+def _field_text(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value):
+        return '\n'.join(value)
+    return json.dumps(value, default=str)
+
+
+class ContextWindowManager:
+    """
+    Keeps every stage's inputs inside the model's context window.
+    Counts the tokens of each signature input, and when a call would overflow applies the
+    overflow policy to the largest text fields: truncate_tail keeps the start of the text,
+    truncate_head keeps the end, chunk condenses the text chunk by chunk with chunk_stage,
+    and reject raises ContextOverflowError. Per-stage token counts are kept in stats.
+    """
+
+    def __init__(self, model_name, context_length=None, policy=OVERFLOW_POLICY, counter=None):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown context overflow policy: {policy}. Choose from {', '.join(OVERFLOW_POLICIES)}.")
+        self.model_name = model_name
+        self.context_length = context_length or get_context_length(model_name)
+        self.policy = policy
+        self.counter = counter or TokenCounter()
+        self.chunk_stage = None  # Stage running GenerateSectionNotes, set by the owner for the chunk policy
+        self.stats = {}
+        self._overheads = {}
+        self._lock = threading.Lock()
+
+    def _signature_overhead(self, signature):
+        """
+        Tokens taken by a signature's instructions and field descriptions
+        """
+        if signature not in self._overheads:
+            parts = [signature.instructions or '']
+            for name, field in signature.fields.items():
+                parts.append(name)
+                parts.append(str(field.json_schema_extra.get('desc', '')) if field.json_schema_extra else '')
+            self._overheads[signature] = self.counter.count('\n'.join(parts)) + ADAPTER_OVERHEAD_TOKENS
+        return self._overheads[signature]
+
+    def input_budget(self, signature):
+        """
+        Tokens available to a signature's inputs
+        """
+        return max(MIN_FIELD_TOKENS, self.context_length - OUTPUT_RESERVE_TOKENS - self._signature_overhead(signature))
+
+    def _record(self, stage_name, tokens, overflowed, removed):
+        with self._lock:
+            stats = self.stats.setdefault(stage_name, {
+                'calls': 0, 'input_tokens': 0, 'max_input_tokens': 0, 'overflows': 0, 'tokens_removed': 0
+            })
+            stats['calls'] += 1
+            stats['input_tokens'] += tokens
+            stats['max_input_tokens'] = max(stats['max_input_tokens'], tokens)
+            stats['overflows'] += int(overflowed)
+            stats['tokens_removed'] += removed
+
+    def _shrink(self, value, max_tokens, keep):
+        """
+        Truncate a str, or every item of a list[str] proportionally, to about max_tokens
+        """
+        if isinstance(value, str):
+            return self.counter.truncate(value, max_tokens, keep=keep)
+        total = self.counter.count(_field_text(value)) or 1
+        ratio = max_tokens / total
+        return [self.counter.truncate(item, max(1, int(self.counter.count(item) * ratio)), keep=keep) for item in value]
+
+    def _condense(self, stage_name, text, budget):
+        """
+        Chunk-and-summarize a text so it fits budget tokens
+        """
+        chunks = self.counter.split(text, budget)
+        notes = []
+        for chunk in chunks:
+            result = self.chunk_stage(user_intent=f"Condense material for the {stage_name} step", qa_pairs=[], source_material=[chunk])
+            notes.append(result.section_notes)
+        return '\n\n'.join(notes)
+
+    def fit(self, stage_name, signature, inputs):
+        """
+        Returns inputs that fit the context window, applying the overflow policy if needed
+        Args:
+            stage_name (str): Stage name for stats
+            signature (type): dspy.Signature of the stage
+            inputs (dict): Keyword inputs of the call
+        """
+        budget = self.input_budget(signature)
+        counts = {name: self.counter.count(_field_text(value)) for name, value in inputs.items()}
+        total = sum(counts.values())
+        if total <= budget:
+            self._record(stage_name, total, False, 0)
+            return inputs
+
+        if self.policy == 'reject':
+            self._record(stage_name, total, True, 0)
+            raise ContextOverflowError(
+                f"{stage_name} needs {total} input tokens but {self.model_name} only has room for {budget} "
+                f"(context {self.context_length})"
+            )
+
+        fitted = dict(inputs)
+        excess = total - budget
+        # Shrink the largest text fields first; small fields like the intent are left alone
+        for name in sorted(counts, key=counts.get, reverse=True):
+            if excess <= 0:
+                break
+            value = fitted[name]
+            if not (isinstance(value, str) or (isinstance(value, list) and all(isinstance(item, str) for item in value))):
+                continue
+            target = max(MIN_FIELD_TOKENS, counts[name] - excess)
+            if target >= counts[name]:
+                continue
+            if self.policy == 'chunk' and isinstance(value, str) and self.chunk_stage is not None:
+                value = self._condense(stage_name, value, max(MIN_FIELD_TOKENS, budget // 2))
+                target = min(target, self.counter.count(value))
+            keep = 'tail' if self.policy == 'truncate_head' else 'head'
+            fitted[name] = self._shrink(value, target, keep)
+            excess -= counts[name] - self.counter.count(_field_text(fitted[name]))
+
+        fitted_total = sum(self.counter.count(_field_text(value)) for value in fitted.values())
+        self._record(stage_name, fitted_total, True, max(0, total - fitted_total))
+        return fitted
+
+    def report(self):
+        """
+        Print per-stage token counts so it is visible where prefill time goes
+        """
+        print(f"\n--- Context Usage ({self.model_name}, {self.context_length} tokens, policy {self.policy}) ---")
+        for stage_name, stats in sorted(self.stats.items()):
+            average = stats['input_tokens'] // max(1, stats['calls'])
+            print(f"{stage_name}: {stats['calls']} calls, {stats['input_tokens']} input tokens "
+                  f"(avg {average}, max {stats['max_input_tokens']}), "
+                  f"{stats['overflows']} overflows, {stats['tokens_removed']} tokens removed")
+        print("-------------------------")
@@ -0,0 +1,98 @@
+import hashlib
+import re
+import threading
+
+import numpy as np
+
+SHINGLE_WORDS = 3       # Words per shingle; short shingles keep a single edited word from hiding much of the page
+JACCARD_THRESHOLD = 0.7   # Estimated shingle-set similarity at which two pages are near-duplicates
+NUM_PERM = 128          # MinHash permutations; the similarity estimate is within about ±0.04
+SHINGLE_BLOCK = 64      # Shingles hashed per numpy step
+BANDS = 32              # LSH bands of NUM_PERM // BANDS rows; pairs above ~0.45 similarity almost always share one
+
+_WORD = re.compile(r'\w+')
+# Fixed seed so signatures are comparable across processes and resumed runs
+_rng = np.random.default_rng(0x6e6f766971)
+_PERM_A = _rng.integers(0, 1 << 63, size=NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)  # Odd multipliers
+_PERM_B = _rng.integers(0, 1 << 63, size=NUM_PERM, dtype=np.uint64)
+
+
+def minhash(text, shingle_words=SHINGLE_WORDS):
+    """
+    MinHash signature of a text's set of overlapping word shingles
+    Returns:
+        np.ndarray: NUM_PERM uint64 values, or None when the text has no words
+    """
+    words = _WORD.findall(text.lower())
+    if not words:
+        return None
+    shingles = {' '.join(words[i:i + shingle_words]) for i in range(max(1, len(words) - shingle_words + 1))}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big') for s in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+    # Multiply-shift hashing: (a * x + b) mod 2^64, high 32 bits, once per permutation.
+    # Blocks of shingles keep the (shingles x permutations) matrix small on long pages.
+    signature = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(hashes), SHINGLE_BLOCK):
+        block = hashes[start:start + SHINGLE_BLOCK, None]
+        np.minimum(signature, ((block * _PERM_A + _PERM_B) >> np.uint64(32)).min(axis=0), out=signature)
+    return signature
+
+
+def similarity(signature, other):
+    """
+    Returns the Jaccard similarity of two pages estimated from their signatures
+    """
+    return float(np.mean(signature == other))
+
+
+class NearDuplicateDetector:
+    """
+    Finds pages whose extracted text is a near-duplicate of one already accepted
+    (mirrors, syndicated copies, AMP pages, tracking-parameter variants).
+    Pages are compared by MinHash-estimated Jaccard similarity of their word shingles;
+    signatures are bucketed by LSH bands so a lookup only compares against candidates.
+    """
+
+    def __init__(self, threshold=JACCARD_THRESHOLD):
+        self.threshold = threshold
+        self._signatures = []   # (signature, url) of accepted pages
+        self._buckets = [{} for _ in range(BANDS)]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bands(signature):
+        rows = NUM_PERM // BANDS
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(BANDS)]
+
+    def find(self, signature):
+        """
+        Args:
+            signature (np.ndarray): minhash() of the page text
+        Returns:
+            str: URL of an accepted near-duplicate, or None
+        """
+        if signature is None:
+            return None
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(self._bands(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+            for index in sorted(candidates):
+                other, url = self._signatures[index]
+                if similarity(signature, other) >= self.threshold:
+                    return url
+        return None
+
+    def add(self, signature, url):
+        """
+        Accept a page so later near-duplicates of it are detected
+        """
+        if signature is None:
+            return
+        with self._lock:
+            index = len(self._signatures)
+            self._signatures.append((signature, url))
+            for band, key in enumerate(self._bands(signature)):
+                self._buckets[band].setdefault(key, []).append(index)
@@ -0,0 +1,485 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from noviq.research.ranking import CandidateQueue, FETCH_BUDGET
+from noviq.research.summarizer_pool import SummarizationPool
+from noviq.scrape.fetch_engine import get_fetch_limiter, MAX_CONCURRENT_FETCHES
+from noviq.scrape.politeness import get_politeness
+from noviq.scrape.scrape import BeautifulSoupScrape, get_search_engine
+from noviq.tools.captcha import get_captcha_handler
+from noviq.tools.tracing import get_tracer
+from noviq.tools.urls import get_host
+
+QUEUE_SIZE = int(os.environ.get('NOVIQ_PIPELINE_QUEUE_SIZE', 8))  # Items buffered between two stages
+QUERIES_PER_STEP = 2    # Limit queries per step to avoid too many API calls
+RESULTS_PER_QUERY = 3   # Fetch budget per query of a step unless NOVIQ_FETCH_BUDGET sets one per step
+SEARCH_WORKERS = 2
+FETCH_WORKERS = MAX_CONCURRENT_FETCHES
+EXTRACT_WORKERS = 2
+MONITOR_INTERVAL = 0.05  # Seconds between queue depth samples
+
+_DONE = object()  # End-of-stream marker passed down the queues
+
+
+class WorkItem:
+    """
+    One query travelling through the pipeline
+    """
+
+    def __init__(self, step_index, query_index, step, query):
+        self.seq = (step_index, query_index)  # Sort key that restores plan order at the end
+        self.step = step
+        self.query = query
+        self.candidates = None  # CandidateQueue shared by every query of the step
+        self.scrape = None
+        self.html = None
+        self.title = None
+        self.url = None
+        self.content = None
+        self.summary = None
+
+
+class StepBatch:
+    """
+    The queries of one plan step, searched and ranked together
+    """
+
+    def __init__(self, step_index, step, items):
+        self.step_index = step_index
+        self.step = step
+        self.items = items
+
+    @property
+    def query(self):
+        return '; '.join(item.query for item in self.items)
+
+
+class PipelineStage:
+    """
+    A pool of worker threads reading from one bounded queue and writing to the next.
+    fn(item) returns the items to pass downstream; a full downstream queue blocks the
+    workers, which is what keeps a fast stage from racing ahead of a slow one.
+    """
+
+    def __init__(self, name, fn, workers, inbox, outbox, pipeline, drain=None):
+        self.name = name
+        self.fn = fn
+        self.drain = drain      # Called by the last worker out; its items go downstream before the end marker
+        self.workers = workers
+        self.inbox = inbox
+        self.outbox = outbox
+        self.pipeline = pipeline
+        self.processed = 0
+        self.busy_seconds = 0.0
+        self._finished = 0
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"noviq-{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _drain(self):
+        if self.drain is None:
+            return []
+        try:
+            return self.drain()
+        except Exception as e:
+            print(f"Error draining {self.name} stage: {e}")
+            return []
+
+    def _work(self):
+        while True:
+            item = self.inbox.get()
+            if item is _DONE:
+                # Leave the marker for sibling workers; the last one out forwards it
+                self.inbox.put(_DONE)
+                with self._lock:
+                    self._finished += 1
+                    last = self._finished == self.workers
+                if last:
+                    for output in self._drain():
+                        self.outbox.put(output)
+                    self.outbox.put(_DONE)
+                return
+            if self.pipeline.enough.is_set() or self.pipeline.cancelled.is_set():
+                continue  # Drain without doing work once we have enough sources
+
+            started = time.perf_counter()
+            try:
+                outputs = self.fn(item)
+            except Exception as e:
+                print(f"Error in {self.name} stage for query {item.query}: {e}")
+                outputs = []
+            with self._lock:
+                self.processed += 1
+                self.busy_seconds += time.perf_counter() - started
+            for output in outputs:
+                self.outbox.put(output)
+
+
+class ResearchPipeline:
+    """
+    Staged producer/consumer execution of a research plan:
+    plan step -> query generation -> search and rank -> fetch -> extract -> summarize.
+    All queries of a step are searched together and their results ranked as one list, so
+    each fetch goes to the best result of the step that has not been tried yet.
+    Every stage has its own workers and a bounded queue in front of it, so query generation
+    for step N+1 runs while step N is still being fetched and summarized.
+    """
+
+    def __init__(self, manager, research_plan, user_intent, qa_pairs, min_sources=5, listener=None, summarization_pool=None):
+        """
+        Args:
+            manager (ResearchManager): Owner of the LLM stages and the run state
+            research_plan (list[str]): Plan steps
+            user_intent (str): The research topic
+            qa_pairs (list): Clarifying question/answer pairs
+            min_sources (int): Stop issuing new work once this many pages are accepted
+            listener (callable): Called as listener(event, payload) for progress events
+            summarization_pool (SummarizationPool): Workers for the summarize stage
+        """
+        self.manager = manager
+        self.research_plan = research_plan
+        self.user_intent = user_intent
+        self.qa_pairs = qa_pairs
+        self.min_sources = min_sources
+        self.listener = listener or (lambda event, payload: None)
+        self.pool = summarization_pool or SummarizationPool()
+        self.limiter = get_fetch_limiter()
+        self.checkpoint = manager.checkpoint
+
+        self.enough = threading.Event()
+        self.cancelled = threading.Event()
+        self.stopped = threading.Event()  # Set alongside either of the two above
+        self.accepted = 0
+        self._accept_lock = threading.Lock()
+        self.ranked = 0         # Unique search results ranked across all steps
+        self.fetched = 0        # Of those, fetched
+        self.blocked = 0        # Fetches the site refused; their budget went back to the step
+        self.captcha = get_captcha_handler()
+        self._deferred = []     # (retry at, StepBatch) of queries that hit a CAPTCHA
+        self._deferred_lock = threading.Lock()
+        self._search_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS * QUERIES_PER_STEP,
+                                                   thread_name_prefix='noviq-search-query')
+
+        self.queues = {name: queue.Queue(maxsize=QUEUE_SIZE) for name in ('search', 'fetch', 'extract', 'summarize')}
+        self.steps = queue.Queue()
+        self.stages = [
+            PipelineStage('generate_queries', self._generate_queries, 1, self.steps, self.queues['search'], self),
+            PipelineStage('search', self._search, SEARCH_WORKERS, self.queues['search'], self.queues['fetch'], self,
+                          drain=lambda: self._retry_deferred(wait=True)),
+            PipelineStage('fetch', self._fetch, FETCH_WORKERS, self.queues['fetch'], self.queues['extract'], self),
+            PipelineStage('extract', self._extract, EXTRACT_WORKERS, self.queues['extract'], self.queues['summarize'], self),
+        ]
+        self.summarize_busy = 0.0
+        self.summarized = 0
+        self._summarize_lock = threading.Lock()
+        self._depths = {name: [] for name in self.queues}
+        self.wall_seconds = 0.0
+
+    # Stage functions
+
+    def _generate_queries(self, step_item):
+        step_index, step = step_item
+        queries = self.checkpoint.queries.get(step_index) if self.checkpoint else None
+        if queries is None:
+            web_search_queries = self.manager.generate_web_search_queries(
+                user_intent=self.user_intent,
+                qa_pairs=self.qa_pairs,
+                overall_research_plan=self.research_plan,
+                research_plan_step=step
+            )
+            queries = web_search_queries.web_search_queries[:QUERIES_PER_STEP]
+            if self.checkpoint:
+                self.checkpoint.record('queries', step_index=step_index, queries=queries)
+        self.listener('queries', {'step_index': step_index, 'step': step, 'queries': queries})
+        items = [WorkItem(step_index, query_index, step, query) for query_index, query in enumerate(queries)]
+        # Queries whose page was checkpointed are restored by run() instead
+        items = [item for item in items if not (self.checkpoint and item.seq in self.checkpoint.pages)]
+        return [StepBatch(step_index, step, items)] if items else []
+
+    def _search(self, batch):
+        return self._search_batch(batch) + self._retry_deferred()
+
+    def _search_batch(self, batch, retry=False):
+        """
+        Search and rank the queries of a step. Queries the CAPTCHA policy deferred are set
+        aside and retried once their cool-down has passed, without holding up the rest.
+        """
+        results_by_query = {}
+        deferred = []
+        retry_at = 0.0
+        if not retry:
+            self.manager._bump('total_queries', len(batch.items))
+        # The step's queries are searched at once; the limiter still caps calls per engine
+        for item, (results, ready_at) in zip(batch.items, self._search_executor.map(self._search_query, batch.items)):
+            if ready_at is not None and not retry:
+                deferred.append(item)
+                retry_at = max(retry_at, ready_at)
+                continue
+            if results and retry:
+                self.captcha.count('recovered')
+            if not results:
+                self.manager._bump('empty_results')
+            results_by_query[item.query] = results or []
+        if deferred:
+            with self._deferred_lock:
+                self._deferred.append((retry_at, StepBatch(batch.step_index, batch.step, deferred)))
+            batch = StepBatch(batch.step_index, batch.step, [item for item in batch.items if item not in deferred])
+            if not batch.items:
+                return []
+
+        with get_tracer().span('rank', 'cpu', step=batch.step_index) as span:
+            candidates = self.manager.result_ranker.rank(results_by_query, self.user_intent, batch.step)
+            span.set(candidates=len(candidates))
+        if not candidates:
+            for item in batch.items:
+                self.listener('query_failed', {'seq': item.seq, 'query': item.query, 'step': item.step, 'reason': 'No results returned from search'})
+            return []
+        with self._accept_lock:
+            self.ranked += len(candidates)
+        print(f"Ranked {len(candidates)} results for step {batch.step_index + 1}; best: "
+              + ', '.join(f"{candidate.title} ({candidate.score:.2f})" for candidate in candidates[:3]))
+
+        # One query whose search came back empty still gets a page from its siblings' results
+        candidate_queue = CandidateQueue(candidates, FETCH_BUDGET or RESULTS_PER_QUERY * len(batch.items))
+        for item in batch.items:
+            item.candidates = candidate_queue
+        return batch.items
+
+    def _search_query(self, item):
+        """
+        Returns:
+            tuple: (search results, time.monotonic() to retry at if the CAPTCHA policy deferred it)
+        """
+        with self.limiter.slot(f"search:{get_search_engine()}"), self.captcha.deferrable(self):
+            results = self.manager._search(item.query)
+        return results, None if results else self.captcha.take_deferred(self, item.query)
+
+    def _retry_deferred(self, wait=False):
+        """
+        Search the deferred queries whose cool-down is over
+        Args:
+            wait (bool): Sleep until every deferred query is due; the search stage does this once
+                the plan is exhausted, before it closes the fetch queue
+        """
+        outputs = []
+        while True:
+            with self._deferred_lock:
+                due = [entry for entry in self._deferred if wait or entry[0] <= time.monotonic()]
+                if not due:
+                    return outputs
+                entry = min(due, key=lambda entry: entry[0])
+                self._deferred.remove(entry)
+            ready_at, batch = entry
+            # A finished or cancelled run drops its deferrals instead of sitting out their cool-down
+            if self.stopped.is_set() or self.stopped.wait(max(0.0, ready_at - time.monotonic())):
+                continue
+            outputs.extend(self._search_batch(batch, retry=True))
+
+    def _fetch_next(self, item):
+        """
+        Fetch the best unclaimed candidate of the item's step. Returns False when none is usable.
+        """
+        politeness = get_politeness()
+
+        def claim(url):
+            # Hosts cooling down after blocking us are passed over before they are claimed
+            return not politeness.cooling_down(url) and self.manager.claim_url(url)
+
+        while True:
+            candidate = item.candidates.next(claim=claim)
+            if candidate is None:
+                return False
+            title, url = candidate.title, candidate.url
+            with self._accept_lock:
+                self.fetched += 1
+            scrape = BeautifulSoupScrape(url)
+            with self.limiter.slot(get_host(url)):
+                html, text = scrape.fetch()
+            self.manager._count_cache_status(scrape.cache_status)
+            if scrape.blocked:
+                item.candidates.refund()
+                with self._accept_lock:
+                    self.blocked += 1
+                continue
+            if html is None and (text is None or "Skipped due to" in text):
+                continue
+            item.title, item.url, item.scrape, item.html, item.content = title, url, scrape, html, text
+            return True
+
+    def _fetch(self, item):
+        if self._fetch_next(item):
+            return [item]
+        self.listener('query_failed', {'seq': item.seq, 'query': item.query, 'step': item.step, 'reason': 'All results were duplicates or restricted'})
+        return []
+
+    def _extract(self, item):
+        while True:
+            if item.html is not None:
+                try:
+                    item.content = item.scrape.extract(item.html)
+                except Exception as e:
+                    print(f"Error extracting {item.url}: {e}")
+                    item.content = ''
+                item.html = None
+            if self._accept(item):
+                return [item]
+            # Too short, restricted, off-topic or a near-duplicate: fall back to the next search result
+            if self.enough.is_set() or not self._fetch_next(item):
+                self.listener('query_failed', {'seq': item.seq, 'query': item.query, 'step': item.step, 'reason': 'No relevant information found'})
+                return []
+
+    def _accept(self, item):
+        if self.enough.is_set():
+            return False
+        # Relevance and near-duplicate scoring run concurrently; accept_content locks only its bookkeeping
+        if not self.manager.accept_content(item.url, item.content, step=item.step, query=item.query):
+            return False
+        with self._accept_lock:
+            if self.accepted >= self.min_sources:
+                return False
+            self.accepted += 1
+            if self.accepted >= self.min_sources:
+                self.enough.set()
+                self.stopped.set()
+        self.manager._index_page(item.title, item.url, item.content)
+        if self.checkpoint:
+            self.checkpoint.record(
+                'page', seq=item.seq, query=item.query, step=item.step, title=item.title, url=item.url,
+                content=item.content, search_stats=dict(self.manager.search_stats)
+            )
+        self.listener('page', {'seq': item.seq, 'query': item.query, 'step': item.step, 'title': item.title, 'url': item.url})
+        return True
+
+    def _summarize(self, item):
+        started = time.perf_counter()
+        try:
+            item.summary = self.manager.summarize_page(self.user_intent, item.title, item.url, item.content)
+            if self.checkpoint:
+                self.checkpoint.record('summary', seq=item.seq, summary=item.summary, search_stats=dict(self.manager.search_stats))
+            self.listener('summary', {'seq': item.seq, 'query': item.query, 'step': item.step, 'title': item.title, 'url': item.url, 'summary': item.summary})
+        except Exception as e:
+            print(f"Error processing {item.url}: {e}")
+            self.listener('query_failed', {'seq': item.seq, 'query': item.query, 'step': item.step, 'reason': f"Summary failed: {e}"})
+        finally:
+            with self._summarize_lock:
+                self.summarize_busy += time.perf_counter() - started
+                self.summarized += 1
+        return item
+
+    # Orchestration
+
+    def _monitor(self, stop):
+        while not stop.wait(MONITOR_INTERVAL):
+            for name, stage_queue in self.queues.items():
+                self._depths[name].append(stage_queue.qsize())
+
+    def _restore(self):
+        """
+        Rebuild the pages a checkpoint already accepted
+        Returns:
+            list[WorkItem]: Restored items; those without a summary still need one
+        """
+        items = []
+        for seq, page in sorted(self.checkpoint.pages.items()):
+            item = WorkItem(seq[0], seq[1], page['step'], page['query'])
+            item.title, item.url, item.content = page['title'], page['url'], page['content']
+            item.summary = self.checkpoint.summaries.get(seq)
+            items.append(item)
+        self.accepted = len(items)
+        if self.accepted >= self.min_sources:
+            self.enough.set()
+            self.stopped.set()
+        return items
+
+    def cancel(self):
+        """
+        Stop the run: queued work is drained without being processed
+        """
+        self.cancelled.set()
+        self.stopped.set()
+
+    def run(self):
+        """
+        Run the whole plan through the pipeline
+        Returns:
+            list[WorkItem]: Accepted pages in plan order; item.summary is None if summarizing failed
+        """
+        started = time.perf_counter()
+        restored = self._restore() if self.checkpoint else []
+        for step_index, step in enumerate(self.research_plan):
+            self.steps.put((step_index, step))
+        self.steps.put(_DONE)
+
+        stop_monitor = threading.Event()
+        monitor = threading.Thread(target=self._monitor, args=(stop_monitor,), daemon=True)
+        monitor.start()
+        for stage in self.stages:
+            stage.start()
+
+        # The summarize stage hands pages to the bounded pool; submit() blocks when it is full
+        items = [item for item in restored if item.summary is not None]
+        futures = [self.pool.submit(self._summarize, item) for item in restored if item.summary is None]
+        while True:
+            item = self.queues['summarize'].get()
+            if item is _DONE:
+                break
+            if self.cancelled.is_set():
+                continue
+            futures.append(self.pool.submit(self._summarize, item))
+        items.extend(future.result() for future in futures)
+
+        stop_monitor.set()
+        monitor.join()
+        self._search_executor.shutdown(wait=False)
+        self.wall_seconds = time.perf_counter() - started
+        return sorted(items, key=lambda item: item.seq)
+
+    def stats(self):
+        """
+        Per-stage throughput, utilization and queue depth
+        Returns:
+            dict: stage name -> {'workers', 'processed', 'busy_seconds', 'utilization', 'max_queue', 'avg_queue'}
+        """
+        wall = self.wall_seconds or 1e-9
+        stats = {}
+        for stage in self.stages:
+            # Queues are named after the stage that consumes them
+            depths = self._depths.get(stage.name, [])
+            stats[stage.name] = {
+                'workers': stage.workers,
+                'processed': stage.processed,
+                'busy_seconds': stage.busy_seconds,
+                'utilization': stage.busy_seconds / (wall * stage.workers),
+                'max_queue': max(depths, default=0),
+                'avg_queue': sum(depths) / len(depths) if depths else 0.0,
+            }
+        depths = self._depths['summarize']
+        stats['summarize'] = {
+            'workers': self.pool.workers,
+            'processed': self.summarized,
+            'busy_seconds': self.summarize_busy,
+            'utilization': self.summarize_busy / (wall * self.pool.workers),
+            'max_queue': max(depths, default=0),
+            'avg_queue': sum(depths) / len(depths) if depths else 0.0,
+        }
+        return stats
+
+    def report(self):
+        """
+        Print per-stage queue depths and utilization so bottlenecks are visible
+        """
+        print(f"\n--- Pipeline Stages ({self.wall_seconds:.1f}s wall) ---")
+        print(f"Search results: {self.ranked} ranked, {self.fetched} fetched, {self.blocked} blocked, {self.accepted} accepted")
+        for name, stats in self.stats().items():
+            print(f"{name:<17} workers={stats['workers']:<3} processed={stats['processed']:<4} "
+                  f"busy={stats['busy_seconds']:.1f}s util={stats['utilization']:.0%} "
+                  f"queue max={stats['max_queue']} avg={stats['avg_queue']:.1f}")
+        print("-------------------------")
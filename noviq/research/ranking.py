@@ -0,0 +1,231 @@
+import os
+import threading
+
+import numpy as np
+
+from noviq.research.relevance import tokenize
+from noviq.tools.urls import get_host, normalize_url
+
+# Rankers and their weights, e.g. "engine:1,lexical:1,domain:0.5,embedding:1"
+RANKERS = os.environ.get('NOVIQ_RANKERS', 'engine:1,lexical:1,domain:0.5')
+FETCH_BUDGET = int(os.environ.get('NOVIQ_FETCH_BUDGET', 0))  # Pages fetched per plan step; 0 means 3 per query
+# Host suffix -> prior in [0, 1]; unknown hosts get 0.5. Extend with NOVIQ_DOMAIN_PRIORS="host=weight,..."
+DOMAIN_PRIORS = {
+    'gov': 0.9, 'edu': 0.9, 'wikipedia.org': 0.85, 'arxiv.org': 0.85, 'nih.gov': 0.95, 'who.int': 0.9,
+    'nature.com': 0.85, 'sciencedirect.com': 0.8, 'reuters.com': 0.75, 'github.com': 0.7,
+    'pinterest.com': 0.1, 'facebook.com': 0.1, 'instagram.com': 0.1, 'tiktok.com': 0.1,
+    'quora.com': 0.3, 'reddit.com': 0.4, 'youtube.com': 0.2, 'amazon.com': 0.2,
+}
+
+
+class Candidate:
+    """
+    One search result, merged across every query of the step that returned it
+    """
+
+    def __init__(self, title, url):
+        self.title = title
+        self.url = url
+        self.queries = []
+        self.positions = []     # Position in each returning query's result list, 0 first
+        self.score = 0.0
+        self.scores = {}        # ranker name -> score in [0, 1]
+
+
+class EngineRanker:
+    """
+    The search engine's own opinion: best position, plus a bonus for results several queries agree on
+    """
+
+    def score(self, candidates, user_intent, step, queries):
+        best = np.array([min(candidate.positions) for candidate in candidates], dtype=np.float64)
+        agreement = np.array([len(set(candidate.queries)) for candidate in candidates], dtype=np.float64)
+        return 1.0 / (best + 1.0) * (0.75 + 0.25 * agreement / max(1, len(queries)))
+
+
+class LexicalRanker:
+    """
+    Overlap of result titles and URLs with the intent, plan step and queries
+    """
+
+    def score(self, candidates, user_intent, step, queries):
+        wanted = set(tokenize(' '.join([user_intent or '', step or ''] + list(queries))))
+        if not wanted:
+            return np.zeros(len(candidates))
+        scores = []
+        for candidate in candidates:
+            url_words = candidate.url.replace('-', ' ').replace('_', ' ').replace('/', ' ')
+            found = set(tokenize(f"{candidate.title} {url_words}"))
+            scores.append(len(found & wanted) / min(len(wanted), 8))
+        return np.minimum(np.array(scores, dtype=np.float64), 1.0)
+
+
+class DomainPriorRanker:
+    """
+    Fixed prior per domain, matched on the longest host suffix
+    """
+
+    def __init__(self, priors=None):
+        self.priors = dict(DOMAIN_PRIORS if priors is None else priors)
+        for entry in os.environ.get('NOVIQ_DOMAIN_PRIORS', '').split(','):
+            host, _, weight = entry.partition('=')
+            if host.strip() and weight.strip():
+                self.priors[host.strip().lower()] = float(weight)
+
+    def prior(self, url):
+        labels = get_host(url).split('.')
+        for start in range(len(labels)):
+            suffix = '.'.join(labels[start:])
+            if suffix in self.priors:
+                return self.priors[suffix]
+        return 0.5
+
+    def score(self, candidates, user_intent, step, queries):
+        return np.array([self.prior(candidate.url) for candidate in candidates], dtype=np.float64)
+
+
+class EmbeddingRanker:
+    """
+    Cosine similarity of result titles to the step, embedded with the local Ollama model.
+    Costs one embedding request per step; scores are 0 while the embedder is unavailable.
+    """
+
+    def __init__(self, embedder=None):
+        if embedder is None:
+            from noviq.research.vector_index import OllamaEmbedder
+            embedder = OllamaEmbedder()
+        self.embedder = embedder
+        self._failed = False
+
+    def score(self, candidates, user_intent, step, queries):
+        if self._failed:
+            return np.zeros(len(candidates))
+        try:
+            vectors = self.embedder.embed([f"{user_intent}: {step}"] + [candidate.title or candidate.url for candidate in candidates])
+        except Exception as e:
+            print(f"⚠️  Embedding ranker unavailable ({e}); ranking without it")
+            self._failed = True
+            return np.zeros(len(candidates))
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+        return np.clip(vectors[1:] @ vectors[0], 0.0, 1.0).astype(np.float64)
+
+
+RANKER_TYPES = {
+    'engine': EngineRanker,
+    'lexical': LexicalRanker,
+    'domain': DomainPriorRanker,
+    'embedding': EmbeddingRanker,
+}
+
+
+def parse_rankers(spec=RANKERS):
+    """
+    Build weighted rankers from a "name:weight,..." spec
+    Returns:
+        list[tuple]: (name, ranker, weight)
+    """
+    rankers = []
+    for entry in spec.split(','):
+        name, _, weight = entry.strip().partition(':')
+        if not name:
+            continue
+        if name not in RANKER_TYPES:
+            raise ValueError(f"Unknown ranker: {name}. Choose from {', '.join(RANKER_TYPES)}.")
+        rankers.append((name, RANKER_TYPES[name](), float(weight or 1.0)))
+    return rankers
+
+
+class ResultRanker:
+    """
+    Merges the result lists of several queries into one de-duplicated list ranked by a
+    weighted sum of ranker scores, so the fetch budget goes to the best results of the whole
+    step instead of to each query's top results in engine order.
+    """
+
+    def __init__(self, rankers=None):
+        """
+        Args:
+            rankers (list[tuple]): (name, ranker, weight) triples, parsed from NOVIQ_RANKERS by default
+        """
+        self.rankers = rankers if rankers is not None else parse_rankers()
+
+    @staticmethod
+    def merge(results_by_query):
+        """
+        Args:
+            results_by_query (dict): query -> list of (title, url) in engine order
+        Returns:
+            list[Candidate]: One candidate per normalized URL, in first-seen order
+        """
+        candidates = {}
+        for query, results in results_by_query.items():
+            for position, (title, url) in enumerate(results):
+                key = normalize_url(url)
+                if key not in candidates:
+                    candidates[key] = Candidate(title, url)
+                candidates[key].queries.append(query)
+                candidates[key].positions.append(position)
+        return list(candidates.values())
+
+    def rank(self, results_by_query, user_intent=None, step=None):
+        """
+        Returns:
+            list[Candidate]: Candidates best first, each with its combined and per-ranker scores
+        """
+        candidates = self.merge(results_by_query)
+        if not candidates or not self.rankers:
+            return candidates
+        queries = list(results_by_query)
+        total = np.zeros(len(candidates))
+        for name, ranker, weight in self.rankers:
+            scores = ranker.score(candidates, user_intent, step, queries)
+            total += weight * scores
+            for candidate, score in zip(candidates, scores):
+                candidate.scores[name] = round(float(score), 3)
+        total /= sum(weight for _, _, weight in self.rankers) or 1.0
+        # Stable sort keeps engine order among ties
+        order = np.argsort(-total, kind='stable')
+        for index in order:
+            candidates[index].score = round(float(total[index]), 3)
+        return [candidates[index] for index in order]
+
+
+class CandidateQueue:
+    """
+    A step's ranked candidates, shared by all of its query slots. Each slot takes the best
+    candidate nobody has taken yet, and the queue stops handing out once the budget is spent.
+    """
+
+    def __init__(self, candidates, budget):
+        self._candidates = list(candidates)
+        self.budget = budget
+        self.taken = 0
+        self._lock = threading.Lock()
+
+    def next(self, claim=None):
+        """
+        Args:
+            claim (callable): Called with each URL; candidates it refuses (already processed
+                elsewhere in the run) are dropped without spending budget
+        Returns:
+            Candidate or None: The best remaining candidate, None once the queue or budget is exhausted
+        """
+        with self._lock:
+            while self.taken < self.budget and self._candidates:
+                candidate = self._candidates.pop(0)
+                if claim is None or claim(candidate.url):
+                    self.taken += 1
+                    return candidate
+            return None
+
+    def refund(self):
+        """
+        Give back the budget of a candidate the site refused to serve, so blocked hosts do not
+        use up the step's pages
+        """
+        with self._lock:
+            self.taken = max(0, self.taken - 1)
+
+    def __len__(self):
+        with self._lock:
+            return max(0, min(len(self._candidates), self.budget - self.taken))
@@ -0,0 +1,133 @@
+import os
+import re
+import threading
+
+import numpy as np
+
+RELEVANCE_THRESHOLD = float(os.environ.get('NOVIQ_RELEVANCE_THRESHOLD', 0.1))  # Pages scoring below this are not summarized; 0 only logs
+PASSAGE_WORDS = 120     # Words per scored passage; the best passage decides, so a long page is not diluted by its boilerplate
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Weight of query terms by where they come from: the search query is the most specific
+FIELD_WEIGHTS = (('query', 1.0), ('step', 0.6), ('intent', 0.8))
+
+_WORD = re.compile(r'[^\W_]+')
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers him
+his how i if in into is it its itself just me more most my no nor not now of off on once only or other our ours out
+over own same she should so some such than that the their theirs them then there these they this those through to
+too under until up very was we were what when where which while who whom why will with would you your yours
+vs versus compare comparison overview explain explained guide best top latest new get use using used
+""".split())
+
+
+def stem(word):
+    """
+    Crude plural folding so 'batteries' matches 'battery' and 'pumps' matches 'pump'
+    """
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    return [stem(word) for word in _WORD.findall(text.lower()) if len(word) > 1 and word not in STOPWORDS]
+
+
+class RelevanceScorer:
+    """
+    Non-LLM relevance check of a page against the research intent, plan step and query.
+    The page is split into passages and each passage gets a BM25 score over the query terms,
+    normalized by the score a passage would get with every query term at saturation, so
+    scores fall in [0, 1) whatever the query length. Term frequencies of all passages are
+    counted in one np.bincount. IDF comes from the pages scored before this one, smoothed
+    so that a term every page shares still counts: it only demotes generic query words.
+    """
+
+    def __init__(self, threshold=RELEVANCE_THRESHOLD):
+        self.threshold = threshold
+        self.scores = []        # (score, url, kept) of every page scored
+        self._document_frequency = {}
+        self._documents = 0
+        self._lock = threading.Lock()
+
+    def _query_terms(self, user_intent=None, step=None, query=None):
+        """
+        Returns:
+            dict: term -> field weight, the highest weight when a term appears in several fields
+        """
+        fields = {'query': query, 'step': step, 'intent': user_intent}
+        weights = {}
+        for field, weight in FIELD_WEIGHTS:
+            for term in tokenize(fields[field] or ''):
+                weights[term] = max(weights.get(term, 0.0), weight)
+        return weights
+
+    def score(self, content, user_intent=None, step=None, query=None):
+        """
+        Returns:
+            float: Relevance of the best passage of content, 0 when nothing matches and 1
+            when intent, step and query leave no terms to match against (e.g. "What is C?")
+        """
+        weights = self._query_terms(user_intent, step, query)
+        if not weights:
+            return 1.0
+        tokens = tokenize(content)
+        if not tokens:
+            return 0.0
+        terms = list(weights)
+        term_ids = {term: index for index, term in enumerate(terms)}
+        ids = np.fromiter((term_ids.get(token, -1) for token in tokens), dtype=np.int64, count=len(tokens))
+
+        # A short tail joins the last full passage so a few stray words cannot outscore real text
+        passages = max(1, len(tokens) // PASSAGE_WORDS)
+        passage_of = np.minimum(np.arange(len(tokens)) // PASSAGE_WORDS, passages - 1)
+        matched = ids >= 0
+        tf = np.bincount(passage_of[matched] * len(terms) + ids[matched], minlength=passages * len(terms))
+        tf = tf.reshape(passages, len(terms)).astype(np.float64)
+        lengths = np.bincount(passage_of, minlength=passages).astype(np.float64)
+
+        # Score against the statistics of earlier pages, then count this one
+        present = tf.sum(axis=0) > 0
+        with self._lock:
+            df = np.array([self._document_frequency.get(term, 0) for term in terms], dtype=np.float64)
+            documents = self._documents
+            self._documents += 1
+            for term in np.asarray(terms)[present]:
+                self._document_frequency[term] = self._document_frequency.get(term, 0) + 1
+        idf = 1.0 + np.log((documents + 1) / (df + 1))
+        term_weights = np.array([weights[term] for term in terms]) * idf
+
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / lengths.mean())
+        saturated = tf * (BM25_K1 + 1) / (tf + norm[:, None])
+        passage_scores = saturated @ term_weights / ((BM25_K1 + 1) * term_weights.sum())
+        return float(passage_scores.max())
+
+    def check(self, url, content, user_intent=None, step=None, query=None):
+        """
+        Score a page and log the result
+        Returns:
+            tuple: (keep the page, score)
+        """
+        score = self.score(content, user_intent, step, query)
+        kept = score >= self.threshold
+        with self._lock:
+            self.scores.append((score, url, kept))
+        print(f"Relevance {score:.2f}{'' if kept else f' below {self.threshold:.2f}, skipping'}: {url}")
+        return kept, score
+
+    def report(self):
+        """
+        Print how many pages the filter kept and skipped
+        """
+        with self._lock:
+            scores = list(self.scores)
+        if not scores:
+            return
+        skipped = sum(1 for _, _, kept in scores if not kept)
+        values = sorted(score for score, _, _ in scores)
+        print(f"Relevance filter: {skipped}/{len(scores)} pages skipped below {self.threshold:.2f} "
+              f"(median score {values[len(values) // 2]:.2f})")
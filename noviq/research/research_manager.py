@@ -1,73 +1,258 @@
+import threading
 import dspy
-from urllib.parse import urlparse, urldefrag
+from urllib.parse import urlparse
 from noviq.signatures.signatures import (
     GenerateClarifyingQuestions,
     PrepareForResearch,
     GenerateWebSearchQueries,
     CleanAndClassifyWebpageText,
     GenerateWebpageSummary,
-    GenerateFinalResearchReport
+    GenerateFinalResearchReport,
+    GenerateSectionNotes
 )
-from noviq.scrape.scrape import BeautifulSoupScrape
+from noviq.research.stages import Stage
+from noviq.research.summarizer_pool import SummarizationPool
+from noviq.research.pipeline import ResearchPipeline
+from noviq.research.dedup import NearDuplicateDetector, minhash
+from noviq.research.relevance import RelevanceScorer
+from noviq.research.ranking import ResultRanker
+from noviq.research.context import ContextWindowManager
+from noviq.research.vector_index import VectorIndex, vector_index_enabled
+from noviq.research.synthesis import ReportSynthesizer, REPORT_SOURCE_TOKENS
+from noviq.scrape.scrape import BeautifulSoupScrape, get_search_engine
+from noviq.scrape.politeness import get_politeness
+from noviq.scrape.transport import get_transport
+from noviq.tools.captcha import get_captcha_handler
 from noviq.tools.tools import get_search_queries
+from noviq.tools.urls import normalize_url
+from noviq.tools.tracing import get_tracer
 
 MAX_TOKENS = 32000  # Increased to allow for more detailed output
 TEMPERATURE = 0.05  # Reduced to make output more factual and deterministic
 
 class ResearchManager:
-    def __init__(self, model_name):
+    def __init__(self, model_name, context=None, summarization_pool=None, checkpoint=None, lm=None, llm_limiter=None):
         """
         Initialize the research manager with the selected model
         Args:
             model_name (str): Name of the selected model
+            context (ContextWindowManager): Shared context window manager for this model, created if not given
+            summarization_pool (SummarizationPool): Shared LLM worker pool, created if not given
+            checkpoint (RunCheckpoint): Log the run is checkpointed to; an existing log is resumed
+            lm (dspy.LM): LM to use instead of the Ollama model, e.g. a fake one for benchmarks
+            llm_limiter (threading.Semaphore): Shared cap on in-flight LM requests across managers
         """
-        lm = dspy.LM(model=f'ollama_chat/{model_name}', api_base='http://localhost:11434', max_tokens=MAX_TOKENS, temperature=TEMPERATURE)
-        dspy.configure(lm=lm)
+        # Size the prompt budget from the model's real context window and run Ollama with that window
+        self.context = context or ContextWindowManager(model_name)
+        lm = lm or dspy.LM(model=f'ollama_chat/{model_name}', api_base='http://localhost:11434', max_tokens=MAX_TOKENS, temperature=TEMPERATURE, num_ctx=self.context.context_length)
+        # dspy only lets the thread that configured it reconfigure it; managers built on
+        # worker threads (batch jobs) rely on each Stage's own dspy.context instead
+        if threading.current_thread() is threading.main_thread():
+            dspy.configure(lm=lm)
+        self.model_name = model_name
+        self.lm = lm
         
-        self.clarifying_question = dspy.ChainOfThought(GenerateClarifyingQuestions)
-        self.research_plan = dspy.ChainOfThought(PrepareForResearch)
-        self.generate_web_search_queries = dspy.ChainOfThought(GenerateWebSearchQueries)
-        self.clean_webpage_text = dspy.ChainOfThought(CleanAndClassifyWebpageText)
-        self.generate_webpage_summary = dspy.ChainOfThought(GenerateWebpageSummary)
-        self.generate_final_research_report = dspy.ChainOfThought(GenerateFinalResearchReport)
+        # Each stage fits its inputs to the context window and memoizes its outputs
+        # keyed by model, signature, temperature and inputs
+        stage = lambda signature: Stage(signature, lm, model_name, context=self.context, limiter=llm_limiter)
+        self.clarifying_question = stage(GenerateClarifyingQuestions)
+        self.research_plan = stage(PrepareForResearch)
+        self.generate_web_search_queries = stage(GenerateWebSearchQueries)
+        self.clean_webpage_text = stage(CleanAndClassifyWebpageText)
+        self.generate_webpage_summary = stage(GenerateWebpageSummary)
+        self.generate_final_research_report = stage(GenerateFinalResearchReport)
+        self.generate_section_notes = stage(GenerateSectionNotes)
+        self.context.chunk_stage = self.generate_section_notes
+        self.report_synthesizer = ReportSynthesizer(
+            self.generate_section_notes,
+            self.generate_final_research_report,
+            token_budget=min(REPORT_SOURCE_TOKENS, self.context.input_budget(GenerateFinalResearchReport)),
+            count_tokens=self.context.counter.count
+        )
         
+        self.plan_steps = []            # The research plan once it has been generated
+        self.checkpoint = checkpoint
+        self.vector_index = None
+        if vector_index_enabled():
+            # A resumed run reopens its index; pages it lacks are re-indexed by _restore_checkpoint
+            self.vector_index = VectorIndex(checkpoint.vector_index_dir if checkpoint else None)
         self.sources = []
         self.raw_webpage_contents = []  # Store the raw webpage contents
         self.webpage_summaries = []     # Store the webpage summaries
         self.processed_urls = set()     # Track URLs that have already been processed
         self.duplicate_count = 0        # Track number of duplicates for analytics
+        self.near_duplicates = NearDuplicateDetector()  # Content fingerprints of accepted pages
+        self.relevance = RelevanceScorer()  # Keeps off-topic and navigation-only pages away from the summarizer
+        self.result_ranker = ResultRanker()  # Orders search results before any of them is fetched
+        self.user_intent = None
         self.search_stats = {           # Track search statistics
             'total_queries': 0,
             'successful_queries': 0,
             'duplicate_urls': 0,
-            'empty_results': 0
+            'irrelevant_pages': 0,
+            'empty_results': 0,
+            'page_cache_hits': 0,
+            'page_cache_misses': 0
         }
         
+        self.summarization_pool = summarization_pool or SummarizationPool()
+        self._state_lock = threading.Lock()  # Guards run state shared with pipeline workers
+        self.pipeline = None            # The ResearchPipeline of the last execute_research_plan call
+        
+        if checkpoint is not None:
+            if checkpoint.started:
+                self._restore_checkpoint()
+            else:
+                checkpoint.record(
+                    'start',
+                    model=model_name,
+                    vector_index_dir=self.vector_index.directory if self.vector_index else None
+                )
+        
+    def _restore_checkpoint(self):
+        """
+        Restore the run state a checkpoint has already recorded. Pages, sources and summaries
+        come back through the pipeline in plan order; here only the bookkeeping is restored.
+        """
+        for page in self.checkpoint.pages.values():
+            self.processed_urls.add(self.normalize_url(page['url']))
+            self.near_duplicates.add(minhash(page['content']), page['url'])
+        if self.vector_index is not None:
+            # The index may have been pruned, cleared, never recorded or cut short by the crash;
+            # without this the report would only retrieve from the pages fetched after resuming
+            indexed = self.vector_index.urls()
+            missing = [page for page in self.checkpoint.pages.values() if page['url'] not in indexed]
+            if missing:
+                print(f"Re-indexing {len(missing)} restored pages...")
+                for page in missing:
+                    self._index_page(page['title'], page['url'], page['content'])
+        self.plan_steps = self.checkpoint.research_plan or []
+        for stat, value in self.checkpoint.search_stats.items():
+            # Successful queries are recounted as the restored summaries are recorded
+            if stat in self.search_stats and stat != 'successful_queries':
+                self.search_stats[stat] = value
+        print(f"Resuming run {self.checkpoint.run_id}: {len(self.checkpoint.pages)} pages and "
+              f"{len(self.checkpoint.summaries)} summaries already done")
+        
     def normalize_url(self, url):
         """
         Normalize a URL to help prevent duplicate processing of the same content
         Removes fragments and normalizes the domain
         """
-        # Remove URL fragments
-        url_without_fragment = urldefrag(url)[0]
-        
-        # Parse the URL
-        parsed = urlparse(url_without_fragment)
+        return normalize_url(url)
+    
+    def _search(self, query):
+        """
+        Returns the search results for a query
+        """
+        return get_search_queries(query)
+    
+    def _scrape(self, url):
+        """
+        Returns the text of a webpage, counting whether the page cache served it
+        """
+        scrape = BeautifulSoupScrape(url)
+        content = scrape.scrape()
+        self._count_cache_status(scrape.cache_status)
+        return content
+    
+    def _bump(self, stat, amount=1):
+        """
+        Thread-safe increment of a search statistic
+        """
+        with self._state_lock:
+            self.search_stats[stat] += amount
+    
+    def _count_cache_status(self, cache_status):
+        # A 304 revalidation still skips the download and the HTML parse
+        if cache_status in ('hit', 'revalidated'):
+            self._bump('page_cache_hits')
+        elif cache_status == 'miss':
+            self._bump('page_cache_misses')
+    
+    def claim_url(self, url):
+        """
+        Mark a URL as processed so no other query fetches it
+        Returns:
+            bool: False if it was already processed (counted as a duplicate)
+        """
+        # Normalize the URL to avoid duplicates with slightly different formats
+        normalized_url = self.normalize_url(url)
+        with self._state_lock:
+            if normalized_url in self.processed_urls:
+                print(f"Skipping duplicate URL: {url}")
+                self.search_stats['duplicate_urls'] += 1
+                self.duplicate_count += 1
+                return False
+            self.processed_urls.add(normalized_url)
+            return True
+    
+    def accept_content(self, url, content, step=None, query=None):
+        """
+        Decide whether scraped content is worth summarizing. Thread-safe.
+        Args:
+            step (str): Plan step the page was searched for, part of the relevance query
+            query (str): Search query that found the page
+        Returns:
+            bool: False for short, restricted, off-topic or near-duplicate content
+        """
+        # Skip if content is too short or contains error messages
+        if len(content) < 200 or "Skipped due to" in content:
+            print(f"Skipping URL due to insufficient content: {url}")
+            return False
         
-        # Normalize the domain (remove www. if present)
-        netloc = parsed.netloc
-        if netloc.startswith('www.'):
-            netloc = netloc[4:]
-            
-        # Reconstruct the URL with normalized domain
-        normalized_url = f"{parsed.scheme}://{netloc}{parsed.path}"
+        # Score against the intent, step and query before spending an LLM call on the page
+        with get_tracer().span('relevance', 'cpu', content_chars=len(content)) as span:
+            relevant, score = self.relevance.check(url, content, self.user_intent, step, query)
+            span.set(score=round(score, 3), kept=relevant)
+        if not relevant:
+            self._bump('irrelevant_pages')
+            return False
         
-        # Add query parameters if they exist
-        if parsed.query:
-            normalized_url += f"?{parsed.query}"
-            
-        return normalized_url
+        # Skip mirrors, syndicated copies and tracking variants of a page we already have
+        signature = minhash(content)
+        with self._state_lock:
+            duplicate_of = self.near_duplicates.find(signature)
+            if duplicate_of:
+                print(f"Skipping near-duplicate of {duplicate_of}: {url}")
+                self.search_stats['duplicate_urls'] += 1
+                self.duplicate_count += 1
+                return False
+            self.near_duplicates.add(signature, url)
+        return True
         
+    def _index_page(self, title, url, content):
+        """
+        Chunk and embed a scraped page into the run's vector index
+        """
+        if self.vector_index is None:
+            return
+        try:
+            self.vector_index.add(content, title, url)
+        except Exception as e:
+            # Retrieval is an optimization; keep researching without it
+            print(f"⚠️  Could not index {url} ({e}). Disabling retrieval for this run.")
+            self.vector_index = None
+    
+    def retrieve_report_context(self, user_intent):
+        """
+        Retrieve the top-k page chunks for every research plan step (or the intent if there is no plan)
+        Returns:
+            list[str]: Unique chunks labelled with their source, or an empty list if retrieval is unavailable
+        """
+        if self.vector_index is None or len(self.vector_index) == 0:
+            return []
+        retrieved = {}
+        try:
+            for section in self.plan_steps or [user_intent]:
+                for score, chunk in self.vector_index.search(f"{user_intent}: {section}"):
+                    retrieved.setdefault(chunk['text'], f"[{chunk['title']}]({chunk['url']})\n{chunk['text']}")
+        except Exception as e:
+            print(f"⚠️  Retrieval failed ({e}). Falling back to the collected texts.")
+            return []
+        print(f"Retrieved {len(retrieved)} relevant chunks from {len(self.vector_index)} indexed chunks.")
+        return list(retrieved.values())
+    
     def get_clarifying_questions(self, user_intent):
         """
         Get clarifying questions based on user intent
@@ -86,65 +271,48 @@ class ResearchManager:
         """
         Get the research plan from the LLM
         """
+        if self.checkpoint and self.checkpoint.research_plan:
+            self.plan_steps = self.checkpoint.research_plan
+            return self.plan_steps
+        
         plan = self.research_plan(user_intent=user_intent, qa_pairs=qa_pairs)
+        self.plan_steps = plan.research_plan
+        if self.checkpoint:
+            self.checkpoint.record('plan', user_intent=user_intent, qa_pairs=qa_pairs, research_plan=plan.research_plan)
         return plan.research_plan
         
-    def execute_search_query(self, query, user_intent):
+    def select_page(self, query):
         """
-        Execute a search query and return the extracted text from the URL
+        Search a query and return the first usable page among its 3 best-ranked results
+        Returns:
+            tuple or None: (title, url, content) of a new, non-duplicate page with enough content
         """
         self.search_stats['total_queries'] += 1
-        results = get_search_queries(query)
+        results = self._search(query)
         
         if not results:
             self.search_stats['empty_results'] += 1
             print(f"No results found for query: {query}")
             return None
             
-        # Try the top 3 results until we find one that hasn't been processed yet
-        for title, url in results[:3]:
-            # Normalize the URL to avoid duplicates with slightly different formats
-            normalized_url = self.normalize_url(url)
-            
-            # Skip if we've already processed this URL
-            if normalized_url in self.processed_urls:
-                print(f"Skipping duplicate URL: {url}")
-                self.search_stats['duplicate_urls'] += 1
-                self.duplicate_count += 1
+        # Try the 3 best-ranked results until we find one that hasn't been processed yet
+        ranked = self.result_ranker.rank({query: results}, self.user_intent)
+        for title, url in [(candidate.title, candidate.url) for candidate in ranked[:3]]:
+            if not self.claim_url(url):
                 continue
                 
             print(f"Title: {title}\nURL: {url}\n")
             
-            # Add to processed URLs
-            self.processed_urls.add(normalized_url)
-            self.sources.append((title, url))
-            
             try:
-                scrape = BeautifulSoupScrape(url)
-                content = scrape.scrape()
-                
-                # Skip if content is too short or contains error messages
-                if len(content) < 200 or "Skipped due to" in content:
-                    print(f"Skipping URL due to insufficient content: {url}")
+                content = self._scrape(url)
+                if not self.accept_content(url, content, query=query):
                     continue
                 
-                # Store the raw content
+                # Store the source and its raw content
+                self.sources.append((title, url))
                 self.raw_webpage_contents.append((title, url, content))
-                
-                # Generate a 7-sentence summary of the webpage
-                summary = self.generate_webpage_summary(
-                    user_intent=user_intent,
-                    webpage_text=content,
-                    webpage_title=title,
-                    webpage_url=url
-                )
-                
-                self.webpage_summaries.append(summary.summary)
-                self.search_stats['successful_queries'] += 1
-                
-                print("\nWebpage Summary (7 sentences):", summary.summary)
-                
-                return summary.summary
+                self._index_page(title, url, content)
+                return title, url, content
             except Exception as e:
                 print(f"Error processing {url}: {e}")
                 continue
@@ -152,58 +320,131 @@ class ResearchManager:
         # If all top results are duplicates or failed, return None
         print("All search results have already been processed or failed.")
         return None
+    
+    def summarize_page(self, user_intent, title, url, content):
+        """
+        Generate a 7-sentence summary of a webpage. Safe to call from worker threads.
+        """
+        summary = self.generate_webpage_summary(
+            user_intent=user_intent,
+            webpage_text=content,
+            webpage_title=title,
+            webpage_url=url
+        )
+        return summary.summary
+    
+    def record_summary(self, summary):
+        """
+        Store a finished summary. Called from the research thread in query order.
+        """
+        self.webpage_summaries.append(summary)
+        self._bump('successful_queries')
         
-    def execute_research_plan(self, research_plan, user_intent, qa_pairs):
+    def execute_search_query(self, query, user_intent):
         """
-        Execute the research plan and gather information
+        Execute a search query and return the extracted text from the URL
+        """
+        page = self.select_page(query)
+        if page is None:
+            return None
+        
+        title, url, content = page
+        try:
+            summary = self.summarize_page(user_intent, title, url, content)
+        except Exception as e:
+            print(f"Error processing {url}: {e}")
+            return None
+        
+        self.record_summary(summary)
+        print("\nWebpage Summary (7 sentences):", summary)
+        return summary
+        
+    @staticmethod
+    def _print_event(event, payload):
+        """
+        Default pipeline listener: plain progress output
+        """
+        if event == 'queries':
+            print("Generating web search queries for: " + payload['step'] + "\n")
+            print(payload['queries'])
+        elif event == 'page':
+            print(f"Title: {payload['title']}\nURL: {payload['url']}\n")
+        elif event == 'summary':
+            print("\nWebpage Summary (7 sentences):", payload['summary'])
+        elif event == 'query_failed':
+            print(f"{payload['reason']} for query: {payload['query']}")
+        
+    def execute_research_plan(self, research_plan, user_intent, qa_pairs, listener=None):
+        """
+        Execute the research plan and gather information.
+        The plan runs through a staged pipeline (query generation, search, fetch, extract,
+        summarize) so every stage is busy at once; results are recorded in plan order.
+        Args:
+            listener (callable): Called as listener(event, payload) for progress events
         """
         scraped_webpage_texts = []
         min_sources_needed = 5  # Minimum number of sources we want to collect
+        self.plan_steps = research_plan
+        self.user_intent = user_intent
         
         print("\nResearch Plan:")
-        for step in research_plan:
-            web_search_queries = self.generate_web_search_queries(
-                user_intent=user_intent,
-                qa_pairs=qa_pairs,
-                overall_research_plan=research_plan,
-                research_plan_step=step
-            )
-            print("Generating web search queries for: " + step + "\n")
-            print(web_search_queries.web_search_queries)
-            
-            queries = web_search_queries.web_search_queries
-            
-            # Limit to first 2 queries per step to avoid too many API calls
-            for query in queries[:2]:
-                # Skip more queries once we have enough sources
-                if len(self.webpage_summaries) >= min_sources_needed:
-                    print(f"\nCollected {len(self.webpage_summaries)} sources, which meets our minimum requirement.")
-                    break
-                
-                print(f"\nResults for query: {query}")
-                cleaned_text = self.execute_search_query(query, user_intent)
-                if cleaned_text:
-                    scraped_webpage_texts.append(cleaned_text)
-            
-            # Break early if we have enough sources
-            if len(self.webpage_summaries) >= min_sources_needed:
-                break
+        self.pipeline = ResearchPipeline(
+            self,
+            research_plan,
+            user_intent,
+            qa_pairs,
+            min_sources=min_sources_needed,
+            listener=listener or self._print_event,
+            summarization_pool=self.summarization_pool
+        )
+        with get_tracer().span('research', 'phase', steps=len(research_plan)):
+            items = self.pipeline.run()
+        for item in items:
+            self.sources.append((item.title, item.url))
+            self.raw_webpage_contents.append((item.title, item.url, item.content))
+            if item.summary:
+                self.record_summary(item.summary)
+                scraped_webpage_texts.append(item.summary)
+        
+        if len(self.webpage_summaries) >= min_sources_needed:
+            print(f"\nCollected {len(self.webpage_summaries)} sources, which meets our minimum requirement.")
         
         # Print statistics
         print(f"\n--- Search Statistics ---")
         print(f"Total queries executed: {self.search_stats['total_queries']}")
         print(f"Successful queries: {self.search_stats['successful_queries']}")
         print(f"Duplicate URLs skipped: {self.search_stats['duplicate_urls']}")
+        print(f"Off-topic pages skipped: {self.search_stats['irrelevant_pages']}")
         print(f"Queries with no results: {self.search_stats['empty_results']}")
+        print(f"Page cache hits/misses: {self.search_stats['page_cache_hits']}/{self.search_stats['page_cache_misses']}")
+        host_stats = get_transport().host_stats()
+        total_requests = sum(stats['requests'] for stats in host_stats.values())
+        reused = sum(stats['reused'] for stats in host_stats.values())
+        print(f"HTTP connections reused: {reused}/{total_requests} requests across {len(host_stats)} hosts")
         print(f"Total sources collected: {len(self.webpage_summaries)}")
         print(f"-------------------------")
+        get_politeness().report()
+        get_captcha_handler().report()
+        if get_search_engine() == 'federated':
+            from noviq.tools.federated import get_federated_search
+            get_federated_search().report()
+        self.relevance.report()
+        self.pipeline.report()
+        self.context.report()
         
         return scraped_webpage_texts
     
-    def generate_report(self, user_intent, qa_pairs, scraped_webpage_texts):
+    def generate_report(self, user_intent, qa_pairs, scraped_webpage_texts, check_cancelled=None, on_section=None):
         """
         Generate the final research report
+        Args:
+            check_cancelled (callable): Called between synthesis LLM calls; raise from it to stop the report
+            on_section (callable): Called with (round, index, total, notes) as each section of notes is condensed
         """
+        with get_tracer().span('report', 'phase'):
+            return self._generate_report(user_intent, qa_pairs, scraped_webpage_texts, check_cancelled, on_section)
+    
+    def _generate_report(self, user_intent, qa_pairs, scraped_webpage_texts, check_cancelled=None, on_section=None):
         print("\nGenerating detailed research report from all webpage summaries and content...")
         print(f"Using {len(self.webpage_summaries)} webpage summaries and {len(scraped_webpage_texts)} scraped contents.")
         
@@ -213,7 +454,7 @@ class ResearchManager:
             print("The report may lack comprehensive information or factual accuracy.")
             
             # Try to get more sources if we don't have enough
-            if len(self.research_plan) > 0 and len(self.webpage_summaries) < 3:
+            if len(self.plan_steps) > 0 and len(self.webpage_summaries) < 3:
                 print("\nAttempting to collect additional sources...")
                 backup_queries = [
                     f"{user_intent} facts",
@@ -236,15 +477,27 @@ class ResearchManager:
         
         print(f"Passing {len(research_topics)} characters of summarized content to generate report...")
         
-        # Generate the research report
-        research_report = self.generate_final_research_report(
-            user_intent=user_intent,
-            qa_pairs=qa_pairs,
-            cleaned_webpage_text=scraped_webpage_texts,
-            webpage_summaries=self.webpage_summaries
-        )
+        # Ground each report section in its most relevant page chunks instead of whole pages
+        source_texts = self.retrieve_report_context(user_intent) or scraped_webpage_texts
         
-        research_report_text = research_report.research_report
+        # Generate the research report, condensing the sources first if they overflow one call
+        with get_tracer().span('report.synthesize', 'llm', sources=len(source_texts)):
+            research_report_text = self.report_synthesizer.synthesize(
+                user_intent,
+                qa_pairs,
+                source_texts,
+                self.webpage_summaries,
+                check_cancelled=check_cancelled,
+                on_section=on_section
+            )
+        
+        with get_tracer().span('report.assemble', 'cpu'):
+            return self._assemble_report(user_intent, research_report_text)
+    
+    def _assemble_report(self, user_intent, research_report_text):
+        """
+        Wrap, add a table of contents and citations to the synthesized report
+        """
         
         # Validate that the output is proper HTML
         if not research_report_text.strip().startswith("<!DOCTYPE html>") and "<html" not in research_report_text:
@@ -312,6 +565,14 @@ class ResearchManager:
             else:
                 research_report_text += citations_html
         
+        self.context.report()
+        if self.checkpoint:
+            self.checkpoint.record('report', sources=len(self.sources))
+        elif self.vector_index is not None:
+            # Without a checkpoint nothing can reopen the index; checkpointed runs keep theirs
+            # for a resume until INDEX_KEEP_DAYS prunes it
+            self.vector_index.delete()
+            self.vector_index = None
         print("\n✅ Research report generation complete!")
         return research_report_text
     
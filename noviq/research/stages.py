@@ -0,0 +1,85 @@
+import time
+from contextlib import nullcontext
+
+import dspy
+
+from noviq.cache.llm_cache import get_llm_cache, make_key
+from noviq.tools.tracing import get_tracer
+
+
+def _token_usage(prediction):
+    """
+    (prompt tokens, completion tokens) of a prediction, or None when dspy did not track usage
+    """
+    get_lm_usage = getattr(prediction, 'get_lm_usage', None)
+    usage = get_lm_usage() if get_lm_usage else None
+    if not usage:
+        return None
+    prompt_tokens = sum(model_usage.get('prompt_tokens') or 0 for model_usage in usage.values())
+    completion_tokens = sum(model_usage.get('completion_tokens') or 0 for model_usage in usage.values())
+    return prompt_tokens, completion_tokens
+
+
+class Stage:
+    """
+    A dspy.ChainOfThought module bound to one LM, with its inputs fitted to the
+    context window and its outputs memoized.
+    Calls look exactly like calling the module: stage(user_intent=..., ...) returns a dspy.Prediction.
+    """
+
+    def __init__(self, signature, lm, model_name, cache=None, context=None, limiter=None):
+        """
+        Args:
+            signature (type): dspy.Signature class the stage runs
+            lm (dspy.LM): LM the stage calls
+            model_name (str): Model name, part of the memoization key
+            cache (LLMCache): Output cache, defaults to the shared one
+            context (ContextWindowManager): Fits inputs into the model's context window before each call
+            limiter (threading.Semaphore): Held around each LM request, so LM calls from many runs
+                sharing one model server stay within its parallelism; cache hits do not take it
+        """
+        self.signature = signature
+        self.name = signature.__name__
+        self.module = dspy.ChainOfThought(signature)
+        self.lm = lm
+        self.model_name = model_name
+        self.temperature = lm.kwargs.get('temperature')
+        self.cache = cache if cache is not None else get_llm_cache()
+        self.context = context
+        self.limiter = limiter
+
+    def __call__(self, **inputs):
+        tracer = get_tracer()
+        with tracer.span(f"llm.{self.name}", 'llm', model=self.model_name) as span:
+            if self.context:
+                inputs = self.context.fit(self.name, self.signature, inputs)
+
+            key = None
+            if self.cache:
+                key = make_key(self.model_name, self.name, self.temperature, inputs)
+                outputs = self.cache.get(key)
+                if outputs is not None:
+                    span.set(cached=True)
+                    return dspy.Prediction(**outputs)
+
+            # Token usage is only tracked while tracing; it costs a little bookkeeping per call
+            settings = {'track_usage': True} if tracer.enabled else {}
+            with self.limiter or nullcontext():
+                started = time.perf_counter()
+                with dspy.context(lm=self.lm, **settings):
+                    prediction = self.module(**inputs)
+            llm_seconds = time.perf_counter() - started
+
+            usage = _token_usage(prediction) if tracer.enabled else None
+            if usage:
+                prompt_tokens, completion_tokens = usage
+                span.set(
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    llm_seconds=round(llm_seconds, 3),
+                    tokens_per_sec=round(completion_tokens / llm_seconds, 1) if llm_seconds else None
+                )
+
+            if self.cache:
+                self.cache.put(key, self.model_name, self.name, dict(prediction.items()))
+            return prediction
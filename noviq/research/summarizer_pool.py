@@ -0,0 +1,65 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+_parallelism_hint_shown = False
+_parallelism_hint_lock = threading.Lock()
+
+
+def detect_llm_parallelism():
+    """
+    Number of LLM requests the Ollama server will serve at once.
+    Ollama does not report its parallelism over the API and this process usually does not
+    see the server's environment, so the value has to be configured: NOVIQ_LLM_WORKERS
+    (or --llm-workers), then OLLAMA_NUM_PARALLEL when it is set here too. Otherwise every
+    LLM call runs one at a time, and a hint saying so is printed once.
+    """
+    global _parallelism_hint_shown
+    for name in ('NOVIQ_LLM_WORKERS', 'OLLAMA_NUM_PARALLEL'):
+        value = os.environ.get(name, '')
+        if value.isdigit() and int(value) > 0:
+            return int(value)
+    with _parallelism_hint_lock:
+        if not _parallelism_hint_shown:
+            _parallelism_hint_shown = True
+            print("ℹ️  Running one LLM call at a time. If the Ollama server was started with "
+                  "OLLAMA_NUM_PARALLEL=N, set NOVIQ_LLM_WORKERS=N (or --llm-workers N) to use it.")
+    return 1
+
+
+class SummarizationPool:
+    """
+    Bounded worker pool for webpage summaries.
+    Up to `workers` dspy calls run at once. submit() blocks once `max_pending` pages are
+    queued or running, so fetching cannot outrun summarization and pile pages up in memory.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        """
+        Args:
+            workers (int): Concurrent summaries, detect_llm_parallelism() by default
+            max_pending (int): Pages allowed in the pool before submit() blocks, defaults to 2 * workers
+        """
+        self.workers = workers or detect_llm_parallelism()
+        self.max_pending = max_pending or self.workers * 2
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='noviq-summarize')
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue a summary call, waiting for a free slot first
+        Returns:
+            Future: Resolves to fn's return value
+        """
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,144 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from noviq.research.summarizer_pool import detect_llm_parallelism
+
+REPORT_SOURCE_TOKENS = int(os.environ.get('NOVIQ_REPORT_SOURCE_TOKENS', 6000))  # Source tokens allowed in one LLM call
+SYNTHESIS_WORKERS = int(os.environ.get('NOVIQ_SYNTHESIS_WORKERS', 0))  # Concurrent map calls; 0 follows detect_llm_parallelism()
+MAX_REDUCE_ROUNDS = 4   # Safety net so notes that refuse to shrink cannot loop forever
+
+
+def estimate_tokens(text):
+    """
+    Rough token count for budgeting, about 4 characters per token for English text
+    """
+    return len(text) // 4 + 1
+
+
+def batch_sources(sources, token_budget, count_tokens=estimate_tokens):
+    """
+    Greedily pack sources into batches that each fit in token_budget, keeping their order
+    Args:
+        sources (list[str]): Source texts
+        token_budget (int): Tokens allowed per batch
+        count_tokens (callable): Token counter
+    Returns:
+        list[list[str]]: Batches of sources; a single source larger than the budget is truncated to fit
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+    for source in sources:
+        tokens = count_tokens(source)
+        if tokens > token_budget:
+            source = source[:token_budget * 4]
+            tokens = token_budget
+        if current and current_tokens + tokens > token_budget:
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(source)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class ReportSynthesizer:
+    """
+    Map-reduce report generation.
+    Small source sets go straight into the final report stage. Larger ones are packed into
+    token-budgeted batches, condensed into section notes (in parallel), and the notes are
+    reduced again until they fit a single final report call.
+    """
+
+    def __init__(self, notes_stage, report_stage, token_budget=REPORT_SOURCE_TOKENS, max_workers=SYNTHESIS_WORKERS,
+                 count_tokens=estimate_tokens):
+        """
+        Args:
+            notes_stage (Stage): Stage running GenerateSectionNotes
+            report_stage (Stage): Stage running GenerateFinalResearchReport
+            token_budget (int): Source tokens allowed in one call
+            max_workers (int): Concurrent map calls, detect_llm_parallelism() when 0
+            count_tokens (callable): Token counter
+        """
+        self.notes_stage = notes_stage
+        self.report_stage = report_stage
+        self.token_budget = token_budget
+        self.max_workers = max(1, max_workers or detect_llm_parallelism())
+        self.count_tokens = count_tokens
+
+    def _notes_for_batch(self, user_intent, qa_pairs, batch, check_cancelled):
+        if check_cancelled:
+            check_cancelled()   # Batches still queued when the run is cancelled never reach the LLM
+        notes = self.notes_stage(user_intent=user_intent, qa_pairs=qa_pairs, source_material=batch)
+        return notes.section_notes
+
+    def _map(self, user_intent, qa_pairs, batches, round_num=1, check_cancelled=None, on_section=None):
+        """
+        Condense every batch into section notes, returned in batch order.
+        on_section(round_num, index, total, notes) is called as each batch finishes, in completion order.
+        """
+        notes = [None] * len(batches)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            futures = {executor.submit(self._notes_for_batch, user_intent, qa_pairs, batch, check_cancelled): index
+                       for index, batch in enumerate(batches)}
+            try:
+                for future in as_completed(futures):
+                    index = futures[future]
+                    notes[index] = future.result()
+                    if on_section:
+                        on_section(round_num, index, len(batches), notes[index])
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        return notes
+
+    def synthesize(self, user_intent, qa_pairs, source_texts, summaries, check_cancelled=None, on_section=None):
+        """
+        Generate the HTML research report
+        Args:
+            user_intent (str): The research topic
+            qa_pairs (list): Clarifying question/answer pairs
+            source_texts (list[str]): Scraped webpage texts
+            summaries (list[str]): Webpage summaries
+            check_cancelled (callable): Called before every LLM call; raise from it to abort the synthesis
+            on_section (callable): Called with (round, index, total, notes) as each batch of sources is condensed
+        Returns:
+            str: The research report text from the final stage
+        """
+        total_tokens = sum(self.count_tokens(text) for text in source_texts + summaries)
+        if total_tokens <= self.token_budget:
+            if check_cancelled:
+                check_cancelled()
+            report = self.report_stage(
+                user_intent=user_intent,
+                qa_pairs=qa_pairs,
+                cleaned_webpage_text=source_texts,
+                webpage_summaries=summaries
+            )
+            return report.research_report
+
+        # Label every unique source once so the notes can cite them
+        labelled = []
+        for text in dict.fromkeys(summaries + source_texts):
+            labelled.append(f"Source {len(labelled) + 1}:\n{text}")
+
+        notes = labelled
+        for round_num in range(1, MAX_REDUCE_ROUNDS + 1):
+            batches = batch_sources(notes, self.token_budget, self.count_tokens)
+            print(f"Synthesis round {round_num}: condensing {len(notes)} inputs in {len(batches)} batches...")
+            notes = self._map(user_intent, qa_pairs, batches, round_num, check_cancelled, on_section)
+            if sum(self.count_tokens(note) for note in notes) <= self.token_budget:
+                break
+
+        if check_cancelled:
+            check_cancelled()
+        report = self.report_stage(
+            user_intent=user_intent,
+            qa_pairs=qa_pairs,
+            cleaned_webpage_text=notes,
+            webpage_summaries=[]
+        )
+        return report.research_report
@@ -0,0 +1,222 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from noviq.cache import get_cache_dir
+
+EMBED_MODEL = os.environ.get('NOVIQ_EMBED_MODEL', 'nomic-embed-text')
+EMBED_BATCH_SIZE = 32
+CHUNK_WORDS = 200       # Words per indexed chunk
+CHUNK_OVERLAP = 40      # Words shared by consecutive chunks so facts are not cut in half
+TOP_K = int(os.environ.get('NOVIQ_RETRIEVAL_TOP_K', 6))
+INDEX_KEEP_DAYS = float(os.environ.get('NOVIQ_INDEX_KEEP_DAYS', 7))  # Run indexes untouched this long are deleted
+
+_embed_model_available = None
+_embed_model_lock = threading.Lock()
+
+
+def get_index_root():
+    """
+    Directory holding one vector index directory per run, created if needed
+    """
+    index_root = os.path.join(get_cache_dir(), 'index')
+    os.makedirs(index_root, exist_ok=True)
+    return index_root
+
+
+def prune_indexes(keep_days=INDEX_KEEP_DAYS):
+    """
+    Delete run indexes that have not been written to for keep_days
+    Returns:
+        int: Number of indexes removed
+    """
+    index_root = get_index_root()
+    cutoff = time.time() - keep_days * 86400
+    removed = 0
+    for name in os.listdir(index_root):
+        path = os.path.join(index_root, name)
+        if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def clear_indexes():
+    """
+    Delete every run index
+    Returns:
+        int: Number of indexes removed
+    """
+    return prune_indexes(keep_days=-1)
+
+
+def embed_model_available(model=EMBED_MODEL):
+    """
+    Returns True when Ollama has the embedding model pulled; checked once per process
+    """
+    global _embed_model_available
+    with _embed_model_lock:
+        if _embed_model_available is None:
+            try:
+                import ollama
+                ollama.show(model)
+                _embed_model_available = True
+            except Exception:
+                print(f"Retrieval is off: embedding model {model} is not available (run `ollama pull {model}` to enable it)")
+                _embed_model_available = False
+        return _embed_model_available
+
+
+def vector_index_enabled():
+    """
+    NOVIQ_VECTOR_INDEX=1 always indexes pages, 0 never does, and the default 'auto' indexes
+    them only when the embedding model is available
+    """
+    setting = os.environ.get('NOVIQ_VECTOR_INDEX', 'auto').lower()
+    if setting in ('0', 'false', 'off', 'no'):
+        return False
+    if setting == 'auto':
+        return embed_model_available()
+    return True
+
+
+def chunk_text(text, chunk_words=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    """
+    Split text into overlapping word windows
+    Returns:
+        list[str]: Chunks of about chunk_words words
+    """
+    words = text.split()
+    if not words:
+        return []
+    step = max(1, chunk_words - overlap)
+    return [' '.join(words[start:start + chunk_words]) for start in range(0, max(1, len(words) - overlap), step)]
+
+
+class OllamaEmbedder:
+    """
+    Embeds text with the local Ollama embeddings endpoint
+    """
+
+    def __init__(self, model=EMBED_MODEL):
+        self.model = model
+
+    def embed(self, texts):
+        """
+        Returns:
+            np.ndarray: float32 matrix with one row per text
+        """
+        import ollama
+        vectors = []
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            response = ollama.embed(model=self.model, input=texts[start:start + EMBED_BATCH_SIZE])
+            vectors.extend(response['embeddings'])
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class VectorIndex:
+    """
+    Embedded, append-only vector index over page chunks.
+    Unit-normalized float32 vectors are appended to vectors.f32 and read back through a
+    read-only np.memmap, so a large index does not have to live in RAM. Chunk text and
+    source metadata go to chunks.jsonl in the same order.
+    """
+
+    def __init__(self, directory=None, embedder=None):
+        """
+        Args:
+            directory (str): Where the index files live; defaults to a new run directory in the cache
+            embedder (OllamaEmbedder): Embedding backend
+        """
+        if directory is None:
+            prune_indexes()
+            directory = tempfile.mkdtemp(prefix='run-', dir=get_index_root())
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.embedder = embedder or OllamaEmbedder()
+        self.vectors_path = os.path.join(directory, 'vectors.f32')
+        self.chunks_path = os.path.join(directory, 'chunks.jsonl')
+
+        self._lock = threading.Lock()
+        self._chunks = []
+        self.dim = None
+        if os.path.exists(self.chunks_path):
+            with open(self.chunks_path) as f:
+                self._chunks = [json.loads(line) for line in f if line.strip()]
+        if self._chunks and os.path.exists(self.vectors_path):
+            self.dim = os.path.getsize(self.vectors_path) // 4 // len(self._chunks)
+        self._matrix = None
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def urls(self):
+        """
+        Returns:
+            set[str]: URLs of the pages that have chunks in the index
+        """
+        with self._lock:
+            return {chunk['url'] for chunk in self._chunks}
+
+    def add(self, text, title, url):
+        """
+        Chunk, embed and append a page
+        Returns:
+            int: Number of chunks added
+        """
+        chunks = chunk_text(text)
+        if not chunks:
+            return 0
+        vectors = self.embedder.embed(chunks)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            with open(self.vectors_path, 'ab') as f:
+                vectors.astype(np.float32).tofile(f)
+            with open(self.chunks_path, 'a') as f:
+                for chunk in chunks:
+                    record = {'text': chunk, 'title': title, 'url': url}
+                    f.write(json.dumps(record) + '\n')
+                    self._chunks.append(record)
+            self._matrix = None  # Re-map on the next search
+        return len(chunks)
+
+    def delete(self):
+        """
+        Remove the index files once nothing will search the index again
+        """
+        with self._lock:
+            self._matrix = None
+            self._chunks = []
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _vectors(self):
+        if self._matrix is None or self._matrix.shape[0] != len(self._chunks):
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(len(self._chunks), self.dim))
+        return self._matrix
+
+    def search(self, query, k=TOP_K):
+        """
+        Find the chunks most similar to a query
+        Returns:
+            list[tuple[float, dict]]: (cosine score, chunk record) pairs, best first
+        """
+        if not self._chunks:
+            return []
+        query_vector = self.embedder.embed([query])[0]
+        query_vector = query_vector / (np.linalg.norm(query_vector) or 1)
+        with self._lock:
+            scores = self._vectors() @ query_vector
+            chunks = list(self._chunks)
+        k = min(k, len(chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), chunks[i]) for i in top]
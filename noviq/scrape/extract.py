@@ -0,0 +1,206 @@
+import codecs
+import os
+import re
+from html.parser import HTMLParser
+
+from noviq.tools.tracing import get_tracer
+
+EXTRACTOR_BACKEND = os.environ.get('NOVIQ_EXTRACTOR', 'auto')  # auto, selectolax, lxml, html.parser or stream
+STREAM_MAX_CHARS = int(os.environ.get('NOVIQ_EXTRACT_MAX_CHARS', 200000))  # Text collected before the stream backend stops
+STREAM_CHUNK_SIZE = 16 * 1024
+
+SKIPPED_TAGS = ('script', 'style', 'noscript', 'template')
+
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([A-Za-z0-9_\-:.]+)', re.IGNORECASE)
+_HEADER_CHARSET = re.compile(r'charset=["\']?([A-Za-z0-9_\-:.]+)', re.IGNORECASE)
+
+
+def _clean_text(text):
+    """
+    Collapse the whitespace of extracted text the same way for every backend
+    """
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+def _known_codec(name):
+    try:
+        return codecs.lookup(name).name
+    except (LookupError, TypeError):
+        return None
+
+
+def detect_charset(raw, content_type=None):
+    """
+    Work out the character encoding of an HTML body
+    Args:
+        raw (bytes): Response body
+        content_type (str): Content-Type response header, if any
+    Returns:
+        str: Codec name, checked in order: BOM, HTTP header, <meta charset>, charset_normalizer, utf-8/cp1252
+    """
+    for bom, name in ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16')):
+        if raw.startswith(bom):
+            return name
+
+    if content_type:
+        match = _HEADER_CHARSET.search(content_type)
+        if match and _known_codec(match.group(1)):
+            return _known_codec(match.group(1))
+
+    match = _META_CHARSET.search(raw[:4096])
+    if match and _known_codec(match.group(1).decode('ascii', 'ignore')):
+        return _known_codec(match.group(1).decode('ascii', 'ignore'))
+
+    try:
+        from charset_normalizer import from_bytes
+        best = from_bytes(raw[:65536]).best()
+        if best is not None:
+            return best.encoding
+    except ImportError:
+        pass
+
+    try:
+        raw.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def decode_html(raw, content_type=None):
+    """
+    Decode an HTML body to str using detect_charset()
+    """
+    return raw.decode(detect_charset(raw, content_type), errors='replace')
+
+
+def extract_with_html_parser(html):
+    """Full BeautifulSoup tree with the pure-Python html.parser"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    for element in soup(list(SKIPPED_TAGS)):
+        element.decompose()
+    return _clean_text(soup.get_text())
+
+
+def extract_with_lxml(html):
+    """libxml2 parser through lxml.html"""
+    import lxml.html
+    # Parse bytes so documents carrying an XML encoding declaration are accepted
+    document = lxml.html.document_fromstring(html.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+    for element in list(document.iter(*SKIPPED_TAGS)):
+        element.drop_tree()
+    return _clean_text(document.text_content())
+
+
+def extract_with_selectolax(html):
+    """Lexbor parser through selectolax"""
+    from selectolax.lexbor import LexborHTMLParser
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(list(SKIPPED_TAGS))
+    root = tree.body or tree.root
+    if root is None:
+        return ''
+    return _clean_text(root.text(separator='\n'))
+
+
+class _StreamingTextParser(HTMLParser):
+    """
+    Incremental stdlib parser that collects visible text and flags when it has enough
+    """
+
+    def __init__(self, max_chars):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts = []
+        self.collected = 0
+        self.skip_depth = 0
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if self.skip_depth or self.done:
+            return
+        self.parts.append(data)
+        self.collected += len(data.strip())
+        if self.max_chars and self.collected >= self.max_chars:
+            self.done = True
+
+
+def extract_streaming(html, max_chars=STREAM_MAX_CHARS):
+    """Incremental stdlib parser that stops once max_chars of text are collected"""
+    parser = _StreamingTextParser(max_chars)
+    for start in range(0, len(html), STREAM_CHUNK_SIZE):
+        parser.feed(html[start:start + STREAM_CHUNK_SIZE])
+        if parser.done:
+            break
+    text = _clean_text('\n'.join(parser.parts))
+    return text[:max_chars] if max_chars else text
+
+
+EXTRACTORS = {
+    'selectolax': extract_with_selectolax,
+    'lxml': extract_with_lxml,
+    'html.parser': extract_with_html_parser,
+    'stream': extract_streaming,
+}
+
+_BACKEND_MODULES = {
+    'selectolax': 'selectolax.lexbor',
+    'lxml': 'lxml.html',
+    'html.parser': 'bs4',
+    'stream': 'html.parser',
+}
+
+
+def available_backends():
+    """
+    Returns the extractor backends whose parser library is installed, fastest first
+    """
+    backends = []
+    for name, module in _BACKEND_MODULES.items():
+        try:
+            __import__(module)
+            backends.append(name)
+        except ImportError:
+            continue
+    return backends
+
+
+def get_extractor(backend=None):
+    """
+    Returns the extraction function for a backend name, resolving 'auto' to the fastest installed one
+    """
+    backend = backend or EXTRACTOR_BACKEND
+    if backend == 'auto':
+        backend = available_backends()[0]
+    if backend not in EXTRACTORS:
+        raise ValueError(f"Unknown extractor backend: {backend}. Choose from {', '.join(EXTRACTORS)} or auto.")
+    return EXTRACTORS[backend]
+
+
+def extract_text(html, backend=None, max_chars=None):
+    """
+    Returns the visible text of an HTML document
+    Args:
+        html (str): HTML document
+        backend (str): Extractor backend, defaults to NOVIQ_EXTRACTOR
+        max_chars (int): Cap on the returned text; the stream backend stops parsing once it is reached
+    """
+    extractor = get_extractor(backend)
+    with get_tracer().span('extract', 'cpu', backend=extractor.__name__, html_chars=len(html)) as span:
+        if extractor is extract_streaming:
+            text = extract_streaming(html, max_chars=max_chars or STREAM_MAX_CHARS)
+        else:
+            text = extractor(html)
+            text = text[:max_chars] if max_chars else text
+        span.set(text_chars=len(text))
+        return text
@@ -0,0 +1,82 @@
+import os
+import threading
+from contextlib import contextmanager
+
+MAX_CONCURRENT_FETCHES = int(os.environ.get('NOVIQ_MAX_CONCURRENT_FETCHES', 8))  # Global cap on in-flight network calls
+MAX_FETCHES_PER_HOST = int(os.environ.get('NOVIQ_MAX_FETCHES_PER_HOST', 2))      # Cap per host so a single site is not hammered
+
+
+class ConcurrencyLimiter:
+    """
+    Thread-safe global and per-host concurrency caps.
+    Shared by every code path that talks to the network so the caps hold across batches.
+    A thread waiting out a rate limit or a retry backoff hands its slots back with released(),
+    so a throttled host cannot hold every global slot while nothing is on the wire.
+    """
+
+    def __init__(self, max_total=MAX_CONCURRENT_FETCHES, max_per_host=MAX_FETCHES_PER_HOST):
+        self.max_total = max_total
+        self.max_per_host = max_per_host
+        self._total = threading.BoundedSemaphore(max_total)
+        self._per_host = {}
+        self._held = threading.local()  # Host semaphores of the slots the current thread holds
+        self._lock = threading.Lock()
+
+    def _host_semaphore(self, host):
+        with self._lock:
+            if host not in self._per_host:
+                self._per_host[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._per_host[host]
+
+    @contextmanager
+    def slot(self, host):
+        """
+        Hold one global slot and one slot for the given host while the block runs
+        Args:
+            host (str): Host (or other key) the call is made against
+        """
+        host_semaphore = self._host_semaphore(host)
+        held = self._held.__dict__.setdefault('slots', [])
+        # Take the host slot first so waiting on a busy host does not block a global slot
+        host_semaphore.acquire()
+        self._total.acquire()
+        held.append(host_semaphore)
+        try:
+            yield
+        finally:
+            held.pop()
+            self._total.release()
+            host_semaphore.release()
+
+    @contextmanager
+    def released(self):
+        """
+        Give back the slots the current thread holds while the block sleeps, then take them again
+        """
+        held = getattr(self._held, 'slots', None)
+        if not held:
+            yield
+            return
+        host_semaphore = held[-1]
+        self._total.release()
+        host_semaphore.release()
+        try:
+            yield
+        finally:
+            host_semaphore.acquire()
+            self._total.acquire()
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_fetch_limiter():
+    """
+    Returns the process-wide ConcurrencyLimiter
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = ConcurrencyLimiter()
+        return _default_limiter
@@ -0,0 +1,302 @@
+import os
+import threading
+import time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+POLITENESS_ENABLED = os.environ.get('NOVIQ_POLITENESS', '1').lower() not in ('0', 'false', 'off', 'no')
+HOST_RATE = float(os.environ.get('NOVIQ_HOST_RATE', 2.0))      # Requests per second per host once it has settled
+HOST_BURST = int(os.environ.get('NOVIQ_HOST_BURST', 4))         # Requests a host may receive back to back
+# Host suffix -> requests per second, e.g. NOVIQ_HOST_RATES="duckduckgo.com=0.5,example.org=5"
+HOST_RATES = {'duckduckgo.com': 1.0, 'googleapis.com': 10.0}
+MIN_RATE = 0.05         # Floor the adaptive rate never drops below (one request per 20s)
+RECOVERY = 0.1          # Share of the base rate regained after each successful response
+COOLDOWN_BASE = 5.0     # Seconds a host is left alone after its first block, doubled per repeated block
+COOLDOWN_MAX = 300.0
+ROBOTS_TTL = 24 * 3600  # Seconds a robots.txt verdict is reused
+ROBOTS_ERROR_TTL = 600  # Seconds a server error on robots.txt keeps the host disallowed before asking again
+ROBOTS_AGENT = 'noviq'  # Product token matched against robots.txt user-agent lines
+EXEMPT_HOSTS = ('localhost', '127.0.0.1', '::1')  # Local services are never throttled
+BLOCK_STATUSES = {403, 429}
+
+
+class HostBlockedError(requests.RequestException):
+    """Raised instead of sending a request to a host that is cooling down or whose robots.txt disallows the URL"""
+
+
+def _host(url):
+    return (urlparse(url).hostname or '').lower()
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second up to `burst`. Not thread-safe on its own;
+    HostState guards it.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now):
+        """
+        Take a token, going into debt if none is left
+        Returns:
+            float: Seconds the caller must wait before its request
+        """
+        self._refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class HostState:
+    """
+    Rate, cooldown and counters of one host
+    """
+
+    def __init__(self, base_rate, burst):
+        self.base_rate = base_rate
+        self.bucket = TokenBucket(base_rate, burst)
+        self.blocked_until = 0.0
+        self.strikes = 0        # Consecutive blocks; sets the cooldown length
+        self.crawl_delay = None
+        self.stats = {'requests': 0, 'blocked': 0, 'disallowed': 0, 'wait_seconds': 0.0}
+        self.lock = threading.Lock()
+
+
+class PolitenessScheduler:
+    """
+    Host-aware gate between noviq and the network.
+    Every request takes a token from its host's bucket, so high overall concurrency turns
+    into a steady per-host request rate instead of bursts that trip bot detection. A 403,
+    429 or CAPTCHA halves the host's rate and leaves it alone for a cooldown (Retry-After
+    when given, doubling per repeated block); successes win the rate back gradually.
+    Page fetches also consult the host's robots.txt, fetched once and cached.
+    """
+
+    def __init__(self, rate=HOST_RATE, burst=HOST_BURST, rates=None, enabled=POLITENESS_ENABLED):
+        self.rate = rate
+        self.burst = burst
+        self.enabled = enabled
+        self.rates = dict(HOST_RATES if rates is None else rates)
+        for entry in os.environ.get('NOVIQ_HOST_RATES', '').split(','):
+            host, _, value = entry.partition('=')
+            if host.strip() and value.strip():
+                self.rates[host.strip().lower()] = float(value)
+        self._hosts = {}
+        self._robots = {}       # host -> (RobotFileParser or None for allow-all, expires at)
+        self._robots_locks = {}
+        self._lock = threading.Lock()
+
+    def _base_rate(self, host):
+        labels = host.split('.')
+        for start in range(len(labels)):
+            suffix = '.'.join(labels[start:])
+            if suffix in self.rates:
+                return self.rates[suffix]
+        return self.rate
+
+    def _state(self, host):
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = HostState(self._base_rate(host), self.burst)
+            return self._hosts[host]
+
+    def _exempt(self, host):
+        return not self.enabled or not host or host in EXEMPT_HOSTS
+
+    def acquire(self, url, deadline_at=None):
+        """
+        Wait until the host may receive another request
+        Args:
+            deadline_at (float): time.monotonic() by which the request must be sent
+        Returns:
+            float: Seconds waited
+        Raises:
+            HostBlockedError: The host is cooling down past the deadline
+        """
+        host = _host(url)
+        if self._exempt(host):
+            return 0.0
+        state = self._state(host)
+        with state.lock:
+            now = time.monotonic()
+            wait = max(0.0, state.blocked_until - now)
+            if deadline_at is not None and now + wait > deadline_at:
+                raise HostBlockedError(f"{host} is cooling down for another {wait:.0f}s after blocking requests")
+            wait += state.bucket.reserve(now + wait)
+            state.stats['requests'] += 1
+            state.stats['wait_seconds'] += wait
+        if deadline_at is not None:
+            wait = min(wait, max(0.0, deadline_at - time.monotonic()))
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def cooling_down(self, url):
+        """
+        Returns True while the host is in a block cooldown, so callers can try another host first
+        """
+        host = _host(url)
+        if self._exempt(host):
+            return False
+        with self._lock:
+            state = self._hosts.get(host)
+        return state is not None and state.blocked_until > time.monotonic()
+
+    def record(self, url, status_code, retry_after=None):
+        """
+        Adapt the host's rate to a response status
+        """
+        if status_code in BLOCK_STATUSES:
+            self.penalize(url, retry_after)
+            return
+        host = _host(url)
+        if self._exempt(host) or status_code >= 400:
+            return
+        state = self._state(host)
+        with state.lock:
+            state.strikes = 0
+            ceiling = min(state.base_rate, 1.0 / state.crawl_delay) if state.crawl_delay else state.base_rate
+            state.bucket.rate = min(ceiling, state.bucket.rate + state.base_rate * RECOVERY)
+
+    def penalize(self, url, retry_after=None):
+        """
+        Slow a host down after it blocked a request (403, 429 or a CAPTCHA page)
+        """
+        host = _host(url)
+        if self._exempt(host):
+            return
+        state = self._state(host)
+        with state.lock:
+            state.strikes += 1
+            state.stats['blocked'] += 1
+            state.bucket.rate = max(MIN_RATE, state.bucket.rate / 2)
+            cooldown = min(COOLDOWN_MAX, COOLDOWN_BASE * 2 ** (state.strikes - 1))
+            if retry_after:
+                cooldown = max(cooldown, min(float(retry_after), COOLDOWN_MAX))
+            state.blocked_until = max(state.blocked_until, time.monotonic() + cooldown)
+        print(f"⚠️  {host} is blocking requests; slowing to {state.bucket.rate:.2f} req/s and pausing {cooldown:.0f}s")
+
+    @staticmethod
+    def _parse_robots(response):
+        """
+        Turn a robots.txt response into a verdict the way RobotFileParser.read() does
+        Returns:
+            tuple: (RobotFileParser or None when everything is allowed, seconds to keep it)
+        """
+        if response.status_code in (401, 403):
+            parser = RobotFileParser()
+            parser.disallow_all = True
+            return parser, ROBOTS_TTL
+        if 400 <= response.status_code < 500:
+            return None, ROBOTS_TTL
+        if response.status_code >= 500:
+            # The server cannot say what is allowed; stay away for a while, then ask again
+            parser = RobotFileParser()
+            parser.disallow_all = True
+            return parser, ROBOTS_ERROR_TTL
+        parser = RobotFileParser()
+        parser.parse(response.text.splitlines())
+        return parser, ROBOTS_TTL
+
+    def _robots_parser(self, host, origin):
+        with self._lock:
+            cached = self._robots.get(host)
+            if cached and time.monotonic() < cached[1]:
+                return cached[0]
+            host_lock = self._robots_locks.setdefault(host, threading.Lock())
+        # One robots.txt download per host; other threads wait for it
+        with host_lock:
+            with self._lock:
+                cached = self._robots.get(host)
+                if cached and time.monotonic() < cached[1]:
+                    return cached[0]
+            parser, ttl = None, ROBOTS_TTL
+            try:
+                from noviq.scrape.transport import get_transport
+                # A 403 on robots.txt is a verdict about robots.txt, not a block of the host
+                response = get_transport().get(f"{origin}/robots.txt", deadline=10, record_status=False)
+                parser, ttl = self._parse_robots(response)
+            except Exception as e:
+                print(f"Could not read robots.txt of {host} ({e}); treating it as allowing everything")
+            with self._lock:
+                self._robots[host] = (parser, time.monotonic() + ttl)
+            delay = parser.crawl_delay(ROBOTS_AGENT) if parser is not None and not parser.disallow_all else None
+            if delay:
+                state = self._state(host)
+                with state.lock:
+                    state.crawl_delay = float(delay)
+                    state.bucket.rate = min(state.bucket.rate, 1.0 / float(delay))
+            return parser
+
+    def allowed(self, url):
+        """
+        Check robots.txt for a page URL
+        Returns:
+            bool: False when the host's robots.txt disallows it
+        """
+        parsed = urlparse(url)
+        host = _host(url)
+        if self._exempt(host):
+            return True
+        # Cached under the same host key as the rate state, so Crawl-delay reaches acquire()
+        parser = self._robots_parser(host, f"{parsed.scheme or 'https'}://{parsed.netloc.lower()}")
+        if parser is None or parser.can_fetch(ROBOTS_AGENT, url):
+            return True
+        state = self._state(host)
+        with state.lock:
+            state.stats['disallowed'] += 1
+        return False
+
+    def host_stats(self):
+        """
+        Returns:
+            dict: host -> {'requests', 'blocked', 'disallowed', 'wait_seconds', 'rate'}
+        """
+        with self._lock:
+            hosts = dict(self._hosts)
+        stats = {}
+        for host, state in hosts.items():
+            with state.lock:
+                stats[host] = dict(state.stats, rate=state.bucket.rate)
+        return stats
+
+    def report(self):
+        """
+        Print the scheduler's totals and the hosts that pushed back
+        """
+        stats = self.host_stats()
+        if not stats:
+            return
+        blocked = sum(host['blocked'] for host in stats.values())
+        disallowed = sum(host['disallowed'] for host in stats.values())
+        waited = sum(host['wait_seconds'] for host in stats.values())
+        print(f"Politeness: {len(stats)} hosts, {blocked} blocked responses, {disallowed} robots.txt disallows, "
+              f"{waited:.1f}s spent waiting for rate limits")
+        for host, values in sorted(stats.items(), key=lambda item: -item[1]['blocked']):
+            if values['blocked']:
+                print(f"  {host}: {values['blocked']} blocks, now {values['rate']:.2f} req/s")
+
+
+_politeness = None
+_politeness_lock = threading.Lock()
+
+
+def get_politeness():
+    """
+    Returns the process-wide PolitenessScheduler
+    """
+    global _politeness
+    with _politeness_lock:
+        if _politeness is None:
+            _politeness = PolitenessScheduler()
+        return _politeness
@@ -1,10 +1,14 @@
 from abc import ABC, abstractmethod
-import requests
-from bs4 import BeautifulSoup
 import webbrowser
 import time
 import os
 import json
+from noviq.cache.page_cache import get_page_cache
+from noviq.cache.search_cache import get_search_cache
+from noviq.scrape.politeness import BLOCK_STATUSES, HostBlockedError, get_politeness
+from noviq.scrape.transport import get_transport
+from noviq.scrape.extract import extract_text, decode_html
+from noviq.tools.tracing import get_tracer
 
 
 class Scrape(ABC):
@@ -20,35 +24,111 @@ class Scrape(ABC):
 class HTTPScrape(Scrape):
     def scrape(self) -> str:
         """Returns raw HTML content as string"""
-        response = requests.get(self.url)
+        response = get_transport().get(self.url)
         return response.text
 
 
 class BeautifulSoupScrape(Scrape):
-    def scrape(self) -> str:
-        """Returns cleaned HTML content as string"""
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+    def __init__(self, url: str, cache=None):
+        """
+        Args:
+            url (str): Webpage to scrape
+            cache (PageCache): On-disk page cache, defaults to the shared one
+        """
+        super().__init__(url)
+        self.cache = cache if cache is not None else get_page_cache()
+        self.cache_status = None  # 'hit', 'revalidated' or 'miss' after fetch()
+        self.blocked = False      # True when the site refused us (403, CAPTCHA, robots.txt or a host cooldown)
+        self._response = None     # Response kept between fetch() and extract() for the cache
+
+    @staticmethod
+    def extract_text(html) -> str:
+        """Returns the visible text of an HTML document using the configured extractor backend"""
+        return extract_text(html)
+
+    def fetch(self):
+        """
+        Download the page, consulting the page cache first
+        Returns:
+            tuple: (html, text) where text is set when no extraction is needed
+            (cache hit, restricted or failed page) and html is set otherwise
+        """
+        with get_tracer().span('fetch', 'io', url=self.url) as span:
+            html, text = self._fetch()
+            span.set(cache_status=self.cache_status)
+            return html, text
+
+    def _fetch(self):
+        headers = {}
+        self._response = None
         
+        cached = self.cache.get(self.url) if self.cache else None
+        if cached and cached.fresh:
+            self.cache_status = 'hit'
+            return None, cached.text
+        if cached:
+            # Stale entry: ask the server whether our copy is still current
+            headers.update(cached.conditional_headers())
+        self.cache_status = 'miss'
+        
+        politeness = get_politeness()
         try:
-            response = requests.get(self.url, headers=headers, timeout=10)
+            if not politeness.allowed(self.url):
+                print(f"\n⚠️  robots.txt of {self.url} disallows it. Skipping this webpage.")
+                self.blocked = True
+                return None, "Skipped due to robots.txt"
+            response = get_transport().get(self.url, headers=headers)
+            
+            if response.status_code == 304 and cached:
+                self.cache.refresh(self.url)
+                self.cache_status = 'revalidated'
+                return None, cached.text
             
             # For non-DuckDuckGo websites, if we get a 403 or CAPTCHA, just skip
-            if response.status_code == 403 or "Please solve this CAPTCHA" in response.text or "captcha" in response.text.lower():
+            if response.status_code in BLOCK_STATUSES or "Please solve this CAPTCHA" in response.text:
                 print(f"\n⚠️  Website at {self.url} has access restrictions. Skipping this webpage.")
-                return "Skipped due to website access restrictions"
-                
-            soup = BeautifulSoup(response.text, 'html.parser')
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            # Get text and clean it up
-            text = soup.get_text()
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
+                if response.status_code not in BLOCK_STATUSES:
+                    # The transport already slowed the host down for the 403/429; a CAPTCHA page comes back as 200
+                    politeness.penalize(self.url)
+                self.blocked = True
+                return None, "Skipped due to website access restrictions"
+            if "captcha" in response.text.lower():
+                # Could be a challenge we do not recognize or just a comment form; skip the page
+                # but leave the host alone
+                print(f"\n⚠️  Website at {self.url} mentions a CAPTCHA. Skipping this webpage.")
+                return None, "Skipped due to a possible CAPTCHA"
+            
+            self._response = response
+            return decode_html(response.content, response.headers.get('Content-Type')), None
+        except HostBlockedError as e:
+            print(f"\n⚠️  {e}. Skipping {self.url}.")
+            self.blocked = True
+            return None, f"Skipped due to website access restrictions: {e}"
+        except Exception as e:
+            print(f"Error scraping webpage {self.url}: {e}")
+            return None, f"Skipped due to error: {e}"
+
+    def extract(self, html) -> str:
+        """Extracts the text of HTML returned by fetch() and stores the page in the cache"""
+        text = self.extract_text(html)
+        response = self._response
+        if self.cache and response is not None and response.status_code == 200:
+            self.cache.put(
+                self.url,
+                response.content,
+                text,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+        return text
+
+    def scrape(self) -> str:
+        """Returns cleaned HTML content as string"""
+        html, text = self.fetch()
+        if text is not None:
             return text
+        try:
+            return self.extract(html)
         except Exception as e:
             print(f"Error scraping webpage {self.url}: {e}")
             return f"Skipped due to error: {e}"
@@ -71,17 +151,25 @@ class GoogleSearchScrape:
         if not self.cx:
             raise ValueError("Google Custom Search Engine ID is required. Set GOOGLE_CSE_ID environment variable or pass cx.")
     
-    def search(self, query, num_results=10):
+    def search(self, query, num_results=10, use_cache=True):
         """
         Perform a Google search and return results
         
         Args:
             query (str): Search query
             num_results (int): Number of results to return (max 10 per request)
+            use_cache (bool): Set to False to bypass the search result cache
             
         Returns:
             list: List of tuples containing (title, url)
         """
+        cache = get_search_cache() if use_cache else None
+        cache_engine = f"google:{min(num_results, 10)}"
+        if cache:
+            cached = cache.get(cache_engine, query)
+            if cached is not None:
+                return cached
+        
         base_url = "https://www.googleapis.com/customsearch/v1"
         params = {
             'key': self.api_key,
@@ -91,7 +179,7 @@ class GoogleSearchScrape:
         }
         
         try:
-            response = requests.get(base_url, params=params)
+            response = get_transport().get(base_url, params=params)
             response.raise_for_status()
             
             search_results = []
@@ -103,6 +191,8 @@ class GoogleSearchScrape:
                     url = item.get('link', '')
                     search_results.append((title, url))
             
+            if cache:
+                cache.put(cache_engine, query, search_results)
             return search_results
         except Exception as e:
             print(f"Error performing Google search: {e}")
@@ -114,6 +204,6 @@ def get_search_engine():
     Returns the appropriate search engine based on environment variables
     
     Returns:
-        str: 'google' or 'duckduckgo'
+        str: 'google', 'duckduckgo' or 'federated'
     """
     return os.environ.get('SEARCH_ENGINE', 'duckduckgo').lower()
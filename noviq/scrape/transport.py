@@ -0,0 +1,236 @@
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from noviq.scrape.fetch_engine import get_fetch_limiter
+from noviq.scrape.politeness import HostBlockedError, get_politeness
+from noviq.tools.tracing import get_tracer
+
+MAX_RETRIES = int(os.environ.get('NOVIQ_HTTP_MAX_RETRIES', 3))
+BACKOFF_BASE = 0.5      # Seconds before the first retry, doubled on each attempt
+BACKOFF_MAX = 8.0       # Upper bound for a single backoff sleep
+CONNECT_TIMEOUT = 5     # Seconds to establish a connection
+READ_TIMEOUT = 10       # Seconds between bytes once connected
+REQUEST_DEADLINE = float(os.environ.get('NOVIQ_HTTP_DEADLINE', 30))  # Total seconds per request, retries included
+MAX_BODY_BYTES = int(os.environ.get('NOVIQ_HTTP_MAX_BODY_MB', 5)) * 1024 * 1024
+POOL_HOSTS = 64         # Number of per-host connection pools kept alive
+POOL_MAXSIZE = 8        # Keep-alive connections kept per host
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CHUNK_SIZE = 64 * 1024
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+def _accept_encoding():
+    """
+    Returns the Accept-Encoding header value, advertising brotli only when urllib3 can decode it
+    """
+    for module in ('brotli', 'brotlicffi'):
+        try:
+            __import__(module)
+            return 'gzip, deflate, br'
+        except ImportError:
+            continue
+    return 'gzip, deflate'
+
+
+class TransportResponse:
+    """
+    A fully read (possibly truncated) HTTP response.
+    Mirrors the parts of requests.Response the scrapers use.
+    """
+
+    def __init__(self, url, status_code, headers, content, encoding, truncated):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.truncated = truncated
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+class HTTPTransport:
+    """
+    Shared HTTP client for every scraper and search engine.
+    Keeps pooled keep-alive connections per host, negotiates compression, retries transient
+    failures with jittered exponential backoff, caps how much of a body is read and enforces
+    a total deadline per request. Every attempt goes through the PolitenessScheduler, which
+    paces requests per host and backs off hosts that answer 403 or 429.
+    """
+
+    def __init__(self, max_retries=MAX_RETRIES, deadline=REQUEST_DEADLINE, max_body_bytes=MAX_BODY_BYTES, politeness=None):
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.max_body_bytes = max_body_bytes
+        self.politeness = politeness or get_politeness()
+
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+        self.session.headers.update({'User-Agent': USER_AGENT, 'Accept-Encoding': _accept_encoding()})
+
+        self._lock = threading.Lock()
+        self._retries = {}
+
+    def get(self, url, params=None, headers=None, max_bytes=None, deadline=None, record_status=True):
+        """
+        Perform a GET request
+        Args:
+            url (str): URL to fetch
+            params (dict): Query string parameters
+            headers (dict): Extra request headers
+            max_bytes (int): Stop reading the body after this many bytes
+            deadline (float): Total seconds allowed for the request, retries included
+            record_status (bool): Let a 403/429 slow the host down; off for requests such as
+                robots.txt whose status says nothing about the host blocking us
+        Returns:
+            TransportResponse: The response, with truncated=True if the body hit max_bytes
+        """
+        with get_tracer().span('http', 'io', host=urlparse(url).netloc) as span:
+            result = self._get(url, params, headers, max_bytes, deadline, record_status, span)
+            span.set(status=result.status_code, bytes=len(result.content), truncated=result.truncated)
+            return result
+
+    def _get(self, url, params, headers, max_bytes, deadline, record_status, span):
+        max_bytes = max_bytes or self.max_body_bytes
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        attempt = 0
+        result = None
+
+        while True:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise requests.Timeout(f"Deadline exceeded for {url}")
+
+            retry_after = None
+            try:
+                # Rate-limit and cooldown waits do not hold the caller's fetch slot
+                with get_fetch_limiter().released():
+                    waited = self.politeness.acquire(url, deadline_at)
+            except HostBlockedError:
+                # The host's cooldown outlasts the deadline: hand back the 429 instead of retrying
+                if result is not None:
+                    return result
+                raise
+            if waited:
+                span.set(politeness_wait_ms=round(waited * 1000, 1))
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    raise requests.Timeout(f"Deadline exceeded for {url} while waiting for its rate limit")
+            try:
+                response = self.session.get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    stream=True,
+                    timeout=(min(CONNECT_TIMEOUT, remaining), min(READ_TIMEOUT, remaining))
+                )
+                # elapsed covers DNS, connect, TLS and waiting for the headers; the rest is the body
+                span.set(ttfb_ms=round(response.elapsed.total_seconds() * 1000, 1))
+                read_started = time.perf_counter()
+                try:
+                    result = self._read(response, max_bytes, deadline_at)
+                finally:
+                    response.close()
+                span.set(download_ms=round((time.perf_counter() - read_started) * 1000, 1), attempts=attempt + 1)
+                if record_status:
+                    self.politeness.record(url, result.status_code, self._retry_after(result, cap=None))
+                if result.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return result
+                retry_after = self._retry_after(result)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries or time.monotonic() >= deadline_at:
+                    raise
+
+            attempt += 1
+            self._count_retry(url)
+            # Full jitter keeps concurrent retries against one host from synchronizing
+            delay = retry_after if retry_after is not None else random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            with get_fetch_limiter().released():
+                time.sleep(max(0.0, min(delay, deadline_at - time.monotonic())))
+
+    def _read(self, response, max_bytes, deadline_at):
+        """
+        Stream the body until it ends, hits max_bytes or the deadline passes
+        """
+        chunks = []
+        size = 0
+        truncated = False
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            if time.monotonic() > deadline_at:
+                raise requests.Timeout(f"Deadline exceeded while reading {response.url}")
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                truncated = True
+                break
+        content = b''.join(chunks)[:max_bytes]
+        return TransportResponse(response.url, response.status_code, response.headers, content, response.encoding, truncated)
+
+    @staticmethod
+    def _retry_after(result, cap=BACKOFF_MAX):
+        value = result.headers.get('Retry-After')
+        if value and value.isdigit():
+            return min(float(value), cap) if cap else float(value)
+        return None
+
+    def _count_retry(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            self._retries[host] = self._retries.get(host, 0) + 1
+
+    def host_stats(self):
+        """
+        Connection reuse per host, read from the underlying urllib3 pools
+        Returns:
+            dict: host -> {'requests', 'connections', 'reused', 'retries'}
+        """
+        stats = {}
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host_stats = stats.setdefault(pool.host, {'requests': 0, 'connections': 0, 'reused': 0, 'retries': 0})
+            host_stats['requests'] += pool.num_requests
+            host_stats['connections'] += pool.num_connections
+        with self._lock:
+            for host, retries in self._retries.items():
+                host = host.split(':')[0]
+                stats.setdefault(host, {'requests': 0, 'connections': 0, 'reused': 0, 'retries': 0})['retries'] += retries
+        for host_stats in stats.values():
+            host_stats['reused'] = max(0, host_stats['requests'] - host_stats['connections'])
+        return stats
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """
+    Returns the process-wide HTTPTransport
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HTTPTransport()
+        return _transport
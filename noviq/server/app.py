@@ -0,0 +1,178 @@
+import json
+import os
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from noviq.server.jobs import JobQueue, QueueFullError
+
+SERVE_HOST = os.environ.get('NOVIQ_SERVE_HOST', '127.0.0.1')
+SERVE_PORT = int(os.environ.get('NOVIQ_SERVE_PORT', 8765))
+MAX_BODY_BYTES = 1024 * 1024    # Largest accepted request body
+KEEPALIVE_SECONDS = 15          # Comment line sent on idle event streams so proxies keep them open
+RETRY_AFTER_SECONDS = 30        # Retry-After hint sent with 429 responses
+
+_JOB_PATH = re.compile(r'^/jobs/([A-Za-z0-9._-]+)(/events|/report)?/?$')
+
+
+class ResearchRequestHandler(BaseHTTPRequestHandler):
+    """
+    REST API over the server's JobQueue:
+        POST   /jobs              submit {"intent": ..., "qa_pairs": [[q, a], ...], "model": ...}
+        GET    /jobs              list jobs
+        GET    /jobs/<id>         job status
+        GET    /jobs/<id>/events  server-sent event stream (resumable with ?after=N or Last-Event-ID)
+        GET    /jobs/<id>/report  the finished HTML report
+        DELETE /jobs/<id>         cancel the job
+        GET    /health            queue load
+    """
+
+    server_version = 'noviq'
+
+    @property
+    def jobs(self):
+        return self.server.jobs
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message, headers=None):
+        self._send_json(status, {'error': message}, headers)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError(f"request body is larger than {MAX_BODY_BYTES} bytes")
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON ({e})")
+        if not isinstance(payload, dict):
+            raise ValueError("request body must be a JSON object")
+        return payload
+
+    def _route(self):
+        url = urlparse(self.path)
+        match = _JOB_PATH.match(url.path)
+        if not match:
+            return url, None, None
+        return url, match.group(1), (match.group(2) or '').strip('/')
+
+    def do_POST(self):
+        url, job_id, _ = self._route()
+        if url.path.rstrip('/') != '/jobs':
+            return self._error(404, "not found")
+        try:
+            payload = self._read_json()
+            qa_pairs = payload.get('qa_pairs') or []
+            if not all(isinstance(pair, (list, tuple)) and len(pair) == 2 for pair in qa_pairs):
+                raise ValueError("qa_pairs must be a list of [question, answer] pairs")
+            job = self.jobs.submit(payload.get('intent'), qa_pairs, payload.get('model'))
+        except ValueError as e:
+            return self._error(400, str(e))
+        except QueueFullError as e:
+            return self._error(429, f"server is at capacity: {e}", {'Retry-After': str(RETRY_AFTER_SECONDS)})
+        self._send_json(202, job.to_dict(), {'Location': f"/jobs/{job.id}"})
+
+    def do_DELETE(self):
+        _, job_id, action = self._route()
+        if job_id is None or action:
+            return self._error(404, "not found")
+        job = self.jobs.cancel(job_id)
+        if job is None:
+            return self._error(404, f"unknown job {job_id}")
+        self._send_json(202, job.to_dict())
+
+    def do_GET(self):
+        url, job_id, action = self._route()
+        if url.path.rstrip('/') == '/health':
+            return self._send_json(200, self.jobs.stats())
+        if url.path.rstrip('/') == '/jobs':
+            return self._send_json(200, {'jobs': [job.to_dict() for job in self.jobs.list()], 'stats': self.jobs.stats()})
+        if job_id is None:
+            return self._error(404, "not found")
+        job = self.jobs.get(job_id)
+        if job is None:
+            return self._error(404, f"unknown job {job_id}")
+
+        if action == 'events':
+            return self._stream_events(job, url)
+        if action == 'report':
+            if job.report is None:
+                return self._error(409, f"job {job.id} has no report (status: {job.status})")
+            body = job.report.encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self._send_json(200, job.to_dict())
+
+    def _stream_events(self, job, url):
+        """
+        Send the job's events as server-sent events until it finishes; the SSE id is the event index
+        """
+        after = parse_qs(url.query).get('after', [None])[0] or self.headers.get('Last-Event-ID')
+        try:
+            position = int(after) + 1 if after is not None else 0
+        except ValueError:
+            return self._error(400, "after must be an event index")
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        try:
+            while True:
+                events, finished = job.wait_events(position, KEEPALIVE_SECONDS)
+                for event in events:
+                    self.wfile.write(f"id: {position}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n".encode())
+                    position += 1
+                if finished and not events:
+                    self.wfile.write(f"event: end\ndata: {json.dumps(job.to_dict(), default=str)}\n\n".encode())
+                    self.wfile.flush()
+                    return
+                if not events:
+                    self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client went away; the job keeps running
+
+
+class ResearchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, jobs):
+        super().__init__(address, ResearchRequestHandler)
+        self.jobs = jobs
+
+
+def serve(host=SERVE_HOST, port=SERVE_PORT, jobs=None):
+    """
+    Serve the research API until interrupted
+    Args:
+        host (str): Interface to bind; keep it on localhost unless the network is trusted
+        port (int): Port to listen on
+        jobs (JobQueue): Queue to serve, created with the default settings if not given
+    """
+    jobs = jobs or JobQueue()
+    server = ResearchServer((host, port), jobs)
+    print(f"noviq serving on http://{host}:{server.server_address[1]} "
+          f"({jobs.workers} jobs at a time, {jobs.max_queued} queued, model {jobs.default_model or 'per job'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+        jobs.shutdown(wait=False)
@@ -0,0 +1,282 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+import traceback
+from collections import OrderedDict
+
+from noviq.research.batch import DEFAULT_MODEL
+from noviq.research.context import ContextWindowManager
+from noviq.research.summarizer_pool import SummarizationPool, detect_llm_parallelism
+from noviq.research.checkpoint import new_run_id
+
+SERVE_JOBS = int(os.environ.get('NOVIQ_SERVE_JOBS', 2))            # Research jobs running at once
+SERVE_QUEUE = int(os.environ.get('NOVIQ_SERVE_QUEUE', 16))         # Jobs allowed to wait for a slot before submits are refused
+MAX_FINISHED_JOBS = int(os.environ.get('NOVIQ_SERVE_KEEP_JOBS', 200))  # Finished jobs kept for status and report requests
+
+FINISHED = ('done', 'failed', 'cancelled')
+
+
+class QueueFullError(Exception):
+    """Raised by JobQueue.submit when every running slot and queue slot is taken"""
+
+
+class ResearchJob:
+    """
+    One submitted research intent and everything it has produced so far
+    """
+
+    def __init__(self, job_id, intent, qa_pairs, model):
+        self.id = job_id
+        self.intent = intent
+        self.qa_pairs = [tuple(pair) for pair in (qa_pairs or [])]
+        self.model = model
+        self.status = 'queued'
+        self.events = []        # Event dicts in order; report chunks are left out, the report is kept whole
+        self.report = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.session = None
+        self.cancel_requested = False
+        self._changed = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    def add_event(self, event):
+        with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+
+    def set_status(self, status, error=None):
+        with self._changed:
+            self.status = status
+            if status == 'running':
+                self.started = time.time()
+            elif status in FINISHED:
+                self.finished = time.time()
+            if error:
+                self.error = error
+            self._changed.notify_all()
+
+    def wait_events(self, after, timeout):
+        """
+        Wait until there are events past index `after` or the job has finished
+        Returns:
+            tuple: (new events, whether the job has finished)
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.events) > after or self.done, timeout)
+            return self.events[after:], self.done
+
+    def to_dict(self):
+        seconds = None
+        if self.started:
+            seconds = round((self.finished or time.time()) - self.started, 3)
+        return {
+            'id': self.id,
+            'intent': self.intent,
+            'model': self.model,
+            'status': self.status,
+            'error': self.error,
+            'events': len(self.events),
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'seconds': seconds,
+            'has_report': self.report is not None,
+        }
+
+
+class JobQueue:
+    """
+    In-process queue of research jobs for the HTTP server.
+    A fixed number of worker threads run jobs; everything expensive is shared between them:
+    the page, search and LLM caches and the HTTP pool are process-wide, and the queue adds
+    one summarization pool, one context window manager per model and one LLM limiter, so
+    the model server sees the same bounded load however many jobs are in flight.
+    Admission control: once every worker is busy, up to max_queued jobs wait their turn and
+    further submits raise QueueFullError instead of slowing down the jobs already admitted.
+    """
+
+    def __init__(self, default_model=DEFAULT_MODEL, workers=SERVE_JOBS, max_queued=SERVE_QUEUE, lm=None):
+        """
+        Args:
+            default_model (str): Model for jobs that do not name one
+            workers (int): Jobs run concurrently
+            max_queued (int): Jobs allowed to wait for a free worker
+            lm (dspy.LM): LM every job uses instead of its Ollama model, e.g. a fake one for benchmarks
+        """
+        self.default_model = default_model
+        self.workers = max(1, workers)
+        self.max_queued = max(0, max_queued)
+        self.lm = lm
+        self.summarization_pool = SummarizationPool()
+        self.llm_limiter = threading.BoundedSemaphore(detect_llm_parallelism())
+        self.jobs = OrderedDict()
+        self.rejected = 0
+        self._contexts = {}
+        self._lock = threading.Lock()
+        # A bounded queue holds only the jobs waiting for a worker; maxsize 0 would mean unbounded
+        self._pending = queue.Queue(maxsize=self.max_queued or 1)
+        self._stopping = False
+        self._threads = []
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'noviq-serve-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _context(self, model_name):
+        with self._lock:
+            if model_name not in self._contexts:
+                self._contexts[model_name] = ContextWindowManager(model_name)
+            return self._contexts[model_name]
+
+    def _running(self):
+        return sum(1 for job in self.jobs.values() if job.status == 'running')
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def submit(self, intent, qa_pairs=None, model=None):
+        """
+        Queue a research job
+        Returns:
+            ResearchJob: The queued job
+        Raises:
+            ValueError: No intent, or no model and no default model
+            QueueFullError: The server is at capacity
+        """
+        if not intent or not str(intent).strip():
+            raise ValueError("job has no intent")
+        model = model or self.default_model
+        if not model:
+            raise ValueError("no model given; set it per job or start the server with --model")
+        job = ResearchJob(new_run_id(), str(intent).strip(), qa_pairs, model)
+        with self._lock:
+            if self._stopping:
+                raise QueueFullError("server is shutting down")
+            # Jobs only wait in the queue while every worker is busy
+            if self.max_queued == 0 and self._running() + self._pending.qsize() >= self.workers:
+                self.rejected += 1
+                raise QueueFullError("all workers are busy")
+            try:
+                self._pending.put_nowait(job)
+            except queue.Full:
+                self.rejected += 1
+                raise QueueFullError(f"{self._pending.qsize()} jobs are already waiting")
+            self._prune()
+            self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self.jobs.values())
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job
+        Returns:
+            ResearchJob or None: The job, None if it is unknown
+        """
+        job = self.get(job_id)
+        if job is None or job.done:
+            return job
+        with self._lock:
+            job.cancel_requested = True
+            session = job.session
+            if job.status == 'queued':
+                job.set_status('cancelled')
+        if session is not None:
+            session.cancel()
+        return job
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self.jobs.values()]
+            return {
+                'workers': self.workers,
+                'running': statuses.count('running'),
+                'queued': self._pending.qsize(),
+                'max_queued': self.max_queued,
+                'done': statuses.count('done'),
+                'failed': statuses.count('failed'),
+                'cancelled': statuses.count('cancelled'),
+                'rejected': self.rejected,
+                'llm_workers': self.summarization_pool.workers,
+            }
+
+    def _work(self):
+        while True:
+            job = self._pending.get()
+            if job is None:
+                # Leave the marker for sibling workers
+                self._pending.put(None)
+                return
+            with self._lock:
+                if job.cancel_requested:
+                    continue
+                job.set_status('running')
+            try:
+                asyncio.run(self._run(job))
+            except Exception as e:
+                traceback.print_exc()
+                job.set_status('failed', error=f"{type(e).__name__}: {e}")
+            print(f"[{job.status}] {job.id} in {job.to_dict()['seconds']:.1f}s: {job.intent}")
+
+    async def _run(self, job):
+        from noviq.research.api import ResearchSession
+        from noviq.research.research_manager import ResearchManager
+
+        manager = ResearchManager(
+            job.model, context=self._context(job.model), summarization_pool=self.summarization_pool,
+            lm=self.lm, llm_limiter=self.llm_limiter
+        )
+        session = ResearchSession(job.intent, qa_pairs=job.qa_pairs, manager=manager)
+        with self._lock:
+            job.session = session
+            if job.cancel_requested:
+                session.cancel()
+
+        async for event in session.events():
+            if event.type == 'report_chunk':
+                continue
+            data = event.to_dict()
+            if event.type == 'report_section':
+                data.pop('notes')   # Progress only; the notes end up in the report
+            if event.type == 'research_complete':
+                job.report = data.pop('report')
+            job.add_event(data)
+        job.set_status('cancelled' if session.cancelled else 'done')
+
+    def shutdown(self, wait=True):
+        """
+        Stop taking jobs, cancel the running ones and stop the workers
+        """
+        with self._lock:
+            self._stopping = True
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            if not job.done:
+                self.cancel(job.id)
+        # Queued jobs are cancelled; drop them so the end marker fits in the bounded queue
+        while True:
+            try:
+                self._pending.get_nowait()
+            except queue.Empty:
+                break
+        self._pending.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self.summarization_pool.shutdown(wait=wait)
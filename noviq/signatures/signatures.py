@@ -249,3 +249,23 @@ class GenerateWebpageSummary(dspy.Signature):
         The summary must be EXACTLY 7 sentences - no more, no less.
         """
     )
+
+
+class GenerateSectionNotes(dspy.Signature):
+    """Condense a batch of source material into dense, factual section notes for a later research report.
+    
+    Rules:
+    1. Keep every fact, number, date and named entity that is relevant to the user's intent
+    2. Group related facts under short markdown headings
+    3. Mention which source each fact came from (e.g. "Source 3")
+    4. Do not add facts that are not in the source material
+    5. Drop repetition, navigation text and anything off-topic
+    """
+
+    user_intent: str = dspy.InputField(description="The user's research topic the notes should serve.")
+    qa_pairs: list[tuple[str, str]] = dspy.InputField(description="Question-answer pairs that tell which aspects matter to the user.")
+    source_material: list[str] = dspy.InputField(description="A batch of labelled source texts or earlier notes to condense.")
+    section_notes: str = dspy.OutputField(
+        description="""Markdown notes covering everything relevant in the batch, organized under headings,
+        with source labels kept next to the facts they support."""
+    )
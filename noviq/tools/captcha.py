@@ -0,0 +1,193 @@
+import os
+import sys
+import threading
+import time
+import webbrowser
+from contextlib import contextmanager
+
+# Comma-separated actions tried in order when a search engine serves a CAPTCHA:
+#   reroute      run the query on another configured engine
+#   defer        hand the query back to the pipeline, which retries it after CAPTCHA_COOLDOWN
+#                (only inside CaptchaHandler.deferrable(); elsewhere the next action is tried)
+#   interactive  open the page in a browser and wait for Enter (only with a terminal attached)
+#   skip         give up on the query
+# NOVIQ_CAPTCHA_POLICY overrides the default, which depends on how noviq runs (see captcha_policy())
+INTERACTIVE_CAPTCHA_POLICY = 'reroute,interactive,defer'
+HEADLESS_CAPTCHA_POLICY = 'reroute,defer'
+CAPTCHA_COOLDOWN = float(os.environ.get('NOVIQ_CAPTCHA_COOLDOWN', 30))  # Seconds before a deferred query is retried
+CAPTCHA_ACTIONS = ('reroute', 'defer', 'interactive', 'skip')
+
+
+class CaptchaError(Exception):
+    """Raised by a search engine that served a CAPTCHA when the caller handles it itself"""
+
+
+def captcha_policy():
+    """
+    Returns:
+        str: NOVIQ_CAPTCHA_POLICY if set; otherwise the interactive policy when stdin is a terminal
+            and the headless one when it is not. Batch, server and cluster commands set
+            NOVIQ_CAPTCHA_POLICY to the headless policy even when started from a terminal.
+    """
+    policy = os.environ.get('NOVIQ_CAPTCHA_POLICY')
+    if policy:
+        return policy
+    return INTERACTIVE_CAPTCHA_POLICY if sys.stdin and sys.stdin.isatty() else HEADLESS_CAPTCHA_POLICY
+
+
+def parse_policy(policy=None):
+    """
+    Args:
+        policy (str): Comma-separated actions, defaults to captcha_policy()
+    Returns:
+        list[str]: Actions of a "reroute,defer"-style policy, in order
+    """
+    if policy is None:
+        policy = captcha_policy()
+    actions = [action.strip() for action in policy.split(',') if action.strip()]
+    unknown = [action for action in actions if action not in CAPTCHA_ACTIONS]
+    if unknown:
+        raise ValueError(f"Unknown CAPTCHA action: {', '.join(unknown)}. Choose from {', '.join(CAPTCHA_ACTIONS)}.")
+    return actions
+
+
+class CaptchaHandler:
+    """
+    Decides what happens to a search query that hit a CAPTCHA without stopping the run.
+    The policy's actions are tried in order until one produces an outcome: results from
+    another engine, a deferral the pipeline picks up later, or an empty result. Interactive
+    solving is only used with a terminal, and batch, server and cluster runs leave it out of
+    their policy, so they never wait on input().
+    """
+
+    def __init__(self, policy=None, cooldown=CAPTCHA_COOLDOWN):
+        self.actions = parse_policy(policy)
+        self.cooldown = cooldown
+        self.counts = {'captchas': 0, 'rerouted': 0, 'deferred': 0, 'recovered': 0, 'interactive': 0, 'skipped': 0}
+        self._deferred = {}     # (owner, query) -> time.monotonic() when it may be retried
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._prompt_lock = threading.Lock()  # One browser prompt at a time
+
+    def count(self, outcome, amount=1):
+        with self._lock:
+            self.counts[outcome] += amount
+
+    def handle(self, engine, query, url, retry, use_cache=True):
+        """
+        Apply the policy to a query whose search came back as a CAPTCHA
+        Args:
+            engine (str): Engine that served the CAPTCHA
+            url (str): Search page to open for interactive solving
+            retry (callable): Re-runs the original search; returns results or None on another CAPTCHA
+        Returns:
+            list[tuple[str, str]]: (title, URL) results, empty when the query was deferred or skipped
+        """
+        self.count('captchas')
+        for action in self.actions:
+            if action == 'reroute':
+                results = self._reroute(engine, query, use_cache)
+                if results:
+                    self.count('rerouted')
+                    print(f"⚠️  {engine} served a CAPTCHA; rerouted '{query}' to another engine")
+                    return results
+            elif action == 'defer':
+                owner = getattr(self._local, 'owner', None)
+                if owner is None:
+                    continue  # Nobody on this thread would retry it
+                with self._lock:
+                    self._deferred[(owner, query)] = time.monotonic() + self.cooldown
+                self.count('deferred')
+                print(f"⚠️  {engine} served a CAPTCHA; deferring '{query}' for {self.cooldown:.0f}s")
+                return []
+            elif action == 'interactive':
+                if not sys.stdin or not sys.stdin.isatty():
+                    continue
+                results = self._interactive(url, retry)
+                if results is not None:
+                    self.count('interactive')
+                    return results
+            elif action == 'skip':
+                break
+        self.count('skipped')
+        print(f"⚠️  {engine} served a CAPTCHA; skipping '{query}'")
+        return []
+
+    def _reroute(self, engine, query, use_cache):
+        from noviq.tools.federated import ENGINES, available_engines
+        for name in available_engines(','.join(ENGINES)):
+            if name == engine:
+                continue
+            try:
+                results = ENGINES[name][0](query, use_cache)
+            except Exception as e:
+                print(f"Error with {name} search: {e}")
+                continue
+            if results:
+                return results
+        return None
+
+    @contextmanager
+    def deferrable(self, owner):
+        """
+        Searches run on this thread inside the block may be deferred to owner, which collects
+        them with take_deferred(). Keying deferrals by owner keeps concurrent runs that issue
+        the same query from taking each other's.
+        """
+        previous = getattr(self._local, 'owner', None)
+        self._local.owner = owner
+        try:
+            yield
+        finally:
+            self._local.owner = previous
+
+    def take_deferred(self, owner, query):
+        """
+        Claim the deferral of a query that just returned no results
+        Returns:
+            float or None: time.monotonic() after which to retry it, None if it was not deferred
+        """
+        with self._lock:
+            return self._deferred.pop((owner, query), None)
+
+    def _interactive(self, url, retry):
+        with self._prompt_lock:
+            print(f"\n⚠️  DuckDuckGo is showing a CAPTCHA puzzle. Trying once to solve it manually.")
+            print(f"Opening {url} in your browser. Please solve the puzzle and press Enter when done.")
+            webbrowser.open(url)
+            user_input = input("Press Enter after solving the CAPTCHA puzzle or type 'skip' to skip: ")
+            if user_input.lower() == 'skip':
+                return None
+            print("Retrying search...")
+            time.sleep(2)  # Short delay before retry
+            results = retry()
+            if results is None:
+                print("Still getting CAPTCHA.")
+            return results
+
+    def report(self):
+        """
+        Print how CAPTCHAs were dealt with
+        """
+        with self._lock:
+            counts = dict(self.counts)
+        if not counts['captchas']:
+            return
+        print(f"CAPTCHAs: {counts['captchas']} (rerouted {counts['rerouted']}, deferred {counts['deferred']}, "
+              f"recovered after deferral {counts['recovered']}, solved interactively {counts['interactive']}, "
+              f"skipped {counts['skipped']})")
+
+
+_captcha_handler = None
+_captcha_handler_lock = threading.Lock()
+
+
+def get_captcha_handler():
+    """
+    Returns the process-wide CaptchaHandler
+    """
+    global _captcha_handler
+    with _captcha_handler_lock:
+        if _captcha_handler is None:
+            _captcha_handler = CaptchaHandler()
+        return _captcha_handler
@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from noviq.cache.search_cache import get_search_cache
+from noviq.scrape.transport import get_transport
+from noviq.tools.tracing import get_tracer
+from noviq.tools.urls import normalize_url
+
+FEDERATED_ENGINES = os.environ.get('NOVIQ_FEDERATED_ENGINES', 'duckduckgo,google,searx')  # Used when configured
+ENGINE_TIMEOUT = float(os.environ.get('NOVIQ_ENGINE_TIMEOUT', 5))   # Seconds to wait for engines before returning what arrived
+SEARCH_QUORUM = int(os.environ.get('NOVIQ_SEARCH_QUORUM', 2))      # Engines that must answer before results are returned
+SEARX_URL = os.environ.get('NOVIQ_SEARX_URL')                      # SearxNG-style JSON endpoint, e.g. http://localhost:8888
+RRF_K = 60              # Reciprocal rank fusion constant; damps the weight of any single engine's top ranks
+FUSED_RESULTS = 10      # Results returned after fusion
+ENGINE_RESULTS = 5      # Results requested from each engine
+
+
+def get_searx_search_results(search_query, use_cache=True, base_url=None) -> list[tuple[str, str]]:
+    """
+    Get search results from a SearxNG-compatible instance (GET /search?q=...&format=json)
+    Returns a list of (title, URL) tuples
+    """
+    base_url = base_url or SEARX_URL
+    cache = get_search_cache() if use_cache else None
+    if cache:
+        cached = cache.get('searx', search_query)
+        if cached is not None:
+            return cached
+    response = get_transport().get(f"{base_url.rstrip('/')}/search", params={'q': search_query, 'format': 'json'},
+                                   deadline=ENGINE_TIMEOUT)
+    response.raise_for_status()
+    results = [(item.get('title', ''), item['url']) for item in response.json().get('results', []) if item.get('url')]
+    results = results[:ENGINE_RESULTS]
+    if cache:
+        cache.put('searx', search_query, results)
+    return results
+
+
+def _duckduckgo(search_query, use_cache):
+    from noviq.tools.tools import get_duckduckgo_search_results
+    # The other engines already cover for a CAPTCHA; it only counts as this engine's error
+    return get_duckduckgo_search_results(search_query, use_cache=use_cache, handle_captcha=False)
+
+
+def _google(search_query, use_cache):
+    from noviq.scrape.scrape import GoogleSearchScrape
+    return GoogleSearchScrape().search(search_query, num_results=ENGINE_RESULTS, use_cache=use_cache)
+
+
+def _searx(search_query, use_cache):
+    return get_searx_search_results(search_query, use_cache=use_cache)
+
+
+# Engine name -> (search function, whether it is configured)
+ENGINES = {
+    'duckduckgo': (_duckduckgo, lambda: True),
+    'google': (_google, lambda: bool(os.environ.get('GOOGLE_API_KEY') and os.environ.get('GOOGLE_CSE_ID'))),
+    'searx': (_searx, lambda: bool(SEARX_URL)),
+}
+
+
+def available_engines(names=None):
+    """
+    Returns the configured engines among a comma-separated list, in list order
+    """
+    names = [name.strip() for name in (names or FEDERATED_ENGINES).split(',') if name.strip()]
+    unknown = [name for name in names if name not in ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown search engine: {', '.join(unknown)}. Choose from {', '.join(ENGINES)}.")
+    return [name for name in names if ENGINES[name][1]()]
+
+
+def reciprocal_rank_fusion(result_lists, k=RRF_K):
+    """
+    Merge ranked result lists: each URL scores sum(1 / (k + rank)) over the lists it appears in
+    Args:
+        result_lists (list): Lists of (title, url) tuples, best first
+    Returns:
+        list[tuple[str, str]]: (title, url) best first, one per normalized URL
+    """
+    scores = {}
+    titles = {}
+    for results in result_lists:
+        for rank, (title, url) in enumerate(results, 1):
+            key = normalize_url(url)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            titles.setdefault(key, (title, url))
+    # sorted() is stable, so ties keep the order of the first engine that returned them
+    return [titles[key] for key in sorted(scores, key=lambda key: -scores[key])]
+
+
+class FederatedSearch:
+    """
+    Queries every configured engine at once and fuses their rankings.
+    Returns as soon as `quorum` engines have answered, or when the timeout runs out with
+    whatever has arrived, so one slow or failing engine no longer adds its latency to every
+    search. Engines still running keep going in the background and fill the search cache.
+    """
+
+    def __init__(self, engines=None, timeout=ENGINE_TIMEOUT, quorum=SEARCH_QUORUM, max_workers=8):
+        """
+        Args:
+            engines (list[str]): Engine names, the configured ones of NOVIQ_FEDERATED_ENGINES by default
+            timeout (float): Seconds to wait for the quorum
+            quorum (int): Successful engine answers needed before returning, capped at the engine count
+        """
+        self.engines = engines or available_engines()
+        self.timeout = timeout
+        self.quorum = max(1, min(quorum, len(self.engines)))
+        self.stats = {name: {'answers': 0, 'errors': 0, 'late': 0, 'seconds': 0.0} for name in self.engines}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='noviq-search')
+        self._lock = threading.Lock()
+
+    def _run_engine(self, name, search_query, use_cache):
+        started = time.perf_counter()
+        try:
+            results = ENGINES[name][0](search_query, use_cache)
+        except Exception:
+            with self._lock:
+                self.stats[name]['errors'] += 1
+            raise
+        with self._lock:
+            self.stats[name]['answers'] += 1
+            self.stats[name]['seconds'] += time.perf_counter() - started
+        return results
+
+    def search(self, search_query, use_cache=True) -> list[tuple[str, str]]:
+        """
+        Returns a list of (title, URL) tuples fused across the engines that answered in time
+        """
+        futures = {self._executor.submit(self._run_engine, name, search_query, use_cache): name for name in self.engines}
+        deadline = time.perf_counter() + self.timeout
+        answered = {}
+        pending = set(futures)
+        with get_tracer().span('search.federated', 'io', engines=len(futures)) as span:
+            while pending and len(answered) < self.quorum:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = futures[future]
+                    try:
+                        answered[name] = future.result()
+                    except Exception as e:
+                        print(f"Error with {name} search: {e}")
+            # Anything that finished alongside the quorum is free to use
+            for future in [future for future in pending if future.done()]:
+                pending.discard(future)
+                if future.exception() is None:
+                    answered[futures[future]] = future.result()
+            with self._lock:
+                for future in pending:
+                    self.stats[futures[future]]['late'] += 1
+
+            # Fuse in engine list order so ties favour the engines listed first
+            results = reciprocal_rank_fusion([answered[name] for name in self.engines if name in answered])[:FUSED_RESULTS]
+            span.set(answered=','.join(name for name in self.engines if name in answered), late=len(pending), results=len(results))
+        return results
+
+    def report(self):
+        """
+        Print how each engine answered
+        """
+        with self._lock:
+            stats = {name: dict(values) for name, values in self.stats.items()}
+        print(f"\n--- Federated Search ---")
+        for name, values in stats.items():
+            average = values['seconds'] / values['answers'] if values['answers'] else 0.0
+            print(f"{name:<11} answered {values['answers']}, errors {values['errors']}, "
+                  f"missed quorum {values['late']}, avg {average:.2f}s")
+        print(f"-------------------------")
+
+
+_federated_search = None
+_federated_search_lock = threading.Lock()
+
+
+def get_federated_search():
+    """
+    Returns the process-wide FederatedSearch
+    """
+    global _federated_search
+    with _federated_search_lock:
+        if _federated_search is None:
+            _federated_search = FederatedSearch()
+        return _federated_search
@@ -1,79 +1,75 @@
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import quote
-import webbrowser
-import time
+import os
 from noviq.scrape.scrape import GoogleSearchScrape, get_search_engine
+from noviq.cache.search_cache import get_search_cache
+from noviq.scrape.politeness import get_politeness
+from noviq.scrape.transport import get_transport
+from noviq.tools.captcha import CaptchaError, get_captcha_handler
+from noviq.tools.tracing import get_tracer
 
+DUCKDUCKGO_URL = os.environ.get('NOVIQ_DDG_URL', 'https://html.duckduckgo.com/html/')  # Override to point at a mirror or a local fixture server
 
-def get_search_queries(search_query) -> list[tuple[str, str]]:
+
+def get_search_queries(search_query, use_cache=True) -> list[tuple[str, str]]:
     """
-    Get search results for a query using either DuckDuckGo or Google based on SEARCH_ENGINE env var
+    Get search results for a query using DuckDuckGo, Google or every configured engine at once
+    (federated) based on SEARCH_ENGINE env var
+    Pass use_cache=False to skip the search result cache and get fresh results
     Returns a list of (title, URL) tuples
     """
     search_engine = get_search_engine()
     
-    if search_engine == 'google':
-        return get_google_search_results(search_query)
-    else:
-        return get_duckduckgo_search_results(search_query)
+    with get_tracer().span('search', 'io', engine=search_engine, query=search_query) as span:
+        if search_engine == 'federated':
+            from noviq.tools.federated import get_federated_search
+            results = get_federated_search().search(search_query, use_cache=use_cache)
+        elif search_engine == 'google':
+            results = get_google_search_results(search_query, use_cache=use_cache)
+        else:
+            results = get_duckduckgo_search_results(search_query, use_cache=use_cache)
+        span.set(results=len(results))
+        return results
 
 
-def get_google_search_results(search_query, num_results=5) -> list[tuple[str, str]]:
+def get_google_search_results(search_query, num_results=5, use_cache=True) -> list[tuple[str, str]]:
     """
     Get search results using Google Custom Search API
     Returns a list of (title, URL) tuples
     """
     try:
         google_search = GoogleSearchScrape()
-        results = google_search.search(search_query, num_results=num_results)
+        results = google_search.search(search_query, num_results=num_results, use_cache=use_cache)
         return results
     except Exception as e:
         print(f"Error with Google search: {e}")
         print("Falling back to DuckDuckGo...")
-        return get_duckduckgo_search_results(search_query)
+        return get_duckduckgo_search_results(search_query, use_cache=use_cache)
+
+
+def _is_captcha(response):
+    return response.status_code == 403 or "Please solve this CAPTCHA" in response.text
 
 
-def get_duckduckgo_search_results(search_query) -> list[tuple[str, str]]:
+def get_duckduckgo_search_results(search_query, use_cache=True, handle_captcha=True) -> list[tuple[str, str]]:
     """
     Get search results using DuckDuckGo
+    A CAPTCHA is handed to the CaptchaHandler (NOVIQ_CAPTCHA_POLICY), which reroutes, defers or
+    skips the query instead of waiting for someone to solve it
+    Pass handle_captcha=False to get a CaptchaError instead
     Returns a list of (title, URL) tuples
     """
+    cache = get_search_cache() if use_cache else None
+    if cache:
+        cached = cache.get('duckduckgo', search_query)
+        if cached is not None:
+            return cached
+    
     # DuckDuckGo HTML search
-    url = f"https://html.duckduckgo.com/html/?q={quote(search_query)}"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    url = f"{DUCKDUCKGO_URL}?q={quote(search_query)}"
+    transport = get_transport()
     
-    try:
-        response = requests.get(url, headers=headers)
-        
-        # Check if we got a 403 Forbidden error (CAPTCHA puzzle)
-        if response.status_code == 403 or "Please solve this CAPTCHA" in response.text:
-            print(f"\n⚠️  DuckDuckGo is showing a CAPTCHA puzzle. Trying once to solve it manually.")
-            
-            # Open the URL in the default browser for user to solve
-            print(f"Opening {url} in your browser. Please solve the puzzle and press Enter when done.")
-            webbrowser.open(url)
-            
-            # Wait for user to solve the CAPTCHA or skip
-            user_input = input("Press Enter after solving the CAPTCHA puzzle or type 'skip' to skip: ")
-            
-            if user_input.lower() == 'skip':
-                print("Skipping this search query.")
-                return []
-            
-            # Try the request again
-            print("Retrying search...")
-            time.sleep(2)  # Short delay before retry
-            response = requests.get(url, headers=headers)
-            
-            # If still getting CAPTCHA, skip
-            if response.status_code == 403 or "Please solve this CAPTCHA" in response.text:
-                print("Still getting CAPTCHA. Skipping this search query.")
-                return []
-        
-        # Continue with the regular flow
+    def parse(response):
         response.raise_for_status()
         soup = BeautifulSoup(response.text, 'html.parser')
         
@@ -87,8 +83,28 @@ def get_duckduckgo_search_results(search_query) -> list[tuple[str, str]]:
                 if link:
                     results.append((title, link))
         
+        if cache:
+            cache.put('duckduckgo', search_query, results)
         return results
+    
+    def retry():
+        response = transport.get(url)
+        return None if _is_captcha(response) else parse(response)
+    
+    try:
+        response = transport.get(url)
+        
+        if _is_captcha(response):
+            if response.status_code != 403:
+                # The transport already slowed DuckDuckGo down for a 403; a CAPTCHA page comes back as 200
+                get_politeness().penalize(url)
+            if not handle_captcha:
+                raise CaptchaError("DuckDuckGo served a CAPTCHA")
+            return get_captcha_handler().handle('duckduckgo', search_query, url, retry, use_cache=use_cache)
+        
+        return parse(response)
+    except CaptchaError:
+        raise
     except Exception as e:
         print(f"Error fetching search results: {e}")
         return []
-    
\ No newline at end of file
@@ -0,0 +1,254 @@
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+TRACE_PATH = os.environ.get('NOVIQ_TRACE')  # Export path; .json writes a Chrome trace, anything else JSON lines
+PROFILE_SPANS = [name.strip() for name in os.environ.get('NOVIQ_PROFILE', '').split(',') if name.strip()]  # Span names or categories to cProfile
+TRACE_MEMORY = os.environ.get('NOVIQ_TRACE_MEMORY', '0').lower() in ('1', 'true', 'on', 'yes')  # Record tracemalloc deltas per span
+TRACE_MAX_SPANS = int(os.environ.get('NOVIQ_TRACE_MAX_SPANS', 100000))  # Finished spans kept for export; older ones are dropped
+SUMMARY_SAMPLES = 1000  # Recent durations per span name the p95 is computed from
+
+
+class Span:
+    """
+    One timed unit of work. Attributes set while it runs end up in the exported trace.
+    """
+
+    __slots__ = ('name', 'category', 'start', 'end', 'thread_id', 'thread_name', 'attrs')
+
+    def __init__(self, name, category, attrs):
+        thread = threading.current_thread()
+        self.name = name
+        self.category = category
+        self.start = time.perf_counter()
+        self.end = None
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+
+class _NullSpan:
+    """Handed out while tracing is off so instrumented code does not need to check"""
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Collects spans around noviq's stages: search, fetch, http, extract, every LLM signature
+    call and report assembly. Off by default, in which case span() costs one attribute check.
+    Spans whose name or category is listed in profile also run under cProfile, with the
+    stats accumulated per span name; with trace_memory each span records its tracemalloc delta.
+    Only the last max_spans finished spans are kept for export, so long-lived serve and worker
+    processes do not grow without bound; the summary counts every span.
+    """
+
+    def __init__(self, enabled=False, profile=(), trace_memory=False, max_spans=TRACE_MAX_SPANS):
+        self.enabled = False
+        self.profile = set()
+        self.trace_memory = False
+        self.spans = deque(maxlen=max_spans)
+        self.dropped = 0        # Finished spans pushed out of the export buffer
+        self._stats = {}        # span name -> [count, total seconds, max seconds, recent durations]
+        self._tokens = [0, 0, 0.0]  # prompt tokens, completion tokens, LLM seconds
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        if enabled or profile or trace_memory:
+            self.enable(profile=profile, trace_memory=trace_memory)
+
+    def enable(self, profile=(), trace_memory=False):
+        self.enabled = True
+        self.profile.update(profile)
+        if trace_memory:
+            self.trace_memory = True
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    @contextmanager
+    def span(self, name, category='noviq', **attrs):
+        """
+        Time the enclosed block
+            with get_tracer().span('fetch', 'io', url=url) as span:
+                ...
+                span.set(bytes=len(body))
+        """
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+
+        span = Span(name, category, attrs)
+        profiler = None
+        if name in self.profile or category in self.profile:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                profiler = None  # A profiled span is already running on this thread
+        memory_before = tracemalloc.get_traced_memory()[0] if self.trace_memory else None
+
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs['error'] = type(e).__name__
+            raise
+        finally:
+            span.end = time.perf_counter()
+            if profiler is not None:
+                profiler.disable()
+                self._add_profile(name, profiler)
+            if memory_before is not None:
+                span.attrs['memory_delta_kb'] = (tracemalloc.get_traced_memory()[0] - memory_before) // 1024
+            self._finish(span)
+
+    def _finish(self, span):
+        duration = span.end - span.start
+        with self._lock:
+            if len(self.spans) == self.spans.maxlen:
+                self.dropped += 1
+            self.spans.append(span)
+            stats = self._stats.get(span.name)
+            if stats is None:
+                stats = self._stats[span.name] = [0, 0.0, 0.0, deque(maxlen=SUMMARY_SAMPLES)]
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+            stats[3].append(duration)
+            if 'completion_tokens' in span.attrs:
+                self._tokens[0] += span.attrs.get('prompt_tokens', 0)
+                self._tokens[1] += span.attrs['completion_tokens']
+                self._tokens[2] += span.attrs.get('llm_seconds', 0)
+
+    def _add_profile(self, name, profiler):
+        with self._lock:
+            if name in self._profiles:
+                self._profiles[name].add(profiler)
+            else:
+                self._profiles[name] = pstats.Stats(profiler)
+
+    def _snapshot(self):
+        with self._lock:
+            return list(self.spans)
+
+    def export_jsonl(self, path):
+        with open(path, 'w') as f:
+            for span in self._snapshot():
+                f.write(json.dumps({
+                    'name': span.name,
+                    'category': span.category,
+                    'start_ms': round((span.start - self._origin) * 1000, 3),
+                    'duration_ms': round(span.duration * 1000, 3),
+                    'thread': span.thread_name,
+                    'attrs': span.attrs,
+                }, default=str) + '\n')
+
+    def export_chrome(self, path):
+        """
+        Write a trace loadable in chrome://tracing or Perfetto
+        """
+        pid = os.getpid()
+        events = []
+        threads = {}
+        for span in self._snapshot():
+            threads[span.thread_id] = span.thread_name
+            events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': round((span.start - self._origin) * 1e6, 1),
+                'dur': round(span.duration * 1e6, 1),
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': span.attrs,
+            })
+        for thread_id, thread_name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id, 'args': {'name': thread_name}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+
+    def export(self, path):
+        """
+        Export to Chrome trace format for .json paths and JSON lines otherwise.
+        cProfile stats are written next to it as <path>.<span>.prof.
+        """
+        if self.dropped:
+            print(f"⚠️  Trace holds the last {len(self.spans)} spans; {self.dropped} older ones were dropped "
+                  f"(raise NOVIQ_TRACE_MAX_SPANS to keep more)")
+        if path.endswith('.json'):
+            self.export_chrome(path)
+        else:
+            self.export_jsonl(path)
+        with self._lock:
+            profiles = dict(self._profiles)
+        for name, stats in profiles.items():
+            stats.dump_stats(f"{path}.{name}.prof")
+        return path
+
+    def summary(self):
+        """
+        Returns:
+            dict: span name -> {'count', 'total_seconds', 'avg_seconds', 'p95_seconds', 'max_seconds'};
+                p95 is over the last SUMMARY_SAMPLES spans of each name
+        """
+        with self._lock:
+            stats = {name: (count, total, longest, sorted(recent)) for name, (count, total, longest, recent) in self._stats.items()}
+        summary = {}
+        for name, (count, total, longest, recent) in stats.items():
+            summary[name] = {
+                'count': count,
+                'total_seconds': total,
+                'avg_seconds': total / count,
+                'p95_seconds': recent[min(len(recent) - 1, int(0.95 * len(recent)))],
+                'max_seconds': longest,
+            }
+        return summary
+
+    def report(self):
+        """
+        Print per-span totals, slowest first
+        """
+        summary = self.summary()
+        if not summary:
+            return
+        print(f"\n--- Trace Summary ---")
+        for name, stats in sorted(summary.items(), key=lambda item: -item[1]['total_seconds']):
+            print(f"{name:<36} {stats['count']:>5}x total {stats['total_seconds']:>8.3f}s "
+                  f"avg {stats['avg_seconds'] * 1000:>8.1f}ms p95 {stats['p95_seconds'] * 1000:>8.1f}ms")
+        with self._lock:
+            prompt_tokens, completion_tokens, llm_seconds = self._tokens
+        if completion_tokens:
+            rate = completion_tokens / llm_seconds if llm_seconds else 0.0
+            print(f"LLM tokens: {prompt_tokens} prompt, {completion_tokens} completion ({rate:.1f} completion tokens/sec)")
+        print(f"-------------------------")
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """
+    Returns the process-wide Tracer, enabled when NOVIQ_TRACE, NOVIQ_PROFILE or NOVIQ_TRACE_MEMORY is set
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(enabled=bool(TRACE_PATH), profile=PROFILE_SPANS, trace_memory=TRACE_MEMORY)
+        return _tracer
@@ -0,0 +1,37 @@
+from urllib.parse import urlparse, urldefrag
+
+
+def normalize_url(url):
+    """
+    Normalize a URL to help prevent duplicate processing of the same content
+    Removes fragments and normalizes the domain
+    """
+    # Remove URL fragments
+    url_without_fragment = urldefrag(url)[0]
+
+    # Parse the URL
+    parsed = urlparse(url_without_fragment)
+
+    # Normalize the domain (remove www. if present)
+    netloc = parsed.netloc
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+
+    # Reconstruct the URL with normalized domain
+    normalized_url = f"{parsed.scheme}://{netloc}{parsed.path}"
+
+    # Add query parameters if they exist
+    if parsed.query:
+        normalized_url += f"?{parsed.query}"
+
+    return normalized_url
+
+
+def get_host(url):
+    """
+    Returns the lowercase host of a URL without the www. prefix, used as the key for per-host limits
+    """
+    netloc = urlparse(url).netloc.lower()
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+    return netloc
@@ -0,0 +1,221 @@
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from noviq.ui.terminal_ui import Colors
+
+UI_MODE = os.environ.get('NOVIQ_UI', 'auto')  # auto, live, fast or plain
+UI_MODES = ('auto', 'live', 'fast', 'plain')
+REFRESH_INTERVAL = 0.1  # Seconds between redraws of the live task block
+SPINNER = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+
+_ANSI = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+
+
+def resolve_mode(mode=UI_MODE, stream=None):
+    """
+    Resolve 'auto' to 'live' on a terminal and 'plain' otherwise
+    """
+    if mode not in UI_MODES:
+        raise ValueError(f"Unknown UI mode: {mode}. Choose from {', '.join(UI_MODES)}.")
+    if mode != 'auto':
+        return mode
+    stream = stream or sys.stdout
+    return 'live' if hasattr(stream, 'isatty') and stream.isatty() else 'plain'
+
+
+class _Task:
+    __slots__ = ('label', 'started')
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.perf_counter()
+
+
+class _CapturedOutput:
+    """
+    sys.stdout stand-in that routes complete lines through the renderer,
+    so prints from anywhere land above the live task block instead of inside it
+    """
+
+    def __init__(self, renderer):
+        self._renderer = renderer
+        self._partial = ''
+
+    def write(self, text):
+        self._partial += text
+        *lines, self._partial = self._partial.split('\n')
+        for line in lines:
+            self._renderer.log(line)
+        return len(text)
+
+    def flush(self):
+        # A prompt without a newline (input(), CAPTCHA questions) must be visible right away
+        if self._partial:
+            self._renderer.log(self._partial, end='')
+            self._partial = ''
+
+    def isatty(self):
+        return self._renderer.stream.isatty()
+
+
+class ProgressRenderer:
+    """
+    One render loop for every task in flight, fed only by real events.
+    Tasks can be started and finished from any thread. In live mode a single background
+    thread redraws one spinner line per running task below the scrolling log; fast mode
+    prints one colored line as each task finishes; plain mode (the default when stdout is
+    not a terminal) prints uncolored start and finish lines suitable for logs. Colour is a
+    property of the renderer, so plain output strips it without touching Colors.
+    Nothing here sleeps on the caller's thread, so presentation never adds wall-clock time.
+    """
+
+    def __init__(self, mode=UI_MODE, stream=None):
+        self.stream = stream or sys.stdout
+        self.mode = resolve_mode(mode, self.stream)
+        self.color = self.mode != 'plain'
+        self._tasks = {}
+        self._drawn = 0         # Lines of the live block currently on screen
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._next_key = 0
+
+    @property
+    def live(self):
+        return self.mode == 'live'
+
+    def _text(self, text):
+        return text if self.color else _ANSI.sub('', text)
+
+    # Live block
+
+    def _clear_block(self):
+        if self._drawn:
+            self.stream.write(f"\033[{self._drawn}F\033[J")
+            self._drawn = 0
+
+    def _draw_block(self):
+        width = max(20, shutil.get_terminal_size().columns - 1)
+        frame = SPINNER[int(time.perf_counter() / REFRESH_INTERVAL) % len(SPINNER)]
+        now = time.perf_counter()
+        for task in self._tasks.values():
+            line = f"{frame} {task.label} ({now - task.started:.1f}s)"
+            self.stream.write(f"{Colors.CYAN}{line[:width]}{Colors.RESET}\n")
+        self._drawn = len(self._tasks)
+        self.stream.flush()
+
+    def _render_loop(self):
+        while not self._stop.wait(REFRESH_INTERVAL):
+            with self._lock:
+                if self._tasks or self._drawn:
+                    self._clear_block()
+                    self._draw_block()
+
+    def _ensure_thread(self):
+        if self.live and self._thread is None:
+            self._thread = threading.Thread(target=self._render_loop, name='noviq-renderer', daemon=True)
+            self._thread.start()
+
+    # Public API
+
+    def log(self, text='', end='\n'):
+        """
+        Print a line above the live block
+        """
+        with self._lock:
+            if self.live:
+                self._clear_block()
+            self.stream.write(self._text(text) + end)
+            if self.live and end:
+                self._draw_block()
+            else:
+                self.stream.flush()
+
+    def start(self, label, key=None):
+        """
+        Show a running task
+        Returns:
+            The task key to pass to update() and finish()
+        """
+        with self._lock:
+            if key is None:
+                key = self._next_key
+                self._next_key += 1
+            self._tasks[key] = _Task(label)
+            if self.mode == 'plain':
+                self.stream.write(f"... {self._text(label)}\n")
+                self.stream.flush()
+            self._ensure_thread()
+        return key
+
+    def update(self, key, label):
+        with self._lock:
+            if key in self._tasks:
+                self._tasks[key].label = label
+
+    def finish(self, key, message=None, ok=True):
+        """
+        Remove a task from the live block and log its outcome
+        """
+        with self._lock:
+            task = self._tasks.pop(key, None)
+            if task is None:
+                return
+            elapsed = time.perf_counter() - task.started
+            mark, color = ('✓', Colors.GREEN) if ok else ('✗', Colors.BRIGHT_RED)
+            self.log(f"{color}{mark} {message or task.label} ({elapsed:.1f}s){Colors.RESET}")
+
+    def finish_all(self, message='skipped'):
+        """
+        Close every task still shown, e.g. queries left over once enough sources were found
+        """
+        with self._lock:
+            for key in list(self._tasks):
+                self.finish(key, f"{self._tasks[key].label}: {message}", ok=False)
+
+    @contextmanager
+    def task(self, label):
+        """
+        Show a task while the block runs
+            with renderer.task("Creating a research plan"):
+                ...
+        """
+        key = self.start(label)
+        try:
+            yield key
+        except BaseException:
+            self.finish(key, ok=False)
+            raise
+        self.finish(key)
+
+    @contextmanager
+    def capture_output(self):
+        """
+        Route print() through the renderer, above the live block in live mode and with colour
+        codes stripped in plain mode; nested uses share the outer capture
+        """
+        if (self.color and not self.live) or getattr(sys.stdout, '_renderer', None) is self:
+            yield
+            return
+        original = sys.stdout
+        sys.stdout = _CapturedOutput(self)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            sys.stdout = original
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            if self.live:
+                self._clear_block()
+            self.stream.flush()
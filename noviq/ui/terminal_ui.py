@@ -1,7 +1,6 @@
 import sys
 import time
 import os
-from threading import Thread
 import shutil
 
 terminal_width = shutil.get_terminal_size().columns
@@ -44,8 +43,12 @@ class Colors:
 
 class TerminalUI:
     @staticmethod
-    def animate_typing(text, delay=0.01, color=Colors.CYAN):
-        """Type-writer animation effect for text"""
+    def animate_typing(text, delay=0, color=None):
+        """Type-writer animation effect for text; instant unless a per-character delay is given"""
+        color = Colors.CYAN if color is None else color
+        if not delay:
+            print(f"{color}{text}{Colors.RESET}")
+            return
         for char in text:
             sys.stdout.write(f"{color}{char}{Colors.RESET}")
             sys.stdout.flush()
@@ -91,27 +94,6 @@ class TerminalUI:
         """Print a step in a process"""
         print(f"{Colors.BOLD}[{step_num}/{total_steps}]{Colors.RESET} {Colors.YELLOW}🔍 {text}{Colors.RESET}")
     
-    @staticmethod
-    def loading_animation(message, stop_event):
-        """Display a loading animation until stop_event is set"""
-        animation = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"  # Braille spinner characters
-        idx = 0
-        while not stop_event.is_set():
-            sys.stdout.write(f"\r{Colors.CYAN}{message} {animation[idx % len(animation)]}{Colors.RESET}")
-            sys.stdout.flush()
-            idx += 1
-            time.sleep(0.1)
-        sys.stdout.write(f"\r{Colors.GREEN}{message} ✓{Colors.RESET}" + " " * 10 + "\n")
-        sys.stdout.flush()
-    
-    @staticmethod
-    def start_loading_animation(message, stop_event):
-        """Start a loading animation in a separate thread"""
-        thread = Thread(target=TerminalUI.loading_animation, args=(message, stop_event))
-        thread.daemon = True
-        thread.start()
-        return thread
-    
     @staticmethod
     def print_research_query(query):
         """Print a research query in a box"""
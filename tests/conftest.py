@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """
+    Point noviq's on-disk caches, checkpoints and indexes at a per-test directory
+    """
+    path = tmp_path / 'cache'
+    monkeypatch.setenv('NOVIQ_CACHE_DIR', str(path))
+    return path
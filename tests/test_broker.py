@@ -0,0 +1,115 @@
+import time
+
+import pytest
+
+from noviq.distributed.broker import Broker, SQLiteBroker, get_broker
+
+
+@pytest.fixture
+def broker(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / 'queue.sqlite'))
+    yield broker
+    broker.close()
+
+
+def _expire(broker, task_id):
+    broker._transaction(lambda db: db.execute("UPDATE jobs SET lease_expires = ? WHERE id = ?", (time.time() - 1, task_id)))
+
+
+def test_broker_is_abstract():
+    with pytest.raises(TypeError):
+        Broker()
+
+
+def test_jobs_are_leased_oldest_first_and_only_once(broker):
+    first = broker.submit('research', {'intent': 'a'})
+    second = broker.submit('research', {'intent': 'b'})
+    task = broker.lease('w1')
+    assert (task.id, task.payload, task.attempts) == (first, {'intent': 'a'}, 1)
+    assert broker.lease('w2').id == second
+    assert broker.lease('w3') is None
+    assert broker.counts() == {'queued': 0, 'leased': 2, 'done': 0, 'failed': 0}
+
+
+def test_lease_filters_by_kind(broker):
+    broker.submit('other', {})
+    task_id = broker.submit('research', {})
+    assert broker.lease('w1', kinds=['research']).id == task_id
+    assert broker.lease('w1', kinds=['research']) is None
+
+
+def test_expired_lease_is_requeued_and_the_old_worker_is_fenced_off(broker):
+    task_id = broker.submit('research', {'intent': 'a'})
+    broker.lease('w1', lease_seconds=60)
+    _expire(broker, task_id)
+
+    task = broker.lease('w2')
+    assert (task.id, task.attempts) == (task_id, 2)
+    # The first worker finds out at its next heartbeat and cannot report a result
+    assert not broker.heartbeat(task_id, 'w1')
+    assert not broker.complete(task_id, 'w1', {'report': 'stale'})
+    assert broker.heartbeat(task_id, 'w2')
+    assert broker.complete(task_id, 'w2', {'report': 'fresh'})
+    job, = broker.jobs()
+    assert (job['status'], job['worker'], job['result']) == ('done', 'w2', {'report': 'fresh'})
+
+
+def test_heartbeat_keeps_the_lease(broker):
+    task_id = broker.submit('research', {})
+    broker.lease('w1', lease_seconds=0.2)
+    for _ in range(3):
+        time.sleep(0.1)
+        assert broker.heartbeat(task_id, 'w1', lease_seconds=0.2)
+    assert broker.lease('w2') is None
+
+
+def test_lease_expiring_on_the_last_attempt_fails_the_job(broker):
+    task_id = broker.submit('research', {}, max_attempts=2)
+    for worker in ('w1', 'w2'):
+        assert broker.lease(worker).id == task_id
+        _expire(broker, task_id)
+    assert broker.lease('w3') is None
+    job, = broker.jobs()
+    assert job['status'] == 'failed'
+    assert job['error'] == 'lease expired 2 times'
+
+
+def test_fail_requeues_until_attempts_run_out(broker):
+    task_id = broker.submit('research', {}, max_attempts=2)
+    broker.lease('w1')
+    broker.fail(task_id, 'w1', 'boom')
+    assert broker.counts()['queued'] == 1
+    broker.lease('w2')
+    broker.fail(task_id, 'w2', 'boom again')
+    job, = broker.jobs()
+    assert (job['status'], job['error'], job['attempts']) == ('failed', 'boom again', 2)
+
+
+def test_fail_without_retry_and_from_a_stale_worker(broker):
+    task_id = broker.submit('research', {})
+    broker.lease('w1')
+    broker.fail(task_id, 'w2', 'not mine')
+    assert broker.counts()['leased'] == 1
+    broker.fail(task_id, 'w1', 'bad input', retry=False)
+    assert broker.counts()['failed'] == 1
+
+
+def test_release_requeues_without_using_an_attempt(broker):
+    task_id = broker.submit('research', {}, max_attempts=1)
+    broker.lease('w1')
+    broker.release(task_id, 'w2')
+    assert broker.counts()['leased'] == 1
+    broker.release(task_id, 'w1')
+    job, = broker.jobs()
+    assert (job['status'], job['worker'], job['attempts']) == ('queued', None, 0)
+    task = broker.lease('w2')
+    assert (task.id, task.attempts) == (task_id, 1)
+    assert broker.complete(task_id, 'w2', {'ok': True})
+
+
+def test_get_broker_parses_sqlite_urls(tmp_path):
+    broker = get_broker(f"sqlite:///{tmp_path}/queue.sqlite")
+    assert broker.path == f"{tmp_path}/queue.sqlite"
+    broker.close()
+    with pytest.raises(ValueError):
+        get_broker('redis://localhost')
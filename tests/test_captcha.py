@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+from noviq.tools.captcha import (CaptchaHandler, HEADLESS_CAPTCHA_POLICY, INTERACTIVE_CAPTCHA_POLICY, captcha_policy,
+                                 parse_policy)
+
+
+def test_parse_policy_rejects_unknown_actions():
+    assert parse_policy(' reroute , skip ') == ['reroute', 'skip']
+    with pytest.raises(ValueError):
+        parse_policy('reroute,solve')
+
+
+def test_defer_is_scoped_to_its_owner():
+    handler = CaptchaHandler(policy='defer', cooldown=30)
+    first, second = object(), object()
+    with handler.deferrable(first):
+        assert handler.handle('duckduckgo', 'same query', 'https://duckduckgo.com', retry=lambda: None) == []
+    assert handler.take_deferred(second, 'same query') is None
+    assert handler.take_deferred(first, 'same query') is not None
+    assert handler.take_deferred(first, 'same query') is None
+    assert handler.counts['deferred'] == 1
+
+
+def test_defer_without_an_owner_falls_through_to_skip():
+    handler = CaptchaHandler(policy='defer,skip')
+    assert handler.handle('duckduckgo', 'query', 'https://duckduckgo.com', retry=lambda: None) == []
+    assert handler.counts['deferred'] == 0
+    assert handler.counts['skipped'] == 1
+
+
+def test_owner_does_not_leak_to_other_threads():
+    handler = CaptchaHandler(policy='defer,skip')
+    with handler.deferrable(object()):
+        thread = threading.Thread(target=handler.handle, args=('duckduckgo', 'q', 'https://duckduckgo.com', lambda: None))
+        thread.start()
+        thread.join()
+    assert handler.counts['skipped'] == 1
+
+
+class Stdin:
+    def __init__(self, tty):
+        self.tty = tty
+
+    def isatty(self):
+        return self.tty
+
+
+@pytest.mark.parametrize('tty, policy', [(True, INTERACTIVE_CAPTCHA_POLICY), (False, HEADLESS_CAPTCHA_POLICY)])
+def test_default_policy_depends_on_the_terminal(monkeypatch, tty, policy):
+    monkeypatch.delenv('NOVIQ_CAPTCHA_POLICY', raising=False)
+    monkeypatch.setattr('sys.stdin', Stdin(tty))
+    assert captcha_policy() == policy
+    assert ('interactive' in CaptchaHandler().actions) is tty
+
+
+def test_environment_overrides_the_default_policy(monkeypatch):
+    monkeypatch.setenv('NOVIQ_CAPTCHA_POLICY', 'skip')
+    monkeypatch.setattr('sys.stdin', Stdin(True))
+    assert CaptchaHandler().actions == ['skip']
+
+
+def test_headless_commands_leave_out_interactive_solving(monkeypatch):
+    from noviq import main
+
+    monkeypatch.delenv('NOVIQ_CAPTCHA_POLICY', raising=False)
+    monkeypatch.setattr('sys.stdin', Stdin(True))
+    main.use_headless_captcha_policy()
+    assert CaptchaHandler().actions == ['reroute', 'defer']
@@ -0,0 +1,81 @@
+import json
+import os
+import time
+
+from noviq.research.checkpoint import RunCheckpoint, clear_runs, get_runs_dir, prune_runs
+
+
+def _record_run(path):
+    checkpoint = RunCheckpoint(str(path))
+    checkpoint.record('start', model='llama3', vector_index_dir='/tmp/index')
+    checkpoint.record('plan', user_intent='heat pumps', qa_pairs=[['Why?', 'Cost']], research_plan=['a', 'b'])
+    checkpoint.record('queries', step_index=0, queries=['q1', 'q2'])
+    checkpoint.record('page', seq=[0, 1], query='q2', step='a', title='T', url='https://example.org', content='text')
+    checkpoint.record('summary', seq=[0, 1], summary='short', search_stats={'searches': 2})
+    return checkpoint
+
+
+def test_replay_restores_state(tmp_path):
+    _record_run(tmp_path / 'run.jsonl')
+
+    checkpoint = RunCheckpoint(str(tmp_path / 'run.jsonl'))
+    assert checkpoint.started
+    assert checkpoint.model_name == 'llama3'
+    assert checkpoint.vector_index_dir == '/tmp/index'
+    assert checkpoint.qa_pairs == [('Why?', 'Cost')]
+    assert checkpoint.research_plan == ['a', 'b']
+    assert checkpoint.queries == {0: ['q1', 'q2']}
+    assert checkpoint.pages[(0, 1)]['url'] == 'https://example.org'
+    assert checkpoint.summaries == {(0, 1): 'short'}
+    assert checkpoint.search_stats == {'searches': 2}
+    assert not checkpoint.report_done
+
+
+def test_torn_tail_is_ignored_on_replay(tmp_path):
+    path = tmp_path / 'run.jsonl'
+    _record_run(path)
+    with open(path, 'a') as f:
+        f.write('{"kind": "summary", "seq": [1, 0], "summ')
+
+    checkpoint = RunCheckpoint(str(path))
+    assert (1, 0) not in checkpoint.summaries
+    assert checkpoint.summaries == {(0, 1): 'short'}
+
+
+def test_torn_tail_is_cut_before_the_next_record(tmp_path):
+    path = tmp_path / 'run.jsonl'
+    _record_run(path)
+    with open(path, 'a') as f:
+        f.write('{"kind": "summary", "seq": [1, 0], "summ')
+
+    RunCheckpoint(str(path)).record('report', sources=1)
+
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert all(json.loads(line) for line in lines)
+    assert json.loads(lines[-1])['kind'] == 'report'
+    assert RunCheckpoint(str(path)).report_done
+
+
+def test_latest_skips_finished_runs():
+    finished = RunCheckpoint.create('finished')
+    finished.record('start', model='m')
+    finished.record('report', sources=0)
+    unfinished = RunCheckpoint.create('unfinished')
+    unfinished.record('start', model='m')
+
+    assert RunCheckpoint.latest().run_id == 'unfinished'
+    assert RunCheckpoint.open('finished').report_done
+
+
+def test_prune_and_clear_runs():
+    old = RunCheckpoint.create('old')
+    old.record('start', model='m')
+    RunCheckpoint.create('new').record('start', model='m')
+    stale = time.time() - 30 * 86400
+    os.utime(old.path, (stale, stale))
+
+    assert prune_runs(keep_days=7) == 1
+    assert sorted(os.listdir(get_runs_dir())) == ['new.jsonl']
+    assert clear_runs() == 1
+    assert os.listdir(get_runs_dir()) == []
@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import dspy
+import pytest
+
+from noviq.research.context import ContextOverflowError, ContextWindowManager, OUTPUT_RESERVE_TOKENS
+
+
+class WordCounter:
+    """One token per word, so budgets in the tests are exact"""
+
+    def count(self, text):
+        return len(text.split())
+
+    def truncate(self, text, max_tokens, keep='head'):
+        words = text.split()
+        return ' '.join(words[:max_tokens] if keep == 'head' else words[-max_tokens:])
+
+    def split(self, text, chunk_tokens):
+        words = text.split()
+        return [' '.join(words[i:i + chunk_tokens]) for i in range(0, len(words), chunk_tokens)]
+
+
+class Summarize(dspy.Signature):
+    """Summarize the page for the intent"""
+    user_intent: str = dspy.InputField()
+    page: str = dspy.InputField()
+    summary: str = dspy.OutputField()
+
+
+def manager(policy, budget=300):
+    context = ContextWindowManager('fake', context_length=10 ** 6, policy=policy, counter=WordCounter())
+    # Size the window so the inputs get exactly `budget` tokens
+    context.context_length = OUTPUT_RESERVE_TOKENS + context._signature_overhead(Summarize) + budget
+    assert context.input_budget(Summarize) == budget
+    return context
+
+
+PAGE = ' '.join(f"w{index}" for index in range(1000))
+
+
+def test_inputs_that_fit_are_left_alone():
+    context = manager('reject')
+    inputs = {'user_intent': 'heat pumps', 'page': 'short page'}
+    assert context.fit('summarize', Summarize, inputs) is inputs
+    assert context.stats['summarize'] == {'calls': 1, 'input_tokens': 4, 'max_input_tokens': 4,
+                                          'overflows': 0, 'tokens_removed': 0}
+
+
+def test_truncate_tail_keeps_the_start_of_the_largest_field():
+    context = manager('truncate_tail')
+    fitted = context.fit('summarize', Summarize, {'user_intent': 'heat pumps', 'page': PAGE})
+    assert fitted['user_intent'] == 'heat pumps'
+    assert fitted['page'].split() == PAGE.split()[:298]
+    assert context.stats['summarize']['overflows'] == 1
+    assert context.stats['summarize']['tokens_removed'] == 702
+
+
+def test_truncate_head_keeps_the_end():
+    context = manager('truncate_head')
+    fitted = context.fit('summarize', Summarize, {'user_intent': 'heat pumps', 'page': PAGE})
+    assert fitted['page'].split() == PAGE.split()[-298:]
+
+
+def test_lists_of_text_are_shrunk_proportionally():
+    context = manager('truncate_tail')
+    pages = [' '.join(['a'] * 600), ' '.join(['b'] * 200)]
+    fitted = context.fit('summarize', Summarize, {'user_intent': 'heat pumps', 'page': pages})
+    first, second = (len(page.split()) for page in fitted['page'])
+    assert first + second <= 298
+    assert first == pytest.approx(3 * second, abs=2)
+
+
+def test_chunk_condenses_the_field_chunk_by_chunk():
+    context = manager('chunk')
+    calls = []
+
+    def chunk_stage(user_intent, qa_pairs, source_material):
+        calls.append(source_material[0])
+        return SimpleNamespace(section_notes=source_material[0].split()[0])
+    context.chunk_stage = chunk_stage
+
+    fitted = context.fit('summarize', Summarize, {'user_intent': 'heat pumps', 'page': PAGE})
+    assert len(calls) == 7 and all(len(chunk.split()) <= 150 for chunk in calls)
+    assert fitted['page'].split() == ['w0', 'w150', 'w300', 'w450', 'w600', 'w750', 'w900']
+
+
+def test_chunk_without_a_chunk_stage_truncates():
+    context = manager('chunk')
+    fitted = context.fit('summarize', Summarize, {'user_intent': 'heat pumps', 'page': PAGE})
+    assert len(fitted['page'].split()) == 298
+
+
+def test_reject_raises_instead_of_cutting():
+    context = manager('reject')
+    with pytest.raises(ContextOverflowError):
+        context.fit('summarize', Summarize, {'user_intent': 'heat pumps', 'page': PAGE})
+    assert context.stats['summarize']['overflows'] == 1
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ContextWindowManager('fake', context_length=8192, policy='drop')
@@ -0,0 +1,66 @@
+import random
+
+from noviq.research.dedup import NearDuplicateDetector, minhash, similarity
+
+VOCABULARY = [f"word{index}" for index in range(5000)]
+
+
+def _page(rng, words=600):
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def _substitute(rng, text, share):
+    words = text.split()
+    for index in rng.sample(range(len(words)), int(len(words) * share)):
+        words[index] = rng.choice(VOCABULARY)
+    return ' '.join(words)
+
+
+def _detection_rate(pairs):
+    detected = 0
+    for original, variant in pairs:
+        detector = NearDuplicateDetector()
+        detector.add(minhash(original), 'https://original.example')
+        detected += detector.find(minhash(variant)) == 'https://original.example'
+    return detected / len(pairs)
+
+
+def test_minhash_is_deterministic_and_ignores_case():
+    text = _page(random.Random(1))
+    assert (minhash(text) == minhash(text.upper())).all()
+    assert minhash("  ,.;  ") is None
+
+
+def test_similarity_estimates_jaccard():
+    rng = random.Random(2)
+    text = _page(rng)
+    assert similarity(minhash(text), minhash(text)) == 1.0
+    assert similarity(minhash(text), minhash(_page(rng))) < 0.1
+
+
+def test_light_edits_are_detected():
+    rng = random.Random(3)
+    pages = [_page(rng) for _ in range(50)]
+    assert _detection_rate([(page, _substitute(rng, page, 0.01)) for page in pages]) == 1.0
+    assert _detection_rate([(page, _substitute(rng, page, 0.02)) for page in pages]) >= 0.95
+    # Syndicated copies: same body under a different header and footer
+    assert _detection_rate([(page, f"Republished by Example News. {page} Share this story.") for page in pages]) == 1.0
+
+
+def test_distinct_pages_are_not_flagged():
+    rng = random.Random(4)
+    detector = NearDuplicateDetector()
+    for index in range(200):
+        page = minhash(_page(rng))
+        assert detector.find(page) is None
+        detector.add(page, f"https://example.org/{index}")
+
+
+def test_first_accepted_url_is_reported():
+    rng = random.Random(5)
+    text = _page(rng)
+    detector = NearDuplicateDetector()
+    detector.add(minhash(text), 'https://first.example')
+    detector.add(minhash(_substitute(rng, text, 0.01)), 'https://second.example')
+    assert detector.find(minhash(text)) == 'https://first.example'
+    assert detector.find(None) is None
@@ -0,0 +1,66 @@
+import codecs
+import sys
+
+import pytest
+
+from noviq.scrape import extract
+from noviq.scrape.extract import available_backends, decode_html, detect_charset, extract_text, get_extractor
+
+PAGE = ("<html><head><title>Heat pumps</title>\n<style>p { color: red }</style></head>\n<body>"
+        "<script>var tracking = 1;</script><h1>Heat  pumps</h1>\n<p>They move heat, not make it.</p></body></html>")
+
+
+def test_bom_wins_over_everything_else():
+    raw = codecs.BOM_UTF8 + b'<meta charset="iso-8859-1"><p>caf\xc3\xa9</p>'
+    assert detect_charset(raw, 'text/html; charset=iso-8859-1') == 'utf-8-sig'
+    assert detect_charset(codecs.BOM_UTF16_LE + '<p>'.encode('utf-16-le')) == 'utf-16'
+
+
+def test_header_charset_wins_over_meta():
+    raw = b'<meta charset="utf-8"><p>caf\xe9</p>'
+    assert detect_charset(raw, 'text/html; charset="ISO-8859-1"') == 'iso8859-1'
+    assert decode_html(raw, 'text/html; charset=latin-1').endswith('café</p>')
+
+
+def test_meta_charset_is_used_without_a_header():
+    raw = b'<html><head><meta http-equiv="Content-Type" content="text/html; charset=windows-1251"></head>'
+    assert detect_charset(raw) == 'cp1251'
+
+
+def test_unknown_declared_charsets_are_ignored():
+    raw = '<meta charset="no-such-codec"><p>café</p>'.encode('utf-8')
+    assert codecs.lookup(detect_charset(raw, 'text/html; charset=bogus')).name == 'utf-8'
+
+
+def test_undeclared_bytes_fall_back_to_utf8_or_cp1252(monkeypatch):
+    # Without charset_normalizer the last resort is utf-8, then cp1252
+    monkeypatch.setitem(sys.modules, 'charset_normalizer', None)
+    assert detect_charset('<p>café</p>'.encode('utf-8')) == 'utf-8'
+    assert detect_charset(b'<p>caf\xe9</p>') == 'cp1252'
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_backends_agree_on_visible_text(backend):
+    assert extract_text(PAGE, backend=backend) == 'Heat pumps Heat pumps They move heat, not make it.'
+
+
+def test_auto_falls_back_to_the_fastest_installed_backend(monkeypatch):
+    monkeypatch.setattr(extract, '_BACKEND_MODULES', {'selectolax': 'noviq_missing_parser', 'lxml': 'noviq_missing_parser',
+                                                      'html.parser': 'bs4', 'stream': 'html.parser'})
+    assert available_backends() == ['html.parser', 'stream']
+    assert get_extractor('auto') is extract.extract_with_html_parser
+
+    monkeypatch.setitem(extract._BACKEND_MODULES, 'html.parser', 'noviq_missing_parser')
+    assert get_extractor('auto') is extract.extract_streaming
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        get_extractor('regex')
+
+
+def test_max_chars_caps_every_backend():
+    for backend in available_backends():
+        assert len(extract_text(PAGE, backend=backend, max_chars=10)) == 10
+    long_page = '<p>' + 'word ' * 50000 + '</p>'
+    assert len(extract.extract_streaming(long_page, max_chars=100)) == 100
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from noviq.tools import federated
+from noviq.tools.federated import FederatedSearch, available_engines, reciprocal_rank_fusion
+
+
+def test_rrf_favours_results_several_engines_agree_on():
+    first = [('A', 'https://a.example/'), ('B', 'https://b.example/'), ('C', 'https://c.example/')]
+    second = [('C again', 'https://www.c.example/#top'), ('D', 'https://d.example/')]
+    fused = reciprocal_rank_fusion([first, second])
+    # C is third and first: 1/63 + 1/61 beats A's 1/61 alone; B and D tie at 1/62
+    assert [url for _, url in fused] == ['https://c.example/', 'https://a.example/', 'https://b.example/', 'https://d.example/']
+    # The first engine's title and URL are kept for a merged result
+    assert fused[0] == ('C', 'https://c.example/')
+
+
+def test_rrf_ties_keep_the_first_engines_order():
+    fused = reciprocal_rank_fusion([[('A', 'https://a.example/')], [('B', 'https://b.example/')]])
+    assert [title for title, _ in fused] == ['A', 'B']
+    assert reciprocal_rank_fusion([]) == []
+
+
+def test_rrf_score_matches_the_formula():
+    fused = reciprocal_rank_fusion([[('A', 'https://a.example/'), ('B', 'https://b.example/')],
+                                    [('B', 'https://b.example/')]], k=1)
+    # A: 1/2, B: 1/3 + 1/2
+    assert [title for title, _ in fused] == ['B', 'A']
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    """Registers fake engines: name -> (delay or threading.Event to wait on, results or an exception)"""
+    def register(**specs):
+        for name, (delay, answer) in specs.items():
+            def search(search_query, use_cache, delay=delay, answer=answer):
+                if isinstance(delay, threading.Event):
+                    delay.wait(5)
+                else:
+                    time.sleep(delay)
+                if isinstance(answer, Exception):
+                    raise answer
+                return answer
+            monkeypatch.setitem(federated.ENGINES, name, (search, lambda: True))
+        return list(specs)
+    return register
+
+
+def test_returns_once_the_quorum_answers(engines):
+    slow = threading.Event()
+    names = engines(fast=(0, [('A', 'https://a.example/')]), also_fast=(0.01, [('B', 'https://b.example/')]),
+                    slow=(slow, [('C', 'https://c.example/')]))
+    search = FederatedSearch(names, timeout=5, quorum=2)
+    started = time.monotonic()
+    results = search.search('heat pumps')
+    assert time.monotonic() - started < 1
+    assert sorted(title for title, _ in results) == ['A', 'B']
+    assert search.stats['slow']['late'] == 1
+    slow.set()
+
+
+def test_errors_do_not_count_towards_the_quorum(engines):
+    names = engines(broken=(0, RuntimeError('down')), first=(0.01, [('A', 'https://a.example/')]),
+                    second=(0.02, [('B', 'https://b.example/')]))
+    search = FederatedSearch(names, timeout=5, quorum=2)
+    assert sorted(title for title, _ in search.search('heat pumps')) == ['A', 'B']
+    assert search.stats['broken']['errors'] == 1
+    assert search.stats['first']['answers'] == search.stats['second']['answers'] == 1
+
+
+def test_timeout_returns_whatever_arrived(engines):
+    stuck = threading.Event()
+    names = engines(fast=(0, [('A', 'https://a.example/')]), stuck=(stuck, [('B', 'https://b.example/')]))
+    search = FederatedSearch(names, timeout=0.1, quorum=2)
+    assert search.search('heat pumps') == [('A', 'https://a.example/')]
+    assert search.stats['stuck']['late'] == 1
+    stuck.set()
+
+
+def test_quorum_is_capped_at_the_engine_count(engines):
+    names = engines(only=(0, [('A', 'https://a.example/')]))
+    assert FederatedSearch(names, quorum=3).quorum == 1
+
+
+def test_available_engines_skips_unconfigured_and_rejects_unknown(monkeypatch):
+    monkeypatch.setattr(federated, 'SEARX_URL', None)
+    monkeypatch.delenv('GOOGLE_API_KEY', raising=False)
+    assert available_engines('searx, duckduckgo,google') == ['duckduckgo']
+    with pytest.raises(ValueError):
+        available_engines('duckduckgo,altavista')
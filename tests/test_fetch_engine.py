@@ -0,0 +1,63 @@
+import threading
+import time
+
+from noviq.scrape.fetch_engine import ConcurrencyLimiter
+
+
+def test_slots_cap_total_and_per_host_concurrency():
+    limiter = ConcurrencyLimiter(max_total=3, max_per_host=1)
+    running = {'total': 0, 'peak': 0, 'a.example': 0, 'peak_a': 0}
+    lock = threading.Lock()
+
+    def fetch(host):
+        with limiter.slot(host):
+            with lock:
+                running['total'] += 1
+                running['peak'] = max(running['peak'], running['total'])
+                if host == 'a.example':
+                    running['a.example'] += 1
+                    running['peak_a'] = max(running['peak_a'], running['a.example'])
+            time.sleep(0.02)
+            with lock:
+                running['total'] -= 1
+                if host == 'a.example':
+                    running['a.example'] -= 1
+
+    threads = [threading.Thread(target=fetch, args=(host,)) for host in ['a.example'] * 4 + ['b.example', 'c.example', 'd.example']]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert running['peak'] <= 3
+    assert running['peak_a'] == 1
+
+
+def test_sleeping_caller_gives_its_slot_back():
+    limiter = ConcurrencyLimiter(max_total=1, max_per_host=1)
+    order = []
+
+    def throttled():
+        with limiter.slot('slow.example'):
+            with limiter.released():
+                time.sleep(0.3)
+            order.append('throttled')
+
+    def other():
+        time.sleep(0.05)
+        with limiter.slot('fast.example'):
+            order.append('other')
+
+    threads = [threading.Thread(target=throttled), threading.Thread(target=other)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert order == ['other', 'throttled']
+
+
+def test_released_outside_a_slot_is_a_no_op():
+    limiter = ConcurrencyLimiter(max_total=1, max_per_host=1)
+    with limiter.released():
+        pass
+    with limiter.slot('a.example'):
+        pass
@@ -0,0 +1,25 @@
+import os
+
+from noviq.main import main
+from noviq.research.checkpoint import RunCheckpoint, get_runs_dir
+from noviq.research.vector_index import get_index_root
+
+
+def _leftovers():
+    RunCheckpoint.create('resumable').record('start', model='m')
+    os.makedirs(os.path.join(get_index_root(), 'run-1'))
+
+
+def test_bare_cache_clear_keeps_runs_and_indexes(capsys):
+    _leftovers()
+    main(['cache', 'clear'])
+    assert os.listdir(get_runs_dir()) == ['resumable.jsonl']
+    assert os.listdir(get_index_root()) == ['run-1']
+    assert "Cleared page cache" in capsys.readouterr().out
+
+
+def test_runs_and_indexes_are_cleared_on_request():
+    _leftovers()
+    main(['cache', 'clear', '--runs', '--index'])
+    assert os.listdir(get_runs_dir()) == []
+    assert os.listdir(get_index_root()) == []
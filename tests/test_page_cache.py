@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+
+from noviq.cache.page_cache import PageCache
+
+
+def test_put_and_get_by_normalized_url(tmp_path):
+    cache = PageCache(str(tmp_path))
+    cache.put('https://example.org/a', b'<html>a</html>', 'a', etag='"v1"')
+    page = cache.get('https://example.org/a#section')
+    assert page.fresh and page.text == 'a'
+    assert cache.read_raw(page) == b'<html>a</html>'
+    assert cache.get('https://example.org/missing') is None
+    assert (cache.stats['hits'], cache.stats['misses']) == (1, 1)
+
+
+def test_stale_page_is_revalidated(tmp_path):
+    cache = PageCache(str(tmp_path), ttl=0)
+    cache.put('https://example.org/a', b'body', 'text', etag='"v1"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+    page = cache.get('https://example.org/a')
+    assert not page.fresh
+    assert page.conditional_headers() == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+    assert cache.stats['stale'] == 1
+
+    cache.ttl = 60
+    cache.refresh('https://example.org/a')
+    assert cache.get('https://example.org/a').fresh
+    assert cache.stats['revalidated'] == 1
+
+
+def test_least_recently_used_pages_are_evicted(tmp_path):
+    cache = PageCache(str(tmp_path), max_bytes=250)
+    for name in 'abc':
+        cache.put(f"https://example.org/{name}", name.encode() * 100, '')
+        time.sleep(0.01)
+    # c pushed the cache over the limit; a was used least recently
+    assert cache.get('https://example.org/a') is None
+    assert cache.get('https://example.org/b') is not None
+    cache.put('https://example.org/d', b'd' * 100, '')
+    assert cache.get('https://example.org/c') is None
+    assert cache.get('https://example.org/b') is not None
+    assert cache.stats['evictions'] == 2
+    assert sorted(os.listdir(cache.blob_dir)) == sorted(
+        page.content_hash for page in (cache.get('https://example.org/b'), cache.get('https://example.org/d')))
+
+
+def test_shared_blob_outlives_one_of_its_urls(tmp_path):
+    cache = PageCache(str(tmp_path), max_bytes=150)
+    cache.put('https://example.org/original', b'x' * 60, '')
+    time.sleep(0.01)
+    cache.put('https://mirror.example/copy', b'x' * 60, '')
+    time.sleep(0.01)
+    cache.put('https://example.org/other', b'y' * 60, '')
+    assert cache.get('https://example.org/original') is None
+    mirror = cache.get('https://mirror.example/copy')
+    assert cache.read_raw(mirror) == b'x' * 60
+
+
+def test_concurrent_puts_never_leave_a_row_without_its_blob(tmp_path):
+    cache = PageCache(str(tmp_path), max_bytes=2000)
+    bodies = [bytes([index]) * 300 for index in range(4)]
+
+    def writer(worker):
+        for index in range(40):
+            cache.put(f"https://example.org/{worker}/{index}", bodies[(worker + index) % 4], '')
+
+    threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    rows = cache._db.execute("SELECT content_hash FROM pages").fetchall()
+    assert rows
+    assert all(os.path.exists(cache._blob_path(content_hash)) for content_hash, in rows)
+    assert not [name for name in os.listdir(cache.blob_dir) if name.endswith('.tmp')]
+
+
+def test_clear_removes_rows_and_blobs(tmp_path):
+    cache = PageCache(str(tmp_path))
+    cache.put('https://example.org/a', b'a', 'a')
+    cache.clear()
+    assert cache.get('https://example.org/a') is None
+    assert os.listdir(cache.blob_dir) == []
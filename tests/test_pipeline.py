@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from noviq.research import pipeline
+from noviq.research.pipeline import ResearchPipeline
+from noviq.research.ranking import EngineRanker, ResultRanker
+from noviq.research.summarizer_pool import SummarizationPool
+
+
+class FakeScrape:
+    def __init__(self, url):
+        self.url = url
+        self.blocked = False
+        self.cache_status = 'miss'
+
+    def fetch(self):
+        time.sleep(random.uniform(0, 0.005))
+        return f"<p>{self.url}</p>", None
+
+    def extract(self, html):
+        return f"Text of {self.url}"
+
+
+class FakeManager:
+    """Just the parts of ResearchManager the pipeline calls, with random delays to shuffle completion order"""
+
+    def __init__(self, release_summaries=None):
+        self.checkpoint = None
+        self.search_stats = {}
+        self.result_ranker = ResultRanker(rankers=[('engine', EngineRanker(), 1.0)])
+        self.release_summaries = release_summaries
+        self.searches = 0
+        self.summarized = []
+        self._claimed = set()
+        self._lock = threading.Lock()
+
+    def generate_web_search_queries(self, user_intent, qa_pairs, overall_research_plan, research_plan_step):
+        return SimpleNamespace(web_search_queries=[f"{research_plan_step} first", f"{research_plan_step} second"])
+
+    def _bump(self, name, amount=1):
+        pass
+
+    def _search(self, query):
+        with self._lock:
+            self.searches += 1
+        time.sleep(random.uniform(0, 0.01))
+        slug = query.replace(' ', '-')
+        return [(f"{query} {index}", f"https://{slug}.example/{index}") for index in range(3)]
+
+    def claim_url(self, url):
+        with self._lock:
+            if url in self._claimed:
+                return False
+            self._claimed.add(url)
+            return True
+
+    def _count_cache_status(self, status):
+        pass
+
+    def accept_content(self, url, content, step=None, query=None):
+        return True
+
+    def _index_page(self, title, url, content):
+        pass
+
+    def summarize_page(self, user_intent, title, url, content):
+        if self.release_summaries is not None:
+            self.release_summaries.wait(5)
+        time.sleep(random.uniform(0, 0.01))
+        with self._lock:
+            self.summarized.append(url)
+        return f"Summary of {url}"
+
+
+def run(monkeypatch, manager, plan, min_sources=100, listener=None):
+    monkeypatch.setattr(pipeline, 'BeautifulSoupScrape', FakeScrape)
+    research = ResearchPipeline(manager, plan, 'heat pumps', [], min_sources=min_sources, listener=listener,
+                                summarization_pool=SummarizationPool(workers=3))
+    return research, research.run()
+
+
+def test_pages_come_back_in_plan_order(monkeypatch):
+    plan = [f"step{index}" for index in range(5)]
+    research, items = run(monkeypatch, FakeManager(), plan)
+    assert [item.seq for item in items] == [(step, query) for step in range(5) for query in range(2)]
+    assert all(item.summary == f"Summary of {item.url}" for item in items)
+    assert [item.query for item in items[:2]] == ['step0 first', 'step0 second']
+    assert len({item.url for item in items}) == 10
+    assert research.stats()['fetch']['processed'] == 10
+
+
+def test_min_sources_stops_accepting_pages(monkeypatch):
+    research, items = run(monkeypatch, FakeManager(), [f"step{index}" for index in range(5)], min_sources=3)
+    assert len(items) == 3 and research.accepted == 3
+    assert research.enough.is_set()
+
+
+def test_cancel_drains_queued_work(monkeypatch):
+    release = threading.Event()
+    manager = FakeManager(release_summaries=release)
+    monkeypatch.setattr(pipeline, 'BeautifulSoupScrape', FakeScrape)
+    research = ResearchPipeline(manager, [f"step{index}" for index in range(20)], 'heat pumps', [], min_sources=100,
+                                summarization_pool=SummarizationPool(workers=3))
+
+    def listener(event, payload):
+        if event == 'page':
+            research.cancel()
+            release.set()
+    research.listener = listener
+
+    started = time.monotonic()
+    items = research.run()
+    assert time.monotonic() - started < 5
+    assert research.cancelled.is_set() and research.stopped.is_set()
+    # Work queued behind the cancel is dropped rather than searched, fetched or summarized
+    assert manager.searches < 20
+    assert len(items) < 40 and len(manager.summarized) == len(items)
@@ -0,0 +1,138 @@
+import time
+from urllib.robotparser import RobotFileParser
+
+import pytest
+
+from noviq.scrape import transport
+from noviq.scrape.politeness import COOLDOWN_BASE, HostBlockedError, PolitenessScheduler, TokenBucket
+
+
+class RobotsTransport:
+    """Answers every robots.txt request with one status and body"""
+
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.text = text
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        self.requests.append((url, kwargs))
+        return transport.TransportResponse(url, self.status_code, {}, self.text.encode(), 'utf-8', False)
+
+
+@pytest.fixture
+def robots(monkeypatch):
+    def serve(status_code, text=''):
+        fake = RobotsTransport(status_code, text)
+        monkeypatch.setattr(transport, 'get_transport', lambda: fake)
+        return fake
+    return serve
+
+
+def test_bucket_allows_a_burst_then_spaces_requests():
+    bucket = TokenBucket(rate=2.0, burst=3)
+    now = bucket.updated
+    assert [bucket.reserve(now) for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Out of tokens: each further request waits another 1 / rate
+    assert bucket.reserve(now) == pytest.approx(0.5)
+    assert bucket.reserve(now) == pytest.approx(1.0)
+
+
+def test_bucket_refills_up_to_burst():
+    bucket = TokenBucket(rate=2.0, burst=3)
+    now = bucket.updated
+    for _ in range(3):
+        bucket.reserve(now)
+    assert bucket.reserve(now + 0.5) == 0.0
+    assert bucket.reserve(now + 100) == 0.0
+    assert bucket.tokens == pytest.approx(2.0)
+
+
+def test_acquire_waits_on_the_hosts_own_bucket():
+    scheduler = PolitenessScheduler(rate=20.0, burst=1, rates={})
+    assert scheduler.acquire('https://a.example/1') == 0.0
+    assert scheduler.acquire('https://b.example/1') == 0.0
+    started = time.monotonic()
+    waited = scheduler.acquire('https://a.example/2')
+    assert waited == pytest.approx(0.05, abs=0.02)
+    assert time.monotonic() - started >= 0.04
+    assert scheduler.host_stats()['a.example']['requests'] == 2
+
+
+def test_host_rates_match_by_suffix():
+    scheduler = PolitenessScheduler(rate=2.0, rates={'duckduckgo.com': 0.5})
+    assert scheduler._base_rate('html.duckduckgo.com') == 0.5
+    assert scheduler._base_rate('example.org') == 2.0
+
+
+def test_exempt_hosts_and_disabled_scheduler_never_wait():
+    scheduler = PolitenessScheduler(rate=0.1, burst=1, rates={})
+    for _ in range(3):
+        assert scheduler.acquire('http://localhost:8000/') == 0.0
+    disabled = PolitenessScheduler(rate=0.1, burst=1, rates={}, enabled=False)
+    for _ in range(3):
+        assert disabled.acquire('https://example.org/') == 0.0
+
+
+def test_block_halves_the_rate_and_cools_the_host_down():
+    scheduler = PolitenessScheduler(rate=4.0, burst=1, rates={})
+    scheduler.record('https://example.org/', 429)
+    state = scheduler._state('example.org')
+    assert state.bucket.rate == 2.0
+    assert scheduler.cooling_down('https://example.org/other')
+    assert not scheduler.cooling_down('https://other.example/')
+    assert state.blocked_until - time.monotonic() == pytest.approx(COOLDOWN_BASE, abs=0.5)
+    with pytest.raises(HostBlockedError):
+        scheduler.acquire('https://example.org/', deadline_at=time.monotonic() + 1)
+
+    # Repeated blocks double the cooldown; Retry-After can lengthen it further
+    scheduler.penalize('https://example.org/', retry_after=60)
+    assert state.strikes == 2
+    assert state.blocked_until - time.monotonic() == pytest.approx(60, abs=0.5)
+
+
+def test_successes_win_the_rate_back_gradually():
+    scheduler = PolitenessScheduler(rate=4.0, burst=1, rates={})
+    scheduler.record('https://example.org/', 403)
+    state = scheduler._state('example.org')
+    scheduler.record('https://example.org/', 200)
+    assert state.strikes == 0
+    assert 2.0 < state.bucket.rate < 4.0
+    for _ in range(20):
+        scheduler.record('https://example.org/', 200)
+    assert state.bucket.rate == 4.0
+
+
+def test_robots_disallowed_urls_are_refused():
+    scheduler = PolitenessScheduler(rate=4.0, rates={})
+    parser = RobotFileParser()
+    parser.parse(["User-agent: *", "Disallow: /private"])
+    # Seed the cache instead of downloading robots.txt
+    scheduler._robots['example.org'] = (parser, time.monotonic() + 60)
+    assert scheduler.allowed('https://example.org/public')
+    assert not scheduler.allowed('https://example.org/private/page')
+    assert scheduler.host_stats()['example.org']['disallowed'] == 1
+
+
+@pytest.mark.parametrize('status_code, allowed', [(401, False), (403, False), (404, True), (410, True), (503, False)])
+def test_robots_status_codes_follow_the_stdlib(robots, status_code, allowed):
+    robots(status_code)
+    scheduler = PolitenessScheduler(rates={})
+    assert scheduler.allowed('https://example.org/page') is allowed
+
+
+def test_robots_fetch_does_not_penalize_the_host(robots):
+    fake = robots(403)
+    scheduler = PolitenessScheduler(rates={})
+    scheduler.allowed('https://example.org/page')
+    assert fake.requests[0][1]['record_status'] is False
+    assert not scheduler.cooling_down('https://example.org/page')
+
+
+def test_crawl_delay_reaches_the_bucket_acquire_uses(robots):
+    fake = robots(200, "User-agent: *\nCrawl-delay: 4\nDisallow: /private\n")
+    scheduler = PolitenessScheduler(rate=2.0, rates={})
+    assert scheduler.allowed('https://example.org:8443/page')
+    assert not scheduler.allowed('https://example.org:8443/private')
+    assert fake.requests[0][0] == 'https://example.org:8443/robots.txt'
+    assert scheduler._state('example.org').bucket.rate == 0.25
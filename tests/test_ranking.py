@@ -0,0 +1,73 @@
+import threading
+
+from noviq.research.ranking import Candidate, CandidateQueue, DomainPriorRanker, ResultRanker
+
+
+def _queue(count, budget):
+    return CandidateQueue([Candidate(f"Page {index}", f"https://example{index}.org/") for index in range(count)], budget)
+
+
+def test_candidates_come_out_best_first_until_the_budget_is_spent():
+    queue = _queue(5, budget=3)
+    assert len(queue) == 3
+    assert [queue.next().url for _ in range(3)] == [f"https://example{index}.org/" for index in range(3)]
+    assert queue.next() is None
+    assert len(queue) == 0
+
+
+def test_refused_claims_do_not_spend_budget():
+    queue = _queue(5, budget=2)
+    taken = {'https://example0.org/', 'https://example2.org/'}
+    claim = lambda url: url not in taken
+    assert queue.next(claim).url == 'https://example1.org/'
+    assert queue.next(claim).url == 'https://example3.org/'
+    assert queue.next(claim) is None
+    assert queue.taken == 2
+
+
+def test_refund_returns_budget_for_a_blocked_page():
+    queue = _queue(3, budget=1)
+    assert queue.next().url == 'https://example0.org/'
+    assert queue.next() is None
+    queue.refund()
+    assert queue.next().url == 'https://example1.org/'
+    queue.refund()
+    queue.refund()
+    assert queue.taken == 0
+
+
+def test_concurrent_slots_never_share_a_candidate():
+    queue = _queue(200, budget=150)
+    taken = []
+    lock = threading.Lock()
+
+    def slot():
+        while (candidate := queue.next()) is not None:
+            with lock:
+                taken.append(candidate.url)
+
+    threads = [threading.Thread(target=slot) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(taken) == 150
+    assert len(set(taken)) == 150
+
+
+def test_merge_deduplicates_urls_across_queries():
+    candidates = ResultRanker.merge({
+        'q1': [('A', 'https://example.org/a'), ('B', 'https://example.org/b')],
+        'q2': [('A again', 'https://example.org/a'), ('C', 'https://example.org/c')],
+    })
+    assert [candidate.url for candidate in candidates] == ['https://example.org/a', 'https://example.org/b',
+                                                         'https://example.org/c']
+    assert candidates[0].queries == ['q1', 'q2']
+    assert candidates[0].positions == [0, 0]
+
+
+def test_domain_prior_ranks_reference_sites_first():
+    ranker = ResultRanker([('domain', DomainPriorRanker(), 1.0)])
+    ranked = ranker.rank({'q': [('Pin', 'https://www.pinterest.com/x'), ('Wiki', 'https://en.wikipedia.org/wiki/X')]})
+    assert [candidate.title for candidate in ranked] == ['Wiki', 'Pin']
+    assert ranked[0].scores['domain'] > ranked[1].scores['domain']
@@ -0,0 +1,51 @@
+from noviq.research.relevance import RelevanceScorer, tokenize
+
+ON_TOPIC = ("Heat pumps move heat from outside air into the house. An air source heat pump keeps working "
+            "in cold climates, and heat pump efficiency is measured as the coefficient of performance. ") * 5
+OFF_TOPIC = ("The recipe needs flour, butter and sugar. Bake the cake for forty minutes and let it cool "
+             "before slicing. Serve with cream. ") * 5
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert tokenize("The batteries of heat pumps") == ['battery', 'heat', 'pump']
+
+
+def test_on_topic_page_beats_off_topic_page():
+    scorer = RelevanceScorer()
+    on_topic = scorer.score(ON_TOPIC, user_intent="heat pumps", query="heat pump efficiency cold climate")
+    off_topic = scorer.score(OFF_TOPIC, user_intent="heat pumps", query="heat pump efficiency cold climate")
+    assert 0.0 < on_topic < 1.0
+    assert off_topic == 0.0
+    assert on_topic > scorer.threshold > off_topic
+
+
+def test_empty_query_terms_keep_every_page():
+    scorer = RelevanceScorer()
+    # Every word is a stopword or too short to be a term
+    assert scorer.score(OFF_TOPIC, user_intent="What is C?", step="overview", query="a guide") == 1.0
+    kept, score = scorer.check('https://example.org', OFF_TOPIC, user_intent="What is C?")
+    assert kept and score == 1.0
+
+
+def test_page_without_words_scores_zero():
+    assert RelevanceScorer().score("  ... --- !!! ", query="heat pump") == 0.0
+
+
+def test_page_is_scored_before_its_terms_are_counted():
+    # IDF comes from earlier pages only: a term on the current page must not demote itself
+    scorer = RelevanceScorer()
+    first = scorer.score("heat pump " * 60 + "boiler " * 60, query="heat pump boiler")
+    assert scorer.score("heat pump " * 60 + "boiler " * 60, query="heat pump boiler") == first
+    # A term earlier pages lacked is rarer than one they all had, so it weighs more
+    scorer.score("heat pump " * 120, query="heat pump")
+    boiler_page = scorer.score("boiler " * 120 + "unrelated words " * 60, query="heat pump boiler")
+    pump_page = scorer.score("heat " * 120 + "unrelated words " * 60, query="heat pump boiler")
+    assert boiler_page > pump_page
+
+
+def test_report_counts_skipped_pages(capsys):
+    scorer = RelevanceScorer(threshold=0.1)
+    scorer.check('https://a.example', ON_TOPIC, query="heat pump")
+    scorer.check('https://b.example', OFF_TOPIC, query="heat pump")
+    scorer.report()
+    assert "1/2 pages skipped" in capsys.readouterr().out
@@ -0,0 +1,65 @@
+import pytest
+
+from noviq.cache.page_cache import PageCache
+from noviq.scrape import scrape
+from noviq.scrape.politeness import PolitenessScheduler
+from noviq.scrape.transport import TransportResponse
+
+
+class PageTransport:
+    def __init__(self, status_code, html):
+        self.status_code = status_code
+        self.html = html
+
+    def get(self, url, **kwargs):
+        return TransportResponse(url, self.status_code, {'Content-Type': 'text/html; charset=utf-8'},
+                                 self.html.encode(), 'utf-8', False)
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    politeness = PolitenessScheduler(rates={})
+    monkeypatch.setattr(politeness, 'allowed', lambda url: True)
+    monkeypatch.setattr(scrape, 'get_politeness', lambda: politeness)
+
+    def serve(status_code, html):
+        monkeypatch.setattr(scrape, 'get_transport', lambda: PageTransport(status_code, html))
+        return politeness
+    return serve
+
+
+ARTICLE = "<html><body><article><p>" + "Heat pumps move heat from outside air. " * 30 + "</p></article></body></html>"
+
+
+def test_ordinary_page_is_fetched_and_extracted(tmp_path, serve):
+    serve(200, ARTICLE)
+    page = scrape.BeautifulSoupScrape('https://example.org/a', cache=PageCache(str(tmp_path)))
+    html, text = page.fetch()
+    assert text is None and not page.blocked
+    assert "Heat pumps move heat" in page.extract(html)
+
+
+def test_captcha_challenge_blocks_and_penalizes_the_host(tmp_path, serve):
+    politeness = serve(200, "<html><body>Please solve this CAPTCHA to continue</body></html>")
+    page = scrape.BeautifulSoupScrape('https://example.org/a', cache=PageCache(str(tmp_path)))
+    assert page.fetch() == (None, "Skipped due to website access restrictions")
+    assert page.blocked
+    assert politeness.cooling_down('https://example.org/b')
+
+
+def test_page_mentioning_captcha_leaves_the_host_alone(tmp_path, serve):
+    politeness = serve(200, ARTICLE.replace("</article>", '</article><div class="g-recaptcha"></div>'))
+    page = scrape.BeautifulSoupScrape('https://example.org/a', cache=PageCache(str(tmp_path)))
+    html, text = page.fetch()
+    assert html is None and text.startswith("Skipped")
+    assert not page.blocked
+    assert not politeness.cooling_down('https://example.org/b')
+    assert politeness._state('example.org').bucket.rate == politeness.rate
+
+
+@pytest.mark.parametrize('status_code', [403, 429])
+def test_block_statuses_mark_the_page_blocked(tmp_path, serve, status_code):
+    serve(status_code, "<html>denied</html>")
+    page = scrape.BeautifulSoupScrape('https://example.org/a', cache=PageCache(str(tmp_path)))
+    html, text = page.fetch()
+    assert html is None and page.blocked
@@ -0,0 +1,59 @@
+import pytest
+
+from noviq.cache import search_cache
+from noviq.cache.search_cache import SearchCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(search_cache, 'time', clock)
+    return clock
+
+
+RESULTS = [('Heat pumps', 'https://example.org/heat-pumps')]
+
+
+def test_results_are_served_until_the_ttl_runs_out(tmp_path, clock):
+    cache = SearchCache(str(tmp_path / 'search.sqlite'), ttl=60)
+    cache.put('duckduckgo', 'Heat  Pumps ', RESULTS)
+    clock.now += 59
+    assert cache.get('duckduckgo', 'heat pumps') == RESULTS
+    clock.now += 1
+    assert cache.get('duckduckgo', 'heat pumps') is None
+    assert cache.stats == {'hits': 1, 'misses': 1}
+
+
+def test_entries_are_kept_per_engine(tmp_path, clock):
+    cache = SearchCache(str(tmp_path / 'search.sqlite'))
+    cache.put('duckduckgo', 'heat pumps', RESULTS)
+    assert cache.get('brave', 'heat pumps') is None
+
+
+def test_empty_results_are_not_cached(tmp_path, clock):
+    cache = SearchCache(str(tmp_path / 'search.sqlite'))
+    cache.put('duckduckgo', 'heat pumps', [])
+    assert cache.get('duckduckgo', 'heat pumps') is None
+
+
+def test_expired_and_least_recently_used_entries_are_dropped(tmp_path, clock):
+    cache = SearchCache(str(tmp_path / 'search.sqlite'), ttl=100, max_entries=2)
+    cache.put('duckduckgo', 'old', RESULTS)
+    clock.now += 100
+    cache.put('duckduckgo', 'a', RESULTS)
+    clock.now += 1
+    cache.put('duckduckgo', 'b', RESULTS)
+    clock.now += 1
+    cache.get('duckduckgo', 'a')
+    clock.now += 1
+    cache.put('duckduckgo', 'c', RESULTS)
+    rows = {query for query, in cache._db.execute("SELECT query FROM results")}
+    assert rows == {'a', 'c'}
@@ -0,0 +1,136 @@
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from noviq.server.app import RETRY_AFTER_SECONDS, ResearchServer
+from noviq.server.jobs import JobQueue
+
+
+@pytest.fixture
+def gate():
+    gate = threading.Event()
+    yield gate
+    gate.set()
+
+
+@pytest.fixture
+def server(monkeypatch, gate):
+    """Starts a server whose jobs wait for `gate`, then emit three events and a report"""
+
+    async def run(self, job):
+        gate.wait(5)
+        for index in range(3):
+            job.add_event({'type': 'progress', 'index': index})
+        job.report = '<html>report</html>'
+        job.set_status('done')
+    monkeypatch.setattr(JobQueue, '_run', run)
+
+    servers = []
+
+    def start(workers=1, max_queued=1):
+        jobs = JobQueue(default_model='fake', workers=workers, max_queued=max_queued)
+        httpd = ResearchServer(('127.0.0.1', 0), jobs)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return httpd
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+        httpd.jobs.shutdown(wait=False)
+
+
+def request(httpd, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1], timeout=5)
+    connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers or {})
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    is_json = response.getheader('Content-Type') == 'application/json'
+    return response, json.loads(data) if is_json else data.decode()
+
+
+def wait_for(predicate):
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_submits_beyond_the_queue_get_429(server):
+    httpd = server(workers=1, max_queued=1)
+    response, running = request(httpd, 'POST', '/jobs', {'intent': 'heat pumps'})
+    assert response.status == 202 and response.getheader('Location') == f"/jobs/{running['id']}"
+    wait_for(lambda: httpd.jobs.get(running['id']).status == 'running')
+    assert request(httpd, 'POST', '/jobs', {'intent': 'solar panels'})[0].status == 202
+
+    response, body = request(httpd, 'POST', '/jobs', {'intent': 'wind turbines'})
+    assert response.status == 429
+    assert response.getheader('Retry-After') == str(RETRY_AFTER_SECONDS)
+    assert 'capacity' in body['error']
+    health = request(httpd, 'GET', '/health')[1]
+    assert (health['running'], health['queued'], health['rejected']) == (1, 1, 1)
+
+
+def test_no_queue_admits_only_what_the_workers_can_run(server):
+    httpd = server(workers=1, max_queued=0)
+    assert request(httpd, 'POST', '/jobs', {'intent': 'heat pumps'})[0].status == 202
+    assert request(httpd, 'POST', '/jobs', {'intent': 'solar panels'})[0].status == 429
+
+
+def test_bad_requests_are_rejected(server):
+    httpd = server()
+    assert request(httpd, 'POST', '/jobs', {'qa_pairs': []})[0].status == 400
+    assert request(httpd, 'POST', '/jobs', {'intent': 'x', 'qa_pairs': [['only a question']]})[0].status == 400
+    assert request(httpd, 'GET', '/jobs/missing')[0].status == 404
+    assert request(httpd, 'GET', '/nowhere')[0].status == 404
+
+
+def parse_events(stream):
+    events = []
+    for block in stream.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        events.append((fields.get('id'), fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_event_stream_follows_the_job_to_the_end(server, gate):
+    httpd = server()
+    job = request(httpd, 'POST', '/jobs', {'intent': 'heat pumps'})[1]
+    threading.Timer(0.1, gate.set).start()
+    response, stream = request(httpd, 'GET', f"/jobs/{job['id']}/events")
+    assert response.getheader('Content-Type') == 'text/event-stream'
+    events = parse_events(stream)
+    assert [(event_id, kind) for event_id, kind, _ in events] == [('0', 'progress'), ('1', 'progress'), ('2', 'progress'), (None, 'end')]
+    assert events[-1][2]['status'] == 'done' and events[-1][2]['has_report']
+    assert request(httpd, 'GET', f"/jobs/{job['id']}/report")[1] == '<html>report</html>'
+
+
+def test_event_stream_resumes_after_an_event(server, gate):
+    httpd = server()
+    job = request(httpd, 'POST', '/jobs', {'intent': 'heat pumps'})[1]
+    gate.set()
+    wait_for(lambda: httpd.jobs.get(job['id']).done)
+    stream = request(httpd, 'GET', f"/jobs/{job['id']}/events?after=1")[1]
+    assert [event_id for event_id, _, _ in parse_events(stream)] == ['2', None]
+    stream = request(httpd, 'GET', f"/jobs/{job['id']}/events", headers={'Last-Event-ID': '0'})[1]
+    assert [event_id for event_id, _, _ in parse_events(stream)] == ['1', '2', None]
+    assert request(httpd, 'GET', f"/jobs/{job['id']}/events?after=first")[0].status == 400
+
+
+def test_shutdown_does_not_wait_on_a_full_queue(server, gate):
+    httpd = server(workers=1, max_queued=1)
+    running = request(httpd, 'POST', '/jobs', {'intent': 'heat pumps'})[1]
+    wait_for(lambda: httpd.jobs.get(running['id']).status == 'running')
+    queued = request(httpd, 'POST', '/jobs', {'intent': 'solar panels'})[1]
+    started = time.monotonic()
+    httpd.jobs.shutdown(wait=False)
+    assert time.monotonic() - started < 1
+    assert httpd.jobs.get(queued['id']).status == 'cancelled'
+    gate.set()
+    for thread in httpd.jobs._threads:
+        thread.join(5)
+        assert not thread.is_alive()
@@ -0,0 +1,61 @@
+import threading
+import types
+
+import pytest
+
+from noviq.research.synthesis import ReportSynthesizer, batch_sources
+
+
+class Cancelled(Exception):
+    pass
+
+
+def _synthesizer(calls, on_notes=None):
+    def notes_stage(source_material, **kwargs):
+        calls.append('notes')
+        if on_notes:
+            on_notes()
+        return types.SimpleNamespace(section_notes='n' * 40)
+
+    def report_stage(**kwargs):
+        calls.append('report')
+        return types.SimpleNamespace(research_report='<html>report</html>')
+
+    return ReportSynthesizer(notes_stage, report_stage, token_budget=100, max_workers=1)
+
+
+SOURCES = [str(index) * 300 for index in range(6)]
+
+
+def test_batch_sources_respects_the_budget():
+    batches = batch_sources(['a' * 40, 'b' * 40, 'c' * 40, 'd' * 1000], token_budget=25)
+    assert batches == [['a' * 40, 'b' * 40], ['c' * 40], ['d' * 100]]
+
+
+def test_small_source_sets_skip_the_map_step():
+    calls = []
+    assert _synthesizer(calls).synthesize('topic', [], ['short'], ['summary']) == '<html>report</html>'
+    assert calls == ['report']
+
+
+def test_sections_are_reported_as_they_finish():
+    calls = []
+    sections = []
+    report = _synthesizer(calls).synthesize('topic', [], SOURCES, [], on_section=lambda *args: sections.append(args[:3]))
+    assert report == '<html>report</html>'
+    assert sorted(sections[:6]) == [(1, index, 6) for index in range(6)]
+    assert calls[-1] == 'report'
+
+
+def test_cancel_stops_between_map_calls():
+    calls = []
+    stop = threading.Event()
+
+    def check_cancelled():
+        if stop.is_set():
+            raise Cancelled()
+
+    synthesizer = _synthesizer(calls, on_notes=lambda: len(calls) == 2 and stop.set())
+    with pytest.raises(Cancelled):
+        synthesizer.synthesize('topic', [], SOURCES, [], check_cancelled=check_cancelled)
+    assert calls == ['notes', 'notes']
@@ -0,0 +1,146 @@
+import time
+from datetime import timedelta
+
+import pytest
+import requests
+
+from noviq.scrape import transport
+from noviq.scrape.politeness import HostBlockedError
+from noviq.scrape.transport import HTTPTransport
+
+
+class FakeResponse:
+    def __init__(self, url, status_code, chunks=(b'ok',), headers=None, chunk_delay=0.0):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.encoding = 'utf-8'
+        self.elapsed = timedelta(milliseconds=1)
+        self.chunks = list(chunks)
+        self.chunk_delay = chunk_delay
+        self.read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            time.sleep(self.chunk_delay)
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """Answers each GET with the next scripted response, or raises it if it is an exception"""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        answer = self.answers.pop(0) if len(self.answers) > 1 else self.answers[0]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer(url) if callable(answer) else answer
+
+
+class Politeness:
+    def __init__(self, blocked_after=None):
+        self.recorded = []
+        self.blocked_after = blocked_after
+
+    def acquire(self, url, deadline_at=None):
+        if self.blocked_after is not None and len(self.recorded) >= self.blocked_after:
+            raise HostBlockedError(f"{url} is cooling down")
+        return 0.0
+
+    def record(self, url, status_code, retry_after=None):
+        self.recorded.append(status_code)
+
+
+def make_transport(monkeypatch, session, politeness=None, **kwargs):
+    monkeypatch.setattr(transport, 'BACKOFF_BASE', 0.001)
+    client = HTTPTransport(politeness=politeness or Politeness(), **kwargs)
+    client.session = session
+    return client
+
+
+def test_transient_status_is_retried(monkeypatch):
+    session = FakeSession(FakeResponse('https://example.org/', 503), FakeResponse('https://example.org/', 200))
+    politeness = Politeness()
+    client = make_transport(monkeypatch, session, politeness)
+    result = client.get('https://example.org/')
+    assert (result.status_code, session.calls) == (200, 2)
+    assert politeness.recorded == [503, 200]
+    assert client._retries == {'example.org': 1}
+
+
+def test_retries_stop_after_max_retries(monkeypatch):
+    session = FakeSession(lambda url: FakeResponse(url, 502))
+    client = make_transport(monkeypatch, session, max_retries=2)
+    assert client.get('https://example.org/').status_code == 502
+    assert session.calls == 3
+
+
+def test_connection_errors_are_retried_then_raised(monkeypatch):
+    session = FakeSession(requests.ConnectionError('refused'))
+    client = make_transport(monkeypatch, session, max_retries=2)
+    with pytest.raises(requests.ConnectionError):
+        client.get('https://example.org/')
+    assert session.calls == 3
+
+
+def test_client_errors_are_not_retried(monkeypatch):
+    session = FakeSession(lambda url: FakeResponse(url, 404))
+    client = make_transport(monkeypatch, session)
+    assert client.get('https://example.org/').status_code == 404
+    assert session.calls == 1
+
+
+def test_deadline_covers_retries(monkeypatch):
+    session = FakeSession(lambda url: FakeResponse(url, 503, headers={'Retry-After': '1'}))
+    client = make_transport(monkeypatch, session, max_retries=10)
+    started = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        client.get('https://example.org/', deadline=0.2)
+    assert time.monotonic() - started < 1
+    assert session.calls == 1
+
+
+def test_deadline_stops_a_slow_body(monkeypatch):
+    response = FakeResponse('https://example.org/', 200, chunks=[b'x'] * 50, chunk_delay=0.02)
+    client = make_transport(monkeypatch, FakeSession(response), max_retries=0)
+    with pytest.raises(requests.Timeout):
+        client.get('https://example.org/', deadline=0.1)
+    assert response.read < 50 and response.closed
+
+
+def test_body_is_capped_at_max_bytes(monkeypatch):
+    response = FakeResponse('https://example.org/', 200, chunks=[b'a' * 100] * 10)
+    client = make_transport(monkeypatch, FakeSession(response))
+    result = client.get('https://example.org/', max_bytes=250)
+    assert result.truncated and result.content == b'a' * 250
+    assert response.read == 3 and response.closed
+
+
+def test_small_body_is_not_truncated(monkeypatch):
+    response = FakeResponse('https://example.org/', 200, chunks=[b'<p>caf\xc3\xa9</p>'])
+    client = make_transport(monkeypatch, FakeSession(response))
+    result = client.get('https://example.org/')
+    assert not result.truncated and result.text == '<p>café</p>'
+
+
+def test_blocked_host_hands_back_the_last_response(monkeypatch):
+    session = FakeSession(lambda url: FakeResponse(url, 429))
+    client = make_transport(monkeypatch, session, politeness=Politeness(blocked_after=1))
+    assert client.get('https://example.org/').status_code == 429
+    assert session.calls == 1
+
+
+def test_status_is_not_recorded_when_asked(monkeypatch):
+    politeness = Politeness()
+    client = make_transport(monkeypatch, FakeSession(lambda url: FakeResponse(url, 403)), politeness)
+    client.get('https://example.org/robots.txt', record_status=False)
+    assert politeness.recorded == []
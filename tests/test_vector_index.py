@@ -0,0 +1,82 @@
+import zlib
+
+import numpy as np
+import pytest
+
+from noviq.research import vector_index
+from noviq.research.checkpoint import RunCheckpoint
+from noviq.research.vector_index import VectorIndex, chunk_text
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embeddings, so the index runs without Ollama"""
+
+    def __init__(self, dim=64):
+        self.dim = dim
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % self.dim] += 1.0
+        return vectors
+
+
+def _page(topic):
+    return ' '.join(f"{topic} fact{index}" for index in range(150))
+
+
+def test_search_finds_the_matching_page_and_survives_reopening(tmp_path):
+    index = VectorIndex(str(tmp_path / 'index'), embedder=HashingEmbedder())
+    index.add(_page('volcano'), 'Volcanoes', 'https://example.org/volcano')
+    index.add(_page('glacier'), 'Glaciers', 'https://example.org/glacier')
+    assert index.urls() == {'https://example.org/volcano', 'https://example.org/glacier'}
+    assert index.search('volcano')[0][1]['url'] == 'https://example.org/volcano'
+
+    reopened = VectorIndex(str(tmp_path / 'index'), embedder=HashingEmbedder())
+    assert len(reopened) == len(index)
+    assert reopened.search('glacier')[0][1]['url'] == 'https://example.org/glacier'
+
+    reopened.delete()
+    assert not (tmp_path / 'index').exists()
+
+
+def test_chunks_overlap():
+    chunks = chunk_text(' '.join(str(index) for index in range(1000)))
+    assert len(chunks) > 1
+    assert chunks[0].split()[-1] in chunks[1].split()
+
+
+@pytest.fixture
+def resumable_run(tmp_path, monkeypatch):
+    """
+    A checkpoint with two restored pages whose recorded index directory is gone
+    """
+    monkeypatch.setenv('NOVIQ_VECTOR_INDEX', '1')
+    embedder = HashingEmbedder()
+    monkeypatch.setattr(vector_index, 'OllamaEmbedder', lambda: embedder)
+    checkpoint = RunCheckpoint(str(tmp_path / 'run.jsonl'))
+    checkpoint.record('start', model='fake', vector_index_dir=str(tmp_path / 'pruned-index'))
+    checkpoint.record('plan', user_intent='earth science', qa_pairs=[], research_plan=['volcanoes', 'glaciers'])
+    for seq, topic in enumerate(('volcano', 'glacier')):
+        checkpoint.record('page', seq=[seq, 0], query=topic, step=topic, title=topic.title(),
+                          url=f"https://example.org/{topic}", content=_page(topic))
+    return RunCheckpoint(str(tmp_path / 'run.jsonl'))
+
+
+def test_resume_reindexes_pages_missing_from_the_index(resumable_run):
+    from noviq.research.context import ContextWindowManager
+    from noviq.research.research_manager import ResearchManager
+
+    manager = ResearchManager('fake', context=ContextWindowManager('fake', context_length=8192), checkpoint=resumable_run)
+    assert manager.vector_index.urls() == {'https://example.org/volcano', 'https://example.org/glacier'}
+    context = manager.retrieve_report_context('earth science')
+    assert any('example.org/volcano' in chunk for chunk in context)
+    assert any('example.org/glacier' in chunk for chunk in context)
+
+    # A second resume finds everything indexed and embeds nothing new
+    indexed = len(manager.vector_index)
+    again = ResearchManager('fake', context=ContextWindowManager('fake', context_length=8192), checkpoint=resumable_run)
+    assert len(again.vector_index) == indexed